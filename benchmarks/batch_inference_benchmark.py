@@ -0,0 +1,123 @@
+"""
+Measure how many concurrent monitoring sessions one process serves within a target latency.
+
+Every simulated session classifies a window at the target frame rate, like a PostureMonitor that
+classifies every frame. Sessions are added until the p95 classification latency exceeds the target or
+sessions fall behind their frame rate, once with the shared interpreter pool and once with the
+batch inference server.
+
+Usage:
+    python -m benchmarks.batch_inference_benchmark --exercise squat --target-latency-ms 50
+"""
+import argparse
+import os
+import threading
+import time
+
+import numpy as np
+
+from config import workout_configurations, system_configuration
+from utils import batch_inference_utils, model_registry_utils, model_utils
+
+# Share of the frames a session must classify to keep up with the frame rate
+MIN_DELIVERED_RATIO = 0.95
+
+
+def run_sessions(predict, session_count, window, fps, duration):
+    """
+    Run sessions that each classify a window every 1 / fps seconds.
+    A session that falls behind skips frames instead of queueing them, like the capture thread.
+
+    Returns:
+        tuple: Latency of every classification in seconds, and the share of frames classified.
+    """
+    latencies = []
+    latencies_lock = threading.Lock()
+    start = time.perf_counter() + 0.1
+    end = start + duration
+
+    def session(offset):
+        next_frame = start + offset
+        session_latencies = []
+        while next_frame < end:
+            time.sleep(max(0.0, next_frame - time.perf_counter()))
+            request_start = time.perf_counter()
+            predict(window)
+            session_latencies.append(time.perf_counter() - request_start)
+            next_frame = max(next_frame + 1 / fps, time.perf_counter())
+        with latencies_lock:
+            latencies.extend(session_latencies)
+
+    # Spread the sessions over one frame interval, cameras are not synchronized
+    threads = [threading.Thread(target=session, args=(index / session_count / fps,))
+               for index in range(session_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, len(latencies) / (session_count * duration * fps)
+
+
+def find_capacity(name, predict, window, args):
+    """
+    Add sessions until the latency target or the frame rate is missed.
+
+    Returns:
+        int: Largest number of sessions served within the target.
+    """
+    capacity = 0
+    print(f"{name}")
+    print(f"{'sessions':>10}{'p50 ms':>10}{'p95 ms':>10}{'delivered':>11}")
+    for session_count in range(1, args.max_sessions + 1, args.step):
+        latencies, delivered = run_sessions(predict, session_count, window, args.fps, args.duration)
+        p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+        print(f"{session_count:>10}{p50:>10.2f}{p95:>10.2f}{delivered:>10.0%}")
+        if p95 > args.target_latency_ms or delivered < MIN_DELIVERED_RATIO:
+            break
+        capacity = session_count
+    return capacity
+
+
+def run_benchmark(args):
+    workout_config = workout_configurations[args.exercise]
+    sequence_length = workout_config["sequence_length"]
+    window = np.random.default_rng(0).standard_normal(
+        (sequence_length, workout_config["keypoints_num"] * 2)).astype(np.float32)
+    cpu_count = os.cpu_count() or 1
+
+    model_registry = model_registry_utils.ModelRegistry(
+        workout_configurations, system_configuration["inference_backend"],
+        system_configuration["interpreter_pool_size"])
+    interpreter_pool = model_registry.get_pool(args.exercise)
+    pool_capacity = find_capacity(
+        f"interpreter pool ({system_configuration['interpreter_pool_size']} interpreters)",
+        lambda sequence: model_utils.predict_posture(sequence, interpreter_pool, sequence_length), window, args)
+
+    server_config = system_configuration["inference_server"]
+    inference_server = batch_inference_utils.BatchInferenceServer(
+        model_registry, args.exercise, sequence_length, server_config["max_batch_size"],
+        server_config["max_wait_ms"]).start()
+    server_capacity = find_capacity(
+        f"batch inference server (max batch {server_config['max_batch_size']}, "
+        f"max wait {server_config['max_wait_ms']} ms)", inference_server.predict, window, args)
+    server_stats = inference_server.get_stats()
+    inference_server.stop()
+
+    print(f"\nSessions within p95 {args.target_latency_ms} ms at {args.fps} fps on {cpu_count} cores:")
+    print(f"  interpreter pool:       {pool_capacity:>4} ({pool_capacity / cpu_count:.2f} per core)")
+    print(f"  batch inference server: {server_capacity:>4} ({server_capacity / cpu_count:.2f} per core)")
+    print(f"  average batch size {server_stats['average_batch_size']:.2f}, "
+          f"resizable batch sizes {server_stats['resizable_batch_sizes']}, "
+          f"fallback invokes {server_stats['fallback_invokes']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure concurrent sessions served within a target latency.")
+    parser.add_argument("--exercise", default="squat", choices=list(workout_configurations))
+    parser.add_argument("--target-latency-ms", type=float, default=50.0)
+    parser.add_argument("--fps", type=float, default=system_configuration["target_fps"],
+                        help="Classifications per second of each session")
+    parser.add_argument("--duration", type=float, default=3.0, help="Seconds per session count")
+    parser.add_argument("--max-sessions", type=int, default=32)
+    parser.add_argument("--step", type=int, default=1, help="Sessions added per measurement")
+    run_benchmark(parser.parse_args())
@@ -0,0 +1,166 @@
+"""
+Compare inference scheduler settings on the recorded rep videos.
+
+Pose estimation runs once per video; every scheduler setting then replays the same keypoint
+windows, so the reported inference time and rep results only depend on the scheduler.
+
+Usage:
+    python -m benchmarks.inference_scheduler_benchmark --exercise squat
+"""
+import argparse
+import contextlib
+import glob
+import io
+import os
+import time
+
+import cv2
+import mediapipe as mp
+
+from config import workout_configurations, system_configuration
+from utils import (body_verification_utils,
+                   exercise_profile_utils,
+                   feedback_utils,
+                   inference_scheduler_utils,
+                   interpolation_utils,
+                   keypoint_buffer_utils,
+                   keypoints_utils,
+                   landmark_utils,
+                   model_registry_utils,
+                   model_utils)
+
+SCHEDULER_SETTINGS = [
+    {"stride": 1, "time_budget_ms": None, "policy": "always"},
+    {"stride": 2, "time_budget_ms": None, "policy": "always"},
+    {"stride": 3, "time_budget_ms": None, "policy": "always"},
+    {"stride": 5, "time_budget_ms": None, "policy": "always"},
+    {"stride": 1, "time_budget_ms": None, "policy": "down_phase"},
+    {"stride": 2, "time_budget_ms": None, "policy": "down_phase"},
+]
+
+
+def extract_rep_windows(video_path, exercise, workout_config, system_config):
+    """
+    Run pose estimation over a recorded rep and build the model input window of every frame.
+
+    Returns:
+        tuple: List of (window or None, rep stage) per frame with a detected pose, and the video frame rate.
+    """
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or system_config["target_fps"]
+    sequence_length = workout_config["sequence_length"]
+    exercise_profile = exercise_profile_utils.compile_exercise_profile(exercise, workout_config, system_config)
+    sequence = keypoint_buffer_utils.KeypointRingBuffer(sequence_length, workout_config["keypoints_num"] * 2)
+    sequence_needed = interpolation_utils.calculate_sequence_needed(fps, system_config["target_fps"],
+                                                                    sequence_length)
+    frames = []
+    view_direction = None
+    current_stage = stage = "none"
+
+    with mp.solutions.pose.Pose(min_tracking_confidence=0.8) as pose:
+        while cap.isOpened():
+            ret, frame = cap.read()
+            if not ret:
+                break
+            results = pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            if not results.pose_landmarks:
+                continue
+            landmarks = landmark_utils.landmarks_to_array(results.pose_landmarks)
+
+            # A rep keeps the side view the set was verified with
+            if view_direction is None:
+                view_direction = body_verification_utils.determine_side_view(landmarks)
+                if view_direction not in exercise_profile.keypoint_indices:
+                    view_direction = None
+                    continue
+
+            keypoints = keypoints_utils.extract_keypoints(landmarks, exercise_profile.keypoint_indices[view_direction])
+            sequence.append(keypoints_utils.scale_and_rel_position_normalize_keypoints(
+                keypoints, flip_horizontally=view_direction == "right"))
+
+            window = None
+            if len(sequence) >= sequence_needed:
+                window = interpolation_utils.resample_keypoints_sequence(
+                    sequence.last(sequence_needed), fps, system_config["target_fps"], sequence_length,
+                    system_config["sequence_resampling"]["method"])
+            frames.append((window, current_stage))
+
+            _, current_stage, _ = keypoints_utils.rep_counting_algorithms[exercise](
+                current_stage=current_stage, stage=stage, keypoints=keypoints, exercise_profile=exercise_profile,
+                system_config=system_config, view_direction=view_direction)
+            stage = current_stage
+
+    cap.release()
+    return frames, fps
+
+
+def replay_rep(frames, fps, setting, interpreter_pool, workout_config, exercise_profile):
+    """
+    Classify the windows of one rep with a scheduler setting and analyse the rep like the monitor does.
+
+    Returns:
+        dict: Rep result, model invocations and inference CPU time.
+    """
+    scheduler = inference_scheduler_utils.InferenceScheduler(**setting)
+    detections = []
+    last_detection = None
+    inference_time = 0.0
+
+    for window, stage in frames:
+        if window is None:
+            continue
+        if scheduler.should_infer(stage):
+            start = time.process_time()
+            last_detection, _ = model_utils.predict_posture(window, interpreter_pool,
+                                                            workout_config["sequence_length"])
+            elapsed = time.process_time() - start
+            inference_time += elapsed
+            scheduler.record_inference_time(elapsed)
+        elif not scheduler.holds_last_result(stage):
+            continue
+        if last_detection is not None:
+            detections.append(last_detection)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        rep_result, _, _, _ = feedback_utils.analyze_rep(1, [], detections, [fps] * max(len(frames), 1),
+                                                        workout_config,
+                                                        {label: 0 for label in workout_config["labels"]},
+                                                        exercise_profile)
+    return {"result": rep_result, "invocations": scheduler.invocations, "inference_time": inference_time}
+
+
+def run_benchmark(exercise, video_dir=None):
+    workout_config = workout_configurations[exercise]
+    video_dir = video_dir or workout_config["workout_data_directory"]["rep_video"]
+    video_paths = sorted(glob.glob(os.path.join(video_dir, "*.mp4")))
+    model_registry = model_registry_utils.ModelRegistry(workout_configurations,
+                                                        system_configuration["inference_backend"], pool_size=1)
+    interpreter_pool = model_registry.get_pool(exercise)
+    exercise_profile = exercise_profile_utils.compile_exercise_profile(exercise, workout_config, system_configuration)
+
+    recorded_reps = [extract_rep_windows(path, exercise, workout_config, system_configuration)
+                     for path in video_paths]
+
+    baseline = None
+    print(f"{exercise}: {len(video_paths)} recorded reps")
+    print(f"{'policy':<12}{'stride':>8}{'invokes':>10}{'infer cpu s':>14}{'speedup':>10}{'agreement':>11}")
+    for setting in SCHEDULER_SETTINGS:
+        replays = [replay_rep(frames, fps, setting, interpreter_pool, workout_config, exercise_profile)
+                   for frames, fps in recorded_reps]
+        invocations = sum(replay["invocations"] for replay in replays)
+        inference_time = sum(replay["inference_time"] for replay in replays)
+        results = [replay["result"] for replay in replays]
+        if baseline is None:
+            baseline = {"results": results, "inference_time": inference_time}
+        agreement = sum(result == expected for result, expected in zip(results, baseline["results"]))
+        speedup = baseline["inference_time"] / inference_time if inference_time else float("inf")
+        print(f"{setting['policy']:<12}{setting['stride']:>8}{invocations:>10}{inference_time:>14.3f}"
+              f"{speedup:>10.2f}{agreement:>6}/{len(results)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare inference scheduler settings on recorded reps.")
+    parser.add_argument("--exercise", default="squat", choices=list(workout_configurations))
+    parser.add_argument("--video-dir", default=None, help="Directory of rep videos (default: the exercise's)")
+    args = parser.parse_args()
+    run_benchmark(args.exercise, args.video_dir)
@@ -0,0 +1,88 @@
+"""
+Compare the keypoint normalizers on random keypoint frames.
+
+The list-based normalizer the monitor used before normalize_keypoints_batch is kept here as the
+reference; every run checks that the array-native results are identical to it.
+
+Usage:
+    python -m benchmarks.normalization_benchmark --frames 1000 --keypoints 6
+"""
+import argparse
+import timeit
+
+import numpy as np
+
+from utils import keypoints_utils
+
+
+def legacy_normalize_keypoints(keypoints, flip_horizontally=False):
+    """
+    Former list-based keypoints_utils.scale_and_rel_position_normalize_keypoints.
+    """
+    hip_x, hip_y = keypoints[1]
+    shoulder_x, shoulder_y = keypoints[0]
+
+    hip = np.array([hip_x, hip_y])
+    shoulder = np.array([shoulder_x, shoulder_y])
+    scale = np.linalg.norm(hip - shoulder)
+    scale_factor = 1 / scale if scale > 0 else 1.0
+
+    scaled_keypoints = []
+    for keypoint in keypoints:
+        scaled_keypoints.append([keypoint[0] * scale_factor, keypoint[1] * scale_factor])
+
+    hip_scaled_x, hip_scaled_y = scaled_keypoints[1]
+    normalized_frame_keypoints = []
+    for keypoint in scaled_keypoints:
+        normalized_frame_keypoints.append([keypoint[0] - hip_scaled_x, keypoint[1] - hip_scaled_y])
+
+    if flip_horizontally:
+        for keypoint in normalized_frame_keypoints:
+            keypoint[0] = -keypoint[0]
+
+    return np.array(normalized_frame_keypoints).flatten()
+
+
+def time_per_frame(function, frame_count, repeat):
+    """
+    Best of repeat runs, in microseconds per frame.
+    """
+    return min(timeit.repeat(function, number=1, repeat=repeat)) / frame_count * 1e6
+
+
+def run_benchmark(args):
+    keypoints = np.random.default_rng(0).random((args.frames, args.keypoints, 2))
+    flip = args.flip
+    output = np.empty((args.frames, args.keypoints * 2))
+
+    legacy = np.stack([legacy_normalize_keypoints(frame, flip) for frame in keypoints])
+    per_frame = np.stack([keypoints_utils.scale_and_rel_position_normalize_keypoints(frame, flip)
+                          for frame in keypoints])
+    batch = keypoints_utils.normalize_keypoints_batch(keypoints, flip)
+    print(f"max difference to legacy: per frame {np.max(np.abs(per_frame - legacy)):.3g}, "
+          f"batch {np.max(np.abs(batch - legacy)):.3g}")
+
+    results = {
+        "legacy per frame": time_per_frame(
+            lambda: [legacy_normalize_keypoints(frame, flip) for frame in keypoints], args.frames, args.repeat),
+        "array per frame": time_per_frame(
+            lambda: [keypoints_utils.scale_and_rel_position_normalize_keypoints(frame, flip)
+                     for frame in keypoints], args.frames, args.repeat),
+        "array batch": time_per_frame(
+            lambda: keypoints_utils.normalize_keypoints_batch(keypoints, flip, out=output),
+            args.frames, args.repeat),
+    }
+
+    print(f"{args.frames} frames of {args.keypoints} keypoints, flip {flip}")
+    print(f"{'normalizer':<20}{'us/frame':>10}{'speedup':>10}")
+    for name, microseconds in results.items():
+        print(f"{name:<20}{microseconds:>10.2f}{results['legacy per frame'] / microseconds:>9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the keypoint normalizers.")
+    parser.add_argument("--frames", type=int, default=1000)
+    parser.add_argument("--keypoints", type=int, default=6)
+    parser.add_argument("--flip", action="store_true", help="Mirror the normalized keypoints")
+    parser.add_argument("--repeat", type=int, default=5)
+    run_benchmark(parser.parse_args())
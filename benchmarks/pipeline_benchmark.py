@@ -0,0 +1,326 @@
+"""
+Push the recorded rep videos through the monitoring pipeline headless and measure every stage.
+
+Every frame runs the stages of PostureMonitor in order: decode, preprocessing, pose estimation, landmark
+drawing, the workout analysis of the running set (keypoints, interpolation, classification, body
+verification, rep counting and rep analysis) and the recorder calls. Videos are decoded as fast as possible,
+so the frame latency is the processing time of a frame. The Streamlit placeholders are replaced by elements
+that draw nothing and speech requests stay queued on a stopped worker. Results are written to a JSON file
+together with the git commit, so runs can be compared across commits.
+
+Usage:
+    python -m benchmarks.pipeline_benchmark
+    python -m benchmarks.pipeline_benchmark --output after.json --compare before.json
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+
+from config import workout_configurations, system_configuration
+from utils import (body_verification_utils,
+                   exercise_profile_utils,
+                   frame_source_utils,
+                   model_registry_utils,
+                   speech_utils)
+from utils.posture_monitor import PostureMonitor
+from utils.video_recording_utils import VideoRecorder, RepRangeRecorder
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STAGES = ("decode", "preprocess", "pose", "render", "analyze", "record")
+PERCENTILES = (50, 95, 99)
+EXERCISE_ID = "BENCHMARK"
+
+
+class HeadlessElement:
+    """
+    Stands in for a Streamlit placeholder or the frame window; every call draws nothing.
+    """
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def get_peak_rss_bytes():
+    """
+    Peak resident set size of this process, None where the platform does not report it.
+    """
+    if resource is not None:
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+    try:
+        import psutil
+    except ImportError:
+        return None
+    memory_info = psutil.Process().memory_info()
+    return getattr(memory_info, "peak_wset", memory_info.rss)
+
+
+def get_git_commit():
+    """
+    Commit of the working tree, with "-dirty" if it has uncommitted changes; None outside a git checkout.
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{commit}-dirty" if status else commit
+
+
+def create_video_recorders(system_config, output_dir):
+    """
+    Set and rep video recorders of the recording mode, like the posture monitoring page, writing to output_dir.
+    """
+    resize_size = (system_config["resize_width"], system_config["resize_height"])
+    rep_video_dir = os.path.join(output_dir, "rep_video")
+    set_video_dir = os.path.join(output_dir, "set_video")
+    os.makedirs(rep_video_dir, exist_ok=True)
+    os.makedirs(set_video_dir, exist_ok=True)
+    recording_config = system_config["recording"]
+    if recording_config["mode"] == "single":
+        set_video_recorder = VideoRecorder(resize_size, 24, set_video_dir, rep_clip_dir=rep_video_dir,
+                                           rep_clips=recording_config["rep_clips"])
+        return {"set_video_recorder": set_video_recorder,
+                "rep_video_recorder": RepRangeRecorder(set_video_recorder)}
+    return {"set_video_recorder": VideoRecorder(resize_size, 24, set_video_dir),
+            "rep_video_recorder": VideoRecorder(resize_size, 24, rep_video_dir)}
+
+
+def create_monitor(exercise, context, output_dir):
+    """
+    PostureMonitor of an exercise with headless placeholders, a stopped speech worker and recorders
+    writing to output_dir.
+    """
+    workout_config = workout_configurations[exercise]
+    session_state = SimpleNamespace(selected_exercise=exercise, workout_state="start", set=1, rep=1,
+                                    workout_time="00:00", set_results=[], current_button=None,
+                                    button_hover_start_time=None)
+    placeholders = {name: HeadlessElement() for name in ("system_info", "feedback", "workout_time", "set", "rep")}
+    placeholders["label"] = {label: HeadlessElement() for label in workout_config["labels"]}
+    return PostureMonitor(system_config=context["system_config"],
+                          workout_config=workout_config,
+                          exercise_profile=context["exercise_profiles"][exercise],
+                          exercise=exercise,
+                          exercise_id=EXERCISE_ID,
+                          speech_worker=speech_utils.SpeechWorker(output_dir),
+                          model_registry=context["model_registry"],
+                          placeholders=placeholders,
+                          video_recorders=create_video_recorders(context["system_config"], output_dir),
+                          session_state=session_state,
+                          frame_window=HeadlessElement())
+
+
+def run_video(video_path, monitor, frame_times):
+    """
+    Run every frame of a rep video through the stages of the monitor as one set in the "start" state.
+    :param frame_times: Dict of stage -> list of seconds, extended with one entry per stage and frame.
+    :return: Number of frames processed.
+    """
+    session_state = monitor.session_state
+    analysis = monitor.analysis
+    video_source = frame_source_utils.VideoFileSource(video_path, pace="fast")
+    stages = [
+        ("preprocess", monitor.preprocess_frame),
+        ("pose", monitor.detect_pose),
+        ("render", monitor.render_landmarks),
+        ("analyze", monitor.analyze_frame),
+        ("record", monitor.record_frame),
+    ]
+    # The set starts without the ready countdown, so the rep keeps the first side view it is seen from
+    session_state.workout_state = "start"
+    analysis.view_direction = None
+    monitor.current_fps = video_source.fps
+    monitor.pose.reset()
+    monitor.timer.start()
+    recorders = monitor.video_recorders
+    recorders["set_video_recorder"].start_recording(EXERCISE_ID, set_num=session_state.set)
+    recorders["rep_video_recorder"].start_recording(EXERCISE_ID, set_num=session_state.set, rep=session_state.rep)
+    frames = 0
+
+    try:
+        while True:
+            times = dict.fromkeys(STAGES, 0.0)
+
+            stage_start = time.perf_counter()
+            ret, frame, timestamp = video_source.read()
+            if not ret:
+                break
+            packet = {"frame": frame, "timestamp": timestamp}
+            times["decode"] = time.perf_counter() - stage_start
+
+            for name, stage in stages:
+                if name == "analyze":
+                    if analysis.view_direction not in monitor.exercise_profile.keypoint_indices \
+                            and packet["landmarks"] is not None:
+                        analysis.view_direction = body_verification_utils.determine_side_view(packet["landmarks"])
+                    # Without a user no button is hovered long enough to pause or end the set
+                    session_state.workout_state = "start"
+                    session_state.current_button = None
+                    monitor.timer.start()
+                stage_start = time.perf_counter()
+                packet = stage(packet)
+                times[name] = time.perf_counter() - stage_start
+
+            for name in STAGES:
+                frame_times[name].append(times[name])
+            frames += 1
+    finally:
+        video_source.release()
+        monitor.clear_rep_detections()
+        analysis.pause()
+        monitor.pending_audio.clear()
+        recorders["rep_video_recorder"].stop_all_recordings()
+        recorders["set_video_recorder"].stop_recording(EXERCISE_ID, set_num=session_state.set)
+        analysis.reset_set()
+        session_state.set += 1
+        session_state.rep = 1
+    return frames
+
+
+def summarize(seconds):
+    """
+    Mean and percentiles in milliseconds, None without samples.
+    """
+    milliseconds = np.asarray(seconds) * 1000
+    if milliseconds.size == 0:
+        return None
+    summary = {"mean_ms": float(milliseconds.mean())}
+    for percentile, value in zip(PERCENTILES, np.percentile(milliseconds, PERCENTILES)):
+        summary[f"p{percentile}_ms"] = float(value)
+    return summary
+
+
+def run_benchmark(args):
+    system_config = system_configuration
+    exercises = args.exercise or list(workout_configurations)
+    model_registry = model_registry_utils.ModelRegistry(workout_configurations, system_config["inference_backend"],
+                                                        pool_size=1)
+    output_dir = tempfile.mkdtemp(prefix="pipeline_benchmark_")
+    context = {
+        # Rep videos are recorded rotated and mirrored already
+        "system_config": dict(system_config, frame_source=dict(system_config["frame_source"], preprocess=False)),
+        "exercise_profiles": exercise_profile_utils.compile_exercise_profiles(workout_configurations,
+                                                                              system_config),
+        "model_registry": model_registry,
+    }
+
+    results = {}
+    try:
+        for exercise in exercises:
+            video_paths = sorted(glob.glob(os.path.join(
+                workout_configurations[exercise]["workout_data_directory"]["rep_video"], "*.mp4")))
+            if not video_paths:
+                print(f"No rep videos for {exercise}, skipping.")
+                continue
+            frame_times = {name: [] for name in STAGES}
+            frames = 0
+            monitor = create_monitor(exercise, context, os.path.join(output_dir, exercise))
+            try:
+                start_time = time.perf_counter()
+                for _ in range(args.repeat):
+                    for video_path in video_paths:
+                        frames += run_video(video_path, monitor, frame_times)
+                elapsed_time = time.perf_counter() - start_time
+            finally:
+                monitor.close()
+                for recorder in monitor.video_recorders.values():
+                    recorder.stop_all_recordings()
+            if frames == 0:
+                print(f"No frames decoded from the rep videos of {exercise}, skipping.")
+                continue
+
+            frame_latency = np.sum([frame_times[name] for name in STAGES], axis=0)
+            results[exercise] = {
+                "videos": len(video_paths),
+                "frames": frames,
+                "sustained_fps": frames / elapsed_time if elapsed_time > 0 else 0.0,
+                "frame_latency": summarize(frame_latency),
+                "stages": {name: summarize(frame_times[name]) for name in STAGES},
+            }
+            print_exercise_results(exercise, results[exercise])
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    report = {
+        "benchmark": "pipeline",
+        "git_commit": get_git_commit(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "platform": {"system": platform.platform(), "python": platform.python_version(),
+                     "processor": platform.processor(), "cpu_count": os.cpu_count()},
+        "settings": {"repeat": args.repeat, "inference_backend": system_config["inference_backend"],
+                     "sequence_resampling": system_config["sequence_resampling"],
+                     "recording": system_config["recording"]},
+        "peak_rss_bytes": get_peak_rss_bytes(),
+        "exercises": results,
+    }
+    results_dir = os.path.dirname(args.output)
+    if results_dir:
+        os.makedirs(results_dir, exist_ok=True)
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=4)
+    peak_rss = report["peak_rss_bytes"]
+    print(f"\nPeak RSS: {peak_rss / 2 ** 20:.1f} MiB" if peak_rss is not None else "\nPeak RSS: unavailable")
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r") as file:
+            compare_reports(json.load(file), report)
+
+
+def print_exercise_results(exercise, result):
+    latency = result["frame_latency"]
+    print(f"\n{exercise}: {result['videos']} videos, {result['frames']} frames, "
+          f"{result['sustained_fps']:.1f} fps sustained")
+    print(f"  frame latency p50 {latency['p50_ms']:.2f} ms, p95 {latency['p95_ms']:.2f} ms, "
+          f"p99 {latency['p99_ms']:.2f} ms")
+    print(f"  {'stage':<14}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, summary in result["stages"].items():
+        print(f"  {name:<14}{summary['mean_ms']:>10.3f}{summary['p50_ms']:>10.3f}"
+              f"{summary['p95_ms']:>10.3f}{summary['p99_ms']:>10.3f}")
+
+
+def compare_reports(baseline, report):
+    """
+    Print the change of the frame latency, FPS and stage means against a baseline report.
+    """
+    print(f"\nCompared with {baseline.get('git_commit')}:")
+    for exercise, result in report["exercises"].items():
+        baseline_result = baseline["exercises"].get(exercise)
+        if baseline_result is None:
+            continue
+        print(f"  {exercise}")
+        rows = [("sustained fps", baseline_result["sustained_fps"], result["sustained_fps"])]
+        rows += [(f"latency p{percentile}", baseline_result["frame_latency"][f"p{percentile}_ms"],
+                  result["frame_latency"][f"p{percentile}_ms"]) for percentile in PERCENTILES]
+        rows += [(f"{name} mean", baseline_result["stages"][name]["mean_ms"], result["stages"][name]["mean_ms"])
+                 for name in STAGES if name in baseline_result["stages"]]
+        for name, before, after in rows:
+            change = (after - before) / before * 100 if before else 0.0
+            print(f"    {name:<20}{before:>10.3f}{after:>10.3f}{change:>+9.1f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the monitoring pipeline on the recorded rep videos.")
+    parser.add_argument("--exercise", action="append", choices=list(workout_configurations),
+                        help="Exercise to measure, may be repeated; defaults to all")
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the rep videos")
+    parser.add_argument("--output", default="benchmarks/results/pipeline_benchmark.json")
+    parser.add_argument("--compare", help="Earlier results file to compare with")
+    run_benchmark(parser.parse_args())
@@ -49,6 +49,29 @@ def feedback_container(placeholder, text):
        <div class="feedback_container">{text}</div>
        """, unsafe_allow_html=True)
 
+def diagnostics_panel(placeholder, stage_snapshot, model_stats=None):
+    rows = "\n".join(
+        f"| {stage} | {summary['mean_ms']:.2f} | {summary['p50_ms']:.2f} | {summary['p95_ms']:.2f} "
+        f"| {summary['p99_ms']:.2f} | {summary['max_ms']:.2f} | {summary['count']} |"
+        for stage, summary in stage_snapshot.items())
+    model_table = ""
+    if model_stats:
+        model_rows = "\n".join(
+            f"| {exercise} | {stats['backend']} | {stats['model_bytes'] / 1024:.0f} | {stats['live_interpreters']} "
+            f"| {stats['estimated_memory_bytes'] / 1024:.0f} | {stats['file_load_time_ms']:.1f} "
+            f"| {stats['last_create_time_ms'] or 0:.1f} |"
+            for exercise, stats in model_stats.items())
+        model_table = f"""
+| Model | Backend | Model KiB | Live interpreters | Est. memory KiB | Load ms | Create ms |
+|---|---|---:|---:|---:|---:|---:|
+{model_rows}
+"""
+    placeholder.markdown(f"""
+| Stage | Mean ms | p50 ms | p95 ms | p99 ms | Max ms | Calls |
+|---|---:|---:|---:|---:|---:|---:|
+{rows}
+{model_table}""")
+
 def summary_item_container(entry):
     _, col1, _ = st.columns([1, 5, 1])
     with col1:
@@ -300,7 +323,7 @@ def rep_video_list_item_container(entry,set_id):
                     st.session_state.rep_record = entry
                     st.switch_page("pages/exercise_rep_video_playback.py")
 
-def rep_video_playback(video, entry):
+def rep_video_playback(video, entry, start_time=0, end_time=None):
     with stylable_container(key="rep_video_playback_container", css_styles=f"""
                 {{background:{secondary_bg_color};
                 width:80%;
@@ -334,7 +357,7 @@ def rep_video_playback(video, entry):
         with col2:
             _, col1, _ = st.columns([1, 3, 1])
             with col1:
-                st.video(video)
+                st.video(video, start_time=start_time, end_time=end_time)
 
         _, col1, _ = st.columns([1, 5, 1])
         with col1:
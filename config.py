@@ -1,6 +1,11 @@
 workout_configurations = {
     "squat": {
         "model_path": "models/squat_posture_model.tflite",
+        "interpreter_options": {
+            "num_threads": None,  # None lets TFLite decide
+            "delegate": "xnnpack",  # "xnnpack", "none" or the path of a delegate library
+            "warmup": True,  # invoke once on a zero tensor at load time
+        },
         "view": "side",
         "keypoints": {
             "right": ["LEFT_SHOULDER", "LEFT_HIP", "LEFT_KNEE", "LEFT_ANKLE", "LEFT_HEEL", "LEFT_FOOT_INDEX"],
@@ -63,6 +68,11 @@ workout_configurations = {
     },
     "bicep_curl": {
         "model_path": "models/bicep_curl_posture_model.tflite",
+        "interpreter_options": {
+            "num_threads": None,  # None lets TFLite decide
+            "delegate": "xnnpack",  # "xnnpack", "none" or the path of a delegate library
+            "warmup": True,  # invoke once on a zero tensor at load time
+        },
         "view": "side",
         "keypoints": {
             "right": [
@@ -153,7 +163,75 @@ system_configuration = {
     "frame_height": 720,
     "resize_width": 405,
     "resize_height": 720,
+    "sequence_resampling": {
+        # "fps": rebuild the window from the frame rate averaged over the last second
+        # "timestamp": resample the window at exactly target_fps from the capture time of every frame
+        "mode": "fps",
+        "method": "linear",  # "linear" or "cubic" interpolation between captured frames
+        "max_capture_fps": 60,  # sizes the keypoint buffer in "timestamp" mode
+    },
+    "inference_scheduler": {
+        "stride": 1,  # classify every stride-th frame, skipped frames repeat the last result
+        "time_budget_ms": None,  # raise the stride when the average inference time exceeds this budget
+        "policy": "always",  # "always" or "down_phase" (classify only during the down stage of a rep)
+    },
+    "inference_backend": "auto",  # "auto", "ai_edge_litert", "tflite_runtime" or "tensorflow"
+    "interpreter_pool_size": 2,  # interpreters per model shared by all sessions, more sessions wait for a free one
+    "inference_server": {
+        "enabled": False,  # classify the windows of all sessions together in small batches
+        "max_batch_size": 8,
+        "max_wait_ms": 3,  # time the first window of a batch waits for windows of other sessions
+    },
+    "background_inference": False,  # classify on a background thread, results are added as they arrive
+    "frame_source": {
+        "type": "camera",  # "camera", "video" (file), "images" (directory of frames) or "synthetic"
+        "path": None,  # video file or image directory of the "video" and "images" sources
+        # "realtime" replays files at their recorded frame rate like a camera, dropping frames that are
+        # not processed in time; "fast" delivers every frame as fast as the pipeline takes them
+        "pace": "realtime",
+        "fps": 30,  # frame rate of the "images" and "synthetic" sources
+        "frame_count": None,  # frames of the "synthetic" source, None for endless
+        # True for landscape camera frames that are rotated and mirrored; False for recorded set videos
+        "preprocess": True,
+    },
+    "capture_slot_size": 1,  # frames kept by the capture thread, older frames are dropped
+    "pipeline": {
+        "enabled": False,  # run each frame processing stage in its own worker thread
+        "queue_size": 2,
+        # "block", "drop_oldest" or "drop_newest"; stages after "analyze" must block so no
+        # recorder call or workout state update is lost
+        "backpressure": {
+            "preprocess": "drop_oldest",
+            "pose": "drop_oldest",
+            "render": "drop_oldest",
+            "analyze": "block",
+            "record": "block",
+            "output": "drop_oldest",
+        },
+    },
+    "metrics": {
+        "enabled": False,  # serve counters, gauges and histograms on http://host:port/metrics
+        "host": "127.0.0.1",  # loopback only, the endpoint is meant for a scraper on the same machine
+        "port": 9108,
+    },
+    "profiling": {
+        "enabled": False,  # time every frame processing stage into histograms
+        "diagnostics_panel": False,  # show the stage times below the video, needs "enabled"
+    },
+    "recording": {
+        # "single": encode every frame once into the set video and mark where each rep starts and ends;
+        # "dual": encode the set video and the rep videos with separate writers while monitoring
+        "mode": "single",
+        # "remux": cut the rep clips from the set video without re-encoding when the set ends (needs PyAV);
+        # "index": keep only the rep ranges, the rep player seeks in the set video
+        "rep_clips": "remux",
+    },
     "audio_temp_files_path": "utils/audio_temp_files",
+    "speech": {
+        "rate": 180,
+        "cache_size": 512,  # phrases kept in the audio cache
+        "prerender_rep_count": 30,  # "Rep 1" ... "Rep 30" are rendered at startup
+    },
     "mediapipe_keypoints": {'nose': 0,
                             'left_eye_inner': 1,
                             'left_eye': 2,
@@ -1,6 +1,7 @@
 import streamlit as st
 from utils import utils
 from utils import model_utils
+from utils import exercise_profile_utils
 import config
 
 
@@ -12,6 +13,10 @@ if "workout_config" not in st.session_state:
 if "system_config"  not in st.session_state:
     st.session_state.system_config = config.system_configuration
 
+if "exercise_profiles" not in st.session_state:
+    st.session_state.exercise_profiles = exercise_profile_utils.compile_exercise_profiles(
+        st.session_state.workout_config, st.session_state.system_config)
+
 if "selected_exercise" not in st.session_state:
     st.session_state.selected_exercise = "squat"
 
@@ -25,8 +30,10 @@ st.session_state.camera_dict = utils.get_camera_dict()
 
 
 model_utils.load_mp_model()
-model_utils.load_pyttsx3_engine()
-model_utils.load_all_models(st.session_state.workout_config)
+speech_config = st.session_state.system_config["speech"]
+model_utils.load_speech_worker(st.session_state.system_config["audio_temp_files_path"],
+                               speech_config["rate"], speech_config["cache_size"],
+                               st.session_state.workout_config, speech_config["prerender_rep_count"])
 
 
 pages = [
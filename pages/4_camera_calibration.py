@@ -1,7 +1,7 @@
 import time
 import numpy as np
 import streamlit as st
-from utils import feedback_utils,model_utils
+from utils import feedback_utils,frame_source_utils,model_utils
 from components import components
 from static.styles.page_styles.posture_monitoring_menu_styles import css
 import cv2
@@ -12,8 +12,11 @@ from menu import menu
 system_config = st.session_state.system_config
 mp_pose = mp.solutions.pose
 pose = mp_pose.Pose(static_image_mode=False, min_detection_confidence=0.5, min_tracking_confidence=0.5)
-engine = model_utils.load_pyttsx3_engine()
-audio_temp_dir = system_config.get("audio_temp_files_path", "/tmp")
+speech_config = system_config["speech"]
+# Shared with the monitor: the speech thread is the only one driving the text to speech engine
+speech_worker = model_utils.load_speech_worker(system_config.get("audio_temp_files_path", "/tmp"),
+                                               speech_config["rate"], speech_config["cache_size"])
+pending_audio = []
 IDEAL_CAMERA_HEIGHT = 1.5  # meters, example: 1.5 meters from the ground
 CENTER_TOLERANCE = 0.1  # tolerance for body center alignment (normalized)
 TILT_THRESHOLD = 1  # degrees, allowable tilt angle between shoulders
@@ -231,18 +234,16 @@ with row2_col1:
             FRAME_WINDOW = st.image([])
             FIXED_WIDTH = 405
             FIXED_HEIGHT = 720
-            cap = cv2.VideoCapture(st.session_state.selected_camera, cv2.CAP_MSMF)
-            cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+            cap = frame_source_utils.create_frame_source(system_config["frame_source"],
+                                                         st.session_state.selected_camera, (1280, 720))
 
             while cap.isOpened():
-                ret, frame = cap.read()
+                ret, frame, _ = cap.read()
                 if not ret:
                     break
 
-                frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
-                frame = cv2.resize(frame, (FIXED_WIDTH, FIXED_HEIGHT))
-                frame = cv2.flip(frame,1)
+                frame = frame_source_utils.preprocess_frame(frame, (FIXED_WIDTH, FIXED_HEIGHT),
+                                                            system_config["frame_source"]["preprocess"])
                 # Process with MediaPipe Hands
                 frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
                 pose_results = pose.process(frame_rgb)
@@ -256,7 +257,7 @@ with row2_col1:
                     calibration_start_time = time.time()
                     components.feedback_container(feedback_placeholders,
                                                   "Stand still for 3 seconds...")
-                    feedback_utils.text_to_audio_feedback(audio_temp_dir, "Stand still for 3 seconds.", engine)
+                    feedback_utils.speak(speech_worker, pending_audio, "Stand still for 3 seconds.")
 
                 # If calibration is in progress
                 if calibration_started:
@@ -270,14 +271,13 @@ with row2_col1:
                         feedback,config_IsCorrect = calibrate_pose(pose_results)
 
                         if(config_IsCorrect):
-                            feedback_utils.text_to_audio_feedback(audio_temp_dir, "Calibration completed",
-                                                                  engine)
+                            feedback_utils.speak(speech_worker, pending_audio, "Calibration completed")
                             components.feedback_container(feedback_placeholders,
                                                          "Calibration completed")
                             st.session_state.camera_calibrated = True
                         else:
-                            feedback_utils.text_to_audio_feedback(audio_temp_dir, "Camera configuration incorrect, please adjust it.",
-                                                                  engine)
+                            feedback_utils.speak(speech_worker, pending_audio,
+                                                 "Camera configuration incorrect, please adjust it.")
                             components.feedback_container(feedback_placeholders,
                                                           "Feedback:\n" + "\n".join(f"- {msg}" for msg in feedback))
                             st.session_state.camera_calibrated = False
@@ -288,6 +288,7 @@ with row2_col1:
 
                 # Display the video feed with the button
                 FRAME_WINDOW.image(cv2.cvtColor(frame_with_button, cv2.COLOR_BGR2RGB), channels="RGB")
+                feedback_utils.play_pending_audio(pending_audio)
 
 
 
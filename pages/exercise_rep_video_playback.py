@@ -1,3 +1,4 @@
+import os.path
 import streamlit as st
 from static.styles.page_styles.exercise_rep_video_playback_styles import css
 from menu import menu
@@ -5,6 +6,7 @@ from utils import workout_record_utils
 from utils import utils
 from components import components
 from utils import exercise_analyze_utils
+from utils import video_recording_utils
 
 if "selected_set" not in st.session_state or "selected_summary_exercise" not in st.session_state:
     st.switch_page("pages/3_exercise_summary.py")
@@ -17,10 +19,17 @@ components.subtitle(st.session_state.selected_rep)
 video_folder_path = st.session_state.workout_config[st.session_state.selected_summary_exercise]["workout_data_directory"]["rep_video"]
 
 video_file_path = f"{video_folder_path}/{st.session_state.selected_rep}.mp4"
+start_time, end_time = 0, None
+if not os.path.exists(video_file_path):
+    # Reps recorded in "single" mode without a cut clip play from their range of the set video
+    set_video_folder_path = st.session_state.workout_config[st.session_state.selected_summary_exercise]["workout_data_directory"]["set_video"]
+    rep_range = video_recording_utils.load_rep_range(set_video_folder_path, st.session_state.selected_rep)
+    if rep_range is not None:
+        video_file_path, start_time, end_time = rep_range
 print(video_file_path)
 video_file = open(video_file_path, "rb")
 video_bytes = video_file.read()
 
-components.rep_video_playback(video_bytes,st.session_state.rep_record)
+components.rep_video_playback(video_bytes,st.session_state.rep_record,start_time,end_time)
 
 
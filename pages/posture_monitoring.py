@@ -7,7 +7,7 @@ from streamlit.runtime.scriptrunner import add_script_run_ctx
 from menu import menu
 from static.styles.page_styles.posture_monitoring_styles import css
 from utils.posture_monitor import PostureMonitor
-from utils.video_recording_utils import VideoRecorder
+from utils.video_recording_utils import VideoRecorder, RepRangeRecorder
 from utils import (
     utils,
     model_utils,
@@ -49,13 +49,16 @@ def initialize_posture_monitor_and_video_recorders():
     if "exercise_video_recorder" not in st.session_state or "monitor" not in st.session_state or st.session_state.exercise_video_recorder != st.session_state.selected_exercise :
         st.session_state.exercise_video_recorder = st.session_state.selected_exercise
         st.session_state.video_recorders = initialize_video_recorders(system_config, workout_config)
+        if "monitor" in st.session_state:
+            st.session_state.monitor.close()
         # Create PostureMonitor instance
         st.session_state.monitor = PostureMonitor(system_config=system_config,
                                  workout_config=workout_config,
-                                 engine=engine,
+                                 exercise_profile=st.session_state.exercise_profiles[st.session_state.selected_exercise],
+                                 speech_worker=speech_worker,
+                                 model_registry=model_registry,
                                  exercise=exercise,
                                  exercise_id=exercise_id,
-                                 audio_temp_dir=audio_temp_dir,
                                  placeholders=placeholders,
                                  video_recorders=st.session_state.video_recorders,
                                  session_state=st.session_state,
@@ -71,6 +74,19 @@ def initialize_video_recorders(system_config, workout_config):
     os.makedirs(set_video_output_dir, exist_ok=True)
 
     video_recorders = {}
+    recording_config = system_config["recording"]
+
+    if recording_config["mode"] == "single":
+        # One encoder for the set video, the rep clips are cut from it when the set ends
+        video_recorders["set_video_recorder"] = VideoRecorder(
+            resize_size=(system_config.get("resize_width", 640), system_config.get("resize_height", 480)),
+            frame_rate=24,
+            output_dir=set_video_output_dir,
+            rep_clip_dir=rep_video_output_dir,
+            rep_clips=recording_config["rep_clips"]
+        )
+        video_recorders["rep_video_recorder"] = RepRangeRecorder(video_recorders["set_video_recorder"])
+        return video_recorders
 
     video_recorders["rep_video_recorder"] = VideoRecorder(
         resize_size=(system_config.get("resize_width", 640), system_config.get("resize_height", 480)),
@@ -130,6 +146,10 @@ def st_ui(system_config, workout_config, exercise):
             placeholders["system_info"] = st.empty()
             placeholders["feedback"] = st.empty()
             components.feedback_container(placeholders["feedback"], "")
+            profiling_config = system_config["profiling"]
+            if profiling_config["enabled"] and profiling_config["diagnostics_panel"]:
+                # Stage times of the frame loop, refreshed once a second
+                placeholders["diagnostics"] = st.empty()
 
         with row2_col1:
             _, _, row2_col1_c1 = st.columns([1, 1, 2])
@@ -213,9 +233,20 @@ setup_ui_output = st_ui(system_config, workout_config, exercise)
 if setup_ui_output:
     frame_window, placeholders = setup_ui_output
 
-    # Load audio engine and set audio temp directory
-    engine = model_utils.load_pyttsx3_engine()
-    audio_temp_dir = system_config.get("audio_temp_files_path", "/tmp")
+    # Load the background speech worker
+    speech_config = system_config["speech"]
+    speech_worker = model_utils.load_speech_worker(system_config.get("audio_temp_files_path", "/tmp"),
+                                                   speech_config["rate"], speech_config["cache_size"])
+
+    # Shared model registry, monitors borrow interpreters from its pools
+    model_registry = model_utils.load_model_registry(st.session_state.workout_config,
+                                                     system_config["inference_backend"],
+                                                     system_config["interpreter_pool_size"])
+
+    # Local metrics endpoint, started once and shared by all sessions
+    metrics_config = system_config["metrics"]
+    if metrics_config["enabled"]:
+        model_utils.load_metrics_server(metrics_config["host"], metrics_config["port"])
 
     initialize_posture_monitor_and_video_recorders()
     print(st.session_state.video_recorders["set_video_recorder"].recordings)
@@ -0,0 +1,84 @@
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+import pytest
+
+from config import system_configuration
+from utils import body_verification_utils
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "data", "body_verification_golden.json")
+REP_COUNT_DIRECTIONS = ("right", "left", "unknown", "front")
+
+# Standing pose, normalized y of each MediaPipe landmark from the nose down to the feet
+LANDMARK_HEIGHTS = np.array([0.15, 0.13, 0.13, 0.13, 0.13, 0.13, 0.13, 0.14, 0.14, 0.17, 0.17,
+                             0.25, 0.25, 0.38, 0.38, 0.5, 0.5, 0.53, 0.53, 0.53, 0.53, 0.53, 0.53,
+                             0.52, 0.52, 0.72, 0.72, 0.9, 0.9, 0.92, 0.92, 0.94, 0.94])
+
+# verify_body only reads the view and the bounding box indices of the exercise profile
+Profile = namedtuple("Profile", ["view", "body_indices"])
+
+
+def random_poses(seed, count):
+    """
+    Standing poses jittered by a few to a few dozen pixels and turned between front and side view,
+    so every check lands on both sides of its thresholds.
+    """
+    rng = np.random.default_rng(seed)
+    spread = rng.choice([0.01, 0.03, 0.06, 0.12], size=(count, 1))
+    poses = np.empty((count, 33, 4))
+    poses[:, :, 0] = rng.uniform(0.05, 0.95, (count, 1)) + rng.normal(size=(count, 33)) * spread
+    poses[:, :, 1] = LANDMARK_HEIGHTS + rng.normal(size=(count, 33)) * spread
+    poses[:, :, 2] = rng.normal(scale=0.05, size=(count, 33))
+    turn = rng.uniform(-0.3, 0.3, count)
+    poses[:, 12, 2] = poses[:, 11, 2] + turn + rng.normal(scale=0.05, size=count)
+    poses[:, 24, 2] = poses[:, 23, 2] + turn + rng.normal(scale=0.05, size=count)
+    poses[:, :, 3] = rng.uniform(size=(count, 33))
+    return poses
+
+
+@pytest.fixture(scope="module")
+def golden():
+    with open(GOLDEN_PATH, "r") as file:
+        golden = json.load(file)
+    golden["poses"] = random_poses(golden["seed"], len(golden["rows"]))
+    golden["rows"] = [dict(zip(golden["columns"], row)) for row in golden["rows"]]
+    return golden
+
+
+@pytest.fixture(scope="module")
+def body_indices():
+    keypoints = system_configuration["mediapipe_keypoints"]
+    return np.array([keypoints[name] for name in system_configuration["body_keypoints"]])
+
+
+def test_golden_poses_are_reproduced(golden):
+    # The expected results only hold for the poses they were recorded from
+    assert golden["poses"].sum() == pytest.approx(golden["checksum"], abs=1e-6)
+
+
+def test_golden_rows_cover_both_outcomes(golden):
+    for column in golden["columns"]:
+        assert len({row[column] for row in golden["rows"]}) > 1, column
+
+
+@pytest.mark.parametrize("view", ["side", "front"])
+def test_verify_body_matches_golden(golden, body_indices, view):
+    profile = Profile(view=view, body_indices=body_indices)
+    for index, (landmarks, row) in enumerate(zip(golden["poses"], golden["rows"])):
+        expected = (row[f"correct_view_{view}"] == 1, row["body_view"], row["view_direction"],
+                    row["is_straight_body_view"] == 1, row["is_in_bounding_box"] == 1)
+
+        verification = body_verification_utils.verify_body(landmarks, system_configuration, profile)
+        assert tuple(verification[:5]) == expected, index
+        detected = row["view_direction"]
+        assert verification.is_side_view == (row[f"is_side_view_{detected}"] == 1), index
+        assert verification.is_standing_side_view == (row[f"is_standing_side_view_{detected}"] == 1), index
+
+        for direction in REP_COUNT_DIRECTIONS:
+            verification = body_verification_utils.verify_body(landmarks, system_configuration, profile,
+                                                               side_view_direction=direction)
+            assert verification.is_side_view == (row[f"is_side_view_{direction}"] == 1), (index, direction)
+            assert verification.is_standing_side_view == (row[f"is_standing_side_view_{direction}"] == 1), \
+                (index, direction)
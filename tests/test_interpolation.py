@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from config import system_configuration, workout_configurations
+from utils import interpolation_utils
+
+TARGET_FPS = system_configuration["target_fps"]
+# (sequence length, keypoint values) of the model windows of every exercise, each keypoint is an (x, y) pair
+WINDOW_SHAPES = sorted({(config["sequence_length"], config["keypoints_num"] * 2)
+                        for config in workout_configurations.values()})
+
+
+def reference_anchor_rows(keypoints_sequence, fps, sequence_length):
+    """Output rows of process_keypoints_sequence that are original frames."""
+    output = interpolation_utils.process_keypoints_sequence(list(keypoints_sequence), fps, TARGET_FPS,
+                                                            sequence_length)
+    original_ids = {id(frame) for frame in keypoints_sequence}
+    return np.array(output), [row for row, frame in enumerate(output) if id(frame) in original_ids]
+
+
+@pytest.mark.parametrize("sequence_length, keypoint_values", WINDOW_SHAPES)
+@pytest.mark.parametrize("fps", range(8, TARGET_FPS + 1))
+def test_resample_matches_process_keypoints_sequence(fps, sequence_length, keypoint_values):
+    rng = np.random.default_rng(fps)
+    frame_count = interpolation_utils.calculate_sequence_needed(fps, TARGET_FPS, sequence_length)
+    for _ in range(20):
+        keypoints_sequence = [frame for frame in rng.random((frame_count, keypoint_values), dtype=np.float32)]
+        expected, anchor_rows = reference_anchor_rows(keypoints_sequence, fps, sequence_length)
+
+        resampled = interpolation_utils.resample_keypoints_sequence(keypoints_sequence, fps, TARGET_FPS,
+                                                                    sequence_length)
+
+        assert resampled.shape == (sequence_length, keypoint_values)
+        assert len(anchor_rows) == frame_count
+        # Original frames are copied to the same output rows
+        np.testing.assert_array_equal(resampled[anchor_rows], expected[anchor_rows])
+        # and the frames between them are the same interpolated frames
+        np.testing.assert_allclose(resampled, expected, rtol=0, atol=1e-6)
+
+
+@pytest.mark.parametrize("sequence_length, keypoint_values", WINDOW_SHAPES)
+@pytest.mark.parametrize("method", ["linear", "cubic"])
+def test_resample_keeps_original_frames(method, sequence_length, keypoint_values):
+    rng = np.random.default_rng(0)
+    frame_count = interpolation_utils.calculate_sequence_needed(15, TARGET_FPS, sequence_length)
+    keypoints_sequence = rng.random((frame_count, keypoint_values), dtype=np.float32)
+    expected, anchor_rows = reference_anchor_rows(list(keypoints_sequence), 15, sequence_length)
+
+    resampled = interpolation_utils.resample_keypoints_sequence(keypoints_sequence, 15, TARGET_FPS,
+                                                                sequence_length, method)
+
+    np.testing.assert_array_equal(resampled[anchor_rows], expected[anchor_rows])
+
+
+@pytest.mark.parametrize("sequence_length, keypoint_values", WINDOW_SHAPES)
+def test_resample_samples_evenly_above_target_fps(sequence_length, keypoint_values):
+    frame_count = interpolation_utils.calculate_sequence_needed(2 * TARGET_FPS, TARGET_FPS, sequence_length)
+    keypoints_sequence = np.arange(frame_count, dtype=np.float32)[:, np.newaxis].repeat(keypoint_values, axis=1)
+
+    resampled = interpolation_utils.resample_keypoints_sequence(keypoints_sequence, 2 * TARGET_FPS, TARGET_FPS,
+                                                                sequence_length)
+
+    np.testing.assert_allclose(resampled[:, 0], np.linspace(0, frame_count - 1, sequence_length), atol=1e-5)
+
+
+@pytest.mark.parametrize("sequence_length, keypoint_values", WINDOW_SHAPES)
+def test_process_keypoints_sequence_rejects_more_frames_than_output(sequence_length, keypoint_values):
+    with pytest.raises(ValueError):
+        interpolation_utils.process_keypoints_sequence([np.zeros(keypoint_values)] * (sequence_length + 1),
+                                                       TARGET_FPS + 1, TARGET_FPS, sequence_length)
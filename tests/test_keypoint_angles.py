@@ -0,0 +1,85 @@
+from collections import namedtuple
+
+import numpy as np
+import pytest
+
+pytest.importorskip("mediapipe")  # keypoints_utils reads the landmark names from MediaPipe
+
+from utils import keypoints_utils
+
+# get_rep_angles only reads the angle keypoint positions of the exercise profile
+Profile = namedtuple("Profile", ["angle_keypoint_positions"])
+
+
+@pytest.mark.parametrize("triple, expected", [
+    (((1, 0), (0, 0), (0, 1)), 90.0),
+    (((1, 0), (0, 0), (-1, 0)), 180.0),
+    (((1, 0), (0, 0), (2, 0)), 0.0),
+    (((1, 0), (0, 0), (1, 1)), 45.0),
+    (((1, 0), (0, 0), (-1, 1)), 135.0),
+    (((1, 0), (0, 0), (0.5, np.sqrt(3) / 2)), 60.0),
+])
+def test_angles_of_known_triples(triple, expected):
+    angles = keypoints_utils.calculate_angles(np.array([triple]), 1, 1)
+
+    assert angles.shape == (1,)
+    assert angles[0] == pytest.approx(expected, abs=1e-9)
+
+
+def test_angles_are_measured_in_pixels():
+    # 45 degrees in normalized coordinates, stretched by a portrait frame
+    points = np.array([[(0.1, 0.0), (0.0, 0.0), (0.1, 0.1)]])
+
+    angle = keypoints_utils.calculate_angles(points, 480, 640)[0]
+
+    assert angle == pytest.approx(np.degrees(np.arctan2(64, 48)), abs=1e-9)
+
+
+@pytest.mark.parametrize("triple", [
+    ((0.5, 0.5), (0.5, 0.5), (0.2, 0.9)),  # first vector has zero length
+    ((0.2, 0.9), (0.5, 0.5), (0.5, 0.5)),  # second vector has zero length
+    ((0.5, 0.5), (0.5, 0.5), (0.5, 0.5)),  # all three points coincide
+])
+def test_zero_length_vectors_give_zero(triple):
+    with np.errstate(all="raise"):
+        angles = keypoints_utils.calculate_angles(np.array([triple]), 480, 640)
+
+    assert angles[0] == 0.0
+
+
+def test_collinear_rounding_stays_in_range():
+    # Parallel and opposite vectors whose cosine rounds to 1 + 2e-16 and -1 - 2e-16 before clipping
+    points = np.array([[(0.3, 0.1), (0.2, 0.05), (0.6, 0.25)],
+                       [(0.223, 0.484), (0.19, 0.39), (0.124, 0.202)]])
+
+    with np.errstate(invalid="raise"):
+        angles = keypoints_utils.calculate_angles(points, 480, 640)
+
+    np.testing.assert_array_equal(angles, [0.0, 180.0])
+
+
+def test_angles_of_many_triples_match_one_by_one():
+    points = np.random.default_rng(0).random((500, 3, 2))
+    points[::50, 1] = points[::50, 0]
+
+    angles = keypoints_utils.calculate_angles(points, 480, 640)
+
+    assert angles.shape == (500,)
+    assert ((angles >= 0) & (angles <= 180)).all()
+    np.testing.assert_array_equal(angles, [keypoints_utils.calculate_angles(triple[np.newaxis], 480, 640)[0]
+                                           for triple in points])
+
+
+def test_rep_angles_of_a_block_of_frames():
+    profile = Profile(angle_keypoint_positions={"right": np.array([1, 2, 3])})
+    system_config = {"resize_width": 1, "resize_height": 1}
+    # Keypoints 1, 2 and 3 form the joint: hip, knee (vertex) and ankle
+    keypoints = np.zeros((3, 4, 2))
+    keypoints[:, 1] = (0, 0)
+    keypoints[:, 2] = (0, 1)
+    keypoints[:, 3] = [(0, 2), (1, 1), (0, 1)]
+
+    angles = keypoints_utils.get_rep_angles(keypoints, profile, system_config, "right")
+
+    assert angles == pytest.approx([180.0, 90.0, 0.0], abs=1e-9)
+    assert keypoints_utils.get_rep_angles(keypoints[1], profile, system_config, "right") == pytest.approx([90.0])
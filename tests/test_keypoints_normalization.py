@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("mediapipe")  # keypoints_utils reads the landmark names from MediaPipe
+
+from utils import keypoints_utils
+
+FRAME_COUNT = 200
+KEYPOINT_COUNT = 6
+
+
+def random_keypoints(seed):
+    """Keypoint frames of shape (T, K, 2), every tenth frame with the hip on the shoulder."""
+    keypoints = np.random.default_rng(seed).random((FRAME_COUNT, KEYPOINT_COUNT, 2))
+    keypoints[::10, 1] = keypoints[::10, 0]
+    return keypoints
+
+
+def per_frame(keypoints, flip_horizontally):
+    return np.stack([keypoints_utils.scale_and_rel_position_normalize_keypoints(frame, flip_horizontally)
+                     for frame in keypoints])
+
+
+@pytest.mark.parametrize("flip_horizontally", [False, True])
+@pytest.mark.parametrize("seed", range(5))
+def test_batch_matches_per_frame(seed, flip_horizontally):
+    keypoints = random_keypoints(seed)
+
+    batch = keypoints_utils.normalize_keypoints_batch(keypoints, flip_horizontally)
+
+    assert batch.shape == (FRAME_COUNT, KEYPOINT_COUNT * 2)
+    # The live monitor normalizes frame by frame, offline analysis in blocks; both must agree exactly
+    np.testing.assert_array_equal(batch, per_frame(keypoints, flip_horizontally))
+
+
+@pytest.mark.parametrize("flip_horizontally", [False, True])
+def test_zero_scale_frames_are_only_translated(flip_horizontally):
+    keypoints = random_keypoints(0)[::10]
+
+    batch = keypoints_utils.normalize_keypoints_batch(keypoints, flip_horizontally)
+
+    expected = keypoints - keypoints[:, 1:2]
+    if flip_horizontally:
+        expected[:, :, 0] *= -1
+    assert np.isfinite(batch).all()
+    np.testing.assert_array_equal(batch, expected.reshape(len(keypoints), -1))
+    np.testing.assert_array_equal(batch, per_frame(keypoints, flip_horizontally))
+
+
+def test_flip_negates_only_x():
+    keypoints = random_keypoints(1)
+
+    normalized = keypoints_utils.normalize_keypoints_batch(keypoints).reshape(FRAME_COUNT, KEYPOINT_COUNT, 2)
+    flipped = keypoints_utils.normalize_keypoints_batch(keypoints, True).reshape(FRAME_COUNT, KEYPOINT_COUNT, 2)
+
+    np.testing.assert_array_equal(flipped[:, :, 0], -normalized[:, :, 0])
+    np.testing.assert_array_equal(flipped[:, :, 1], normalized[:, :, 1])
+
+
+def test_batch_writes_into_out():
+    keypoints = random_keypoints(2)
+    out = np.full((FRAME_COUNT, KEYPOINT_COUNT * 2), np.nan)
+
+    result = keypoints_utils.normalize_keypoints_batch(keypoints, True, out=out)
+
+    assert result is out
+    np.testing.assert_array_equal(out, per_frame(keypoints, True))
+
+
+def test_extract_keypoints_of_a_block_matches_per_frame():
+    landmarks = np.random.default_rng(3).random((FRAME_COUNT, 33, 4)).astype(np.float32)
+    keypoint_indices = np.array([12, 24, 26, 28, 30, 32])
+
+    block = keypoints_utils.extract_keypoints(landmarks, keypoint_indices)
+
+    assert block.shape == (FRAME_COUNT, len(keypoint_indices), 2)
+    np.testing.assert_array_equal(block, np.stack([keypoints_utils.extract_keypoints(frame, keypoint_indices)
+                                                   for frame in landmarks]))
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+av = pytest.importorskip("av")
+pytest.importorskip("cv2")  # video_recording_utils writes the set videos with OpenCV
+
+from utils import video_recording_utils
+
+FRAME_RATE = 30
+FRAME_COUNT = 90
+FRAME_SIZE = (64, 48)  # width, height
+
+
+def frame_level(index):
+    """Gray level of frame `index`, far enough apart to tell the frames apart after encoding."""
+    return 16 + 2 * index
+
+
+@pytest.fixture(scope="module")
+def b_frame_video(tmp_path_factory):
+    """H264 set video with B-frames, so its packets are stored in decode order and not in display order."""
+    path = str(tmp_path_factory.mktemp("set_video") / "SQUAT-20241213-142709_set_1.mp4")
+    with av.open(path, "w") as container:
+        # Two B-frames between every pair of reference frames and a keyframe every 15 frames
+        stream = container.add_stream("libx264", rate=FRAME_RATE, options={
+            "bf": "2", "g": "15", "crf": "5", "x264-params": "b-adapt=0:scenecut=0"})
+        stream.width, stream.height = FRAME_SIZE
+        stream.pix_fmt = "yuv420p"
+        for index in range(FRAME_COUNT):
+            image = np.full((FRAME_SIZE[1], FRAME_SIZE[0], 3), frame_level(index), dtype=np.uint8)
+            for packet in stream.encode(av.VideoFrame.from_ndarray(image, format="rgb24")):
+                container.mux(packet)
+        for packet in stream.encode():
+            container.mux(packet)
+
+    with av.open(path) as container:
+        stream = container.streams.video[0]
+        packet_pts = [packet.pts for packet in container.demux(stream) if packet.dts is not None]
+    assert packet_pts != sorted(packet_pts), "the encoder wrote no B-frames"
+    return path
+
+
+def decoded_levels(path):
+    """Gray level of every frame the clip shows, i.e. the decoded frames with a timestamp from 0 on."""
+    with av.open(path) as container:
+        return [int(round(frame.to_ndarray(format="gray").mean()))
+                for frame in container.decode(video=0) if frame.pts >= 0]
+
+
+@pytest.mark.parametrize("start_frame", [0, 20, 31, 61])
+def test_clip_holds_every_frame_of_the_rep(b_frame_video, tmp_path, start_frame):
+    # One rep per end frame, so every end falls once between a reference frame and its B-frames
+    reps = [{"rep": end_frame, "start_frame": start_frame, "end_frame": end_frame}
+            for end_frame in range(start_frame + 1, FRAME_COUNT + 1)]
+
+    clip_paths = video_recording_utils.cut_rep_clips(b_frame_video, {"frame_rate": FRAME_RATE, "reps": reps},
+                                                     str(tmp_path))
+
+    assert len(clip_paths) == len(reps)
+    for rep, clip_path in zip(reps, clip_paths):
+        levels = decoded_levels(clip_path)
+        expected = [frame_level(index) for index in range(start_frame, rep["end_frame"])]
+        # Reference frames shown after the rep may be copied along, at most the two B-frames of delay
+        assert len(expected) <= len(levels) <= len(expected) + 2, rep
+        np.testing.assert_allclose(levels[:len(expected)], expected, atol=1, err_msg=str(rep))
@@ -0,0 +1,201 @@
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from . import metrics_utils
+
+
+class BatchInferenceServer:
+    def __init__(self, model_registry, exercise, sequence_length, max_batch_size=8, max_wait_ms=3.0,
+                 batch_sizes=(1, 2, 4, 8)):
+        """
+        Classify the windows of all monitoring sessions of one exercise in shared batches.
+        The first waiting window opens a batch; windows arriving within max_wait_ms join it and the batch
+        is classified by one invoke with the input batch dimension resized to the next batch size.
+        Models whose batch dimension cannot be resized fall back to one invoke per window.
+        :param model_registry: ModelRegistry creating the interpreters, which are used only by this server.
+        :param exercise: Exercise key of the workout configurations, e.g. "squat".
+        :param sequence_length: Number of frames in a model input window.
+        :param max_batch_size: Maximum number of windows per invoke.
+        :param max_wait_ms: Time the first window of a batch waits for others.
+        :param batch_sizes: Input batch sizes the interpreters are resized to; a batch is padded to the
+                            smallest one that fits, so at most len(batch_sizes) interpreters are created.
+        """
+        self.model_registry = model_registry
+        self.exercise = exercise
+        self.sequence_length = sequence_length
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batch_sizes = sorted(size for size in batch_sizes if size <= max_batch_size) or [1]
+        if self.batch_sizes[-1] < max_batch_size:
+            self.batch_sizes.append(max_batch_size)
+        self.interpreters = {}  # batch size -> (interpreter, input_details, output_details), None if not resizable
+        self.requests = []  # (window, Future, submit time)
+        self.is_running = False
+        self.condition = threading.Condition()
+        self.thread = None
+
+        # statistics
+        self.batches = 0
+        self.classified_windows = 0
+        self.fallback_invokes = 0
+        self.total_queue_time = 0.0
+        self.total_invoke_time = 0.0
+
+    def start(self):
+        """
+        Start the batching thread.
+        """
+        if self.thread is None:
+            self.is_running = True
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop the batching thread after the waiting windows have been classified.
+        """
+        with self.condition:
+            self.is_running = False
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def submit(self, window):
+        """
+        Queue a window for the next batch.
+        :param window: Model input of shape (sequence_length, keypoints * 2); it is copied.
+        :return: Future resolving to (posture_class, confidence).
+        """
+        future = Future()
+        window = np.array(window, dtype=np.float32).reshape(self.sequence_length, -1)
+        with self.condition:
+            if not self.is_running:
+                raise RuntimeError("The batch inference server is not running.")
+            self.requests.append((window, future, time.perf_counter()))
+            metrics_utils.BATCH_INFERENCE_QUEUE_DEPTH.set(len(self.requests), exercise=self.exercise)
+            self.condition.notify_all()
+        return future
+
+    def predict(self, sequence):
+        """
+        Classify one window and wait for its batch, a drop-in replacement of model_utils.predict_posture.
+        :return: (posture_class, confidence), or (None, None) if the sequence is incomplete.
+        """
+        if len(sequence) != self.sequence_length:
+            return None, None
+        return self.submit(sequence).result()
+
+    def get_stats(self):
+        """
+        Snapshot of the batching statistics, times in milliseconds.
+        """
+        with self.condition:
+            return {
+                "batches": self.batches,
+                "classified_windows": self.classified_windows,
+                "average_batch_size": self.classified_windows / self.batches if self.batches else 0.0,
+                "fallback_invokes": self.fallback_invokes,
+                "average_queue_ms": self.total_queue_time / self.classified_windows * 1000
+                if self.classified_windows else 0.0,
+                "average_invoke_ms": self.total_invoke_time / self.batches * 1000 if self.batches else 0.0,
+                "resizable_batch_sizes": [size for size, entry in self.interpreters.items() if entry is not None],
+            }
+
+    def _run(self):
+        """
+        Background batching thread.
+        """
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.requests or not self.is_running)
+                if not self.requests:
+                    return
+                # Wait for more windows until the first one has waited max_wait
+                deadline = self.requests[0][2] + self.max_wait
+                while self.is_running and len(self.requests) < self.max_batch_size:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                batch = self.requests[:self.max_batch_size]
+                del self.requests[:self.max_batch_size]
+                metrics_utils.BATCH_INFERENCE_QUEUE_DEPTH.set(len(self.requests), exercise=self.exercise)
+
+            batch_start = time.perf_counter()
+            try:
+                outputs = self._classify([window for window, _, _ in batch])
+            except Exception as error:
+                print(f"Batch posture inference failed: {error}")
+                for _, future, _ in batch:
+                    future.set_exception(error)
+                continue
+            invoke_time = time.perf_counter() - batch_start
+            metrics_utils.BATCH_INFERENCE_SECONDS.observe(invoke_time, exercise=self.exercise)
+
+            with self.condition:
+                self.batches += 1
+                self.classified_windows += len(batch)
+                self.total_invoke_time += invoke_time
+                self.total_queue_time += sum(batch_start - submit_time for _, _, submit_time in batch)
+
+            for (_, future, _), output_data in zip(batch, outputs):
+                future.set_result((np.argmax(output_data), np.max(output_data)))
+
+    def _classify(self, windows):
+        """
+        Invoke the model on a list of windows.
+        :return: Model output of every window.
+        """
+        batch_size = next(size for size in self.batch_sizes if size >= len(windows))
+        entry = self._get_interpreter(batch_size)
+        if entry is None:
+            # Batch dimension not resizable, classify one window at a time
+            entry = self._get_interpreter(1)
+            self.fallback_invokes += len(windows)
+            return [run_batch(*entry, window[np.newaxis])[0] for window in windows]
+
+        batch_array = np.zeros((batch_size,) + windows[0].shape, dtype=np.float32)
+        batch_array[:len(windows)] = windows
+        return run_batch(*entry, batch_array)[:len(windows)]
+
+    def _get_interpreter(self, batch_size):
+        """
+        Interpreter whose input is resized to the batch size, created on first use.
+        :return: (interpreter, input_details, output_details), or None if the model cannot be resized.
+        """
+        if batch_size not in self.interpreters:
+            interpreter, input_details, output_details = self.model_registry.get(self.exercise)
+            if batch_size != 1:
+                try:
+                    input_shape = list(input_details[0]['shape'])
+                    interpreter.resize_tensor_input(input_details[0]['index'], [batch_size] + input_shape[1:])
+                    interpreter.allocate_tensors()
+                    input_details = interpreter.get_input_details()
+                    output_details = interpreter.get_output_details()
+                except Exception as error:
+                    print(f"Cannot resize the {self.exercise} model to batch size {batch_size}: {error}")
+                    self.interpreters[batch_size] = None
+                    return None
+            self.interpreters[batch_size] = (interpreter, input_details, output_details)
+        return self.interpreters[batch_size]
+
+
+def run_batch(interpreter, input_details, output_details, batch_array):
+    """
+    Invoke an interpreter on a batch of windows.
+
+    Args:
+        batch_array (np.ndarray): Float32 array of shape (batch size, sequence_length, keypoints * 2)
+            matching the interpreter input.
+
+    Returns:
+        np.ndarray: Model output with one row per window.
+    """
+    interpreter.set_tensor(input_details[0]['index'], batch_array)
+    interpreter.invoke()
+    return interpreter.get_tensor(output_details[0]['index'])
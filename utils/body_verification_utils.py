@@ -1,10 +1,14 @@
+from collections import namedtuple
 
-def determine_view(pose_landmarks, threshold=0.1):
+import numpy as np
+
+
+def determine_view(landmarks, threshold=0.1):
     """
     Determines if the user is in front or side view based on MediaPipe Pose landmarks.
 
     Args:
-        pose_landmarks (mediapipe.framework.formats.landmark_pb2.NormalizedLandmarkList): Detected pose landmarks.
+        landmarks (np.ndarray): Pose landmark array of shape (33, 4) from landmark_utils.landmarks_to_array.
         threshold (float): Z-coordinate difference threshold to distinguish between front and side view.
 
     Returns:
@@ -17,10 +21,10 @@ def determine_view(pose_landmarks, threshold=0.1):
     RIGHT_HIP = 24
 
     # Extract Z-coordinates for shoulders and hips
-    left_shoulder_z = pose_landmarks.landmark[LEFT_SHOULDER].z
-    right_shoulder_z = pose_landmarks.landmark[RIGHT_SHOULDER].z
-    left_hip_z = pose_landmarks.landmark[LEFT_HIP].z
-    right_hip_z = pose_landmarks.landmark[RIGHT_HIP].z
+    left_shoulder_z = landmarks[LEFT_SHOULDER, 2]
+    right_shoulder_z = landmarks[RIGHT_SHOULDER, 2]
+    left_hip_z = landmarks[LEFT_HIP, 2]
+    right_hip_z = landmarks[RIGHT_HIP, 2]
 
     # Calculate absolute Z-coordinate differences
     shoulder_diff = abs(left_shoulder_z - right_shoulder_z)
@@ -32,12 +36,12 @@ def determine_view(pose_landmarks, threshold=0.1):
     else:
         return "side"
 
-def determine_side_view(pose_landmarks, threshold=0.1):
+def determine_side_view(landmarks, threshold=0.1):
     """
     Determines if the user is in a right-side or left-side view based on MediaPipe Pose landmarks.
 
     Args:
-        pose_landmarks (mediapipe.framework.formats.landmark_pb2.NormalizedLandmarkList): Detected pose landmarks.
+        landmarks (np.ndarray): Pose landmark array of shape (33, 4) from landmark_utils.landmarks_to_array.
         threshold (float): Z-coordinate difference threshold to distinguish between right and left side views.
 
     Returns:
@@ -51,10 +55,10 @@ def determine_side_view(pose_landmarks, threshold=0.1):
     RIGHT_HIP = 24
 
     # Extract Z-coordinates for shoulders and hips
-    left_shoulder_z = pose_landmarks.landmark[LEFT_SHOULDER].z
-    right_shoulder_z = pose_landmarks.landmark[RIGHT_SHOULDER].z
-    left_hip_z = pose_landmarks.landmark[LEFT_HIP].z
-    right_hip_z = pose_landmarks.landmark[RIGHT_HIP].z
+    left_shoulder_z = landmarks[LEFT_SHOULDER, 2]
+    right_shoulder_z = landmarks[RIGHT_SHOULDER, 2]
+    left_hip_z = landmarks[LEFT_HIP, 2]
+    right_hip_z = landmarks[RIGHT_HIP, 2]
 
     # Determine which side is closer
     shoulder_diff =right_shoulder_z - left_shoulder_z
@@ -68,395 +72,132 @@ def determine_side_view(pose_landmarks, threshold=0.1):
     else:
         return "unknown"
 
-def is_body_within_bounding_box(pose_landmarks,system_config):
-    """
-    Checks if the user's body landmarks are within the defined bounding box.
-
-    Args:
-        pose_landmarks (mediapipe.framework.formats.landmark_pb2.NormalizedLandmarkList): Detected pose landmarks.
-        frame_width (int): Width of the video frame.
-        frame_height (int): Height of the video frame.
-        bounding_box (dict): Dictionary containing 'x', 'y', 'width', 'height' of the bounding box.
-
-    Returns:
-        bool: True if key landmarks are within the bounding box, False otherwise.
-    """
-    key_landmarks = system_config["body_keypoints"]
-    landmark_indices =  system_config["mediapipe_keypoints"]
-
-    landmarks = pose_landmarks.landmark
-    bbox_x, bbox_y, bbox_w, bbox_h = system_config["bounding_box"]["position"][0], system_config["bounding_box"]["position"][1], system_config["bounding_box"]["size"][0], system_config["bounding_box"]["size"][1]
-
-    for landmark_name in key_landmarks:
-        idx = landmark_indices[landmark_name]
-        x = int(landmarks[idx].x * system_config["resize_width"])
-        y = int(landmarks[idx].y * system_config["resize_height"])
-        if not (bbox_x <= x <= bbox_x + bbox_w and bbox_y <= y <= bbox_y + bbox_h):
-            return False
-
-    return True
-
-def is_straight_side_view(pose_landmarks, system_config,side_view_direction,side_view_threshold = 15, tilt_threshold = 15, posture_threshold =20):
-    """
-    Checks if the user is in a straight side view based on MediaPipe Pose landmarks.
-
-    Args:
-        pose_landmarks (mediapipe.framework.formats.landmark_pb2.NormalizedLandmarkList): Detected pose landmarks.
-        frame_width (int): Width of the video frame.
-        frame_height (int): Height of the video frame.
-        alignment_threshold (float): Maximum allowed deviation in the X-axis for alignment.
-        z_diff_threshold (float): Minimum Z-coordinate difference for shoulders or hips to confirm a side view.
-
-    Returns:
-        bool: True if the user is in a straight side view, False otherwise.
-    """
-    frame_width = system_config["resize_width"]
-    frame_height = system_config["resize_height"]
-    # Landmark indices
-    NOSE = 0
-    LEFT_SHOULDER = 11
-    RIGHT_SHOULDER = 12
-    LEFT_HIP = 23
-    RIGHT_HIP = 24
-    LEFT_KNEE = 25
-    LEFT_ANKLE = 27
-    RIGHT_KNEE = 26
-    RIGHT_ANKLE = 28
-
-    # Extract landmarks and convert normalized coordinates to pixel coordinates
-    landmarks = pose_landmarks.landmark
-
-    left_shoulder_x, left_shoulder_y, left_shoulder_z = (
-        landmarks[LEFT_SHOULDER].x * frame_width,
-        landmarks[LEFT_SHOULDER].y * frame_height,
-        landmarks[LEFT_SHOULDER].z,
-    )
-    right_shoulder_x, right_shoulder_y, right_shoulder_z = (
-        landmarks[RIGHT_SHOULDER].x * frame_width,
-        landmarks[RIGHT_SHOULDER].y * frame_height,
-        landmarks[RIGHT_SHOULDER].z,
-    )
-
-    left_hip_x, left_hip_y, left_hip_z = (
-        landmarks[LEFT_HIP].x * frame_width,
-        landmarks[LEFT_HIP].y * frame_height,
-        landmarks[LEFT_HIP].z,
-    )
-    right_hip_x, right_hip_y, right_hip_z = (
-        landmarks[RIGHT_HIP].x * frame_width,
-        landmarks[RIGHT_HIP].y * frame_height,
-        landmarks[RIGHT_HIP].z,
-    )
-
-    # Check Z-difference for side view
-    x_diff_shoulders = abs(right_shoulder_x -left_shoulder_x)
-    x_diff_hips = abs(right_hip_x - left_hip_x)
-
-    if x_diff_shoulders > side_view_threshold and x_diff_hips > side_view_threshold:
-        print("Shoulders and hips are not in a side view")
-        return False
-
-    # Check vertical alignment (Y-axis) of shoulders and hips
-    shoulder_alignment = abs(left_shoulder_y - right_shoulder_y)
-    hip_alignment = abs(left_hip_y - right_hip_y)
-
-    if shoulder_alignment > tilt_threshold or hip_alignment > tilt_threshold:
-        print("Shoulders or hips are tilted")
-        return False  # Shoulders or hips are tilted
-    if side_view_direction == "right":
-        # Check straight line alignment for head, shoulder, hip, knee, and ankle
-        left_knee_x = landmarks[LEFT_KNEE].x * frame_width
-        left_ankle_x = landmarks[LEFT_ANKLE].x * frame_width
-        x_coords = [left_shoulder_x, left_hip_x, left_knee_x, left_ankle_x]
-    else:
-        right_knee_x = landmarks[RIGHT_KNEE].x * frame_width
-        right_ankle_x = landmarks[RIGHT_ANKLE].x * frame_width
-        x_coords = [right_shoulder_x, right_hip_x, right_knee_x, right_ankle_x]
-
-    min_x = min(x_coords)
-    max_x = max(x_coords)
-
-    if max_x - min_x > posture_threshold:
-        print("Points are not aligned in a vertical line")
-        return False  # Points are not aligned in a vertical line
+# Landmarks read by the view, tilt and alignment checks
+NOSE, RIGHT_EYE = 0, 5
+LEFT_SHOULDER, RIGHT_SHOULDER = 11, 12
+LEFT_WRIST, RIGHT_WRIST = 15, 16
+LEFT_HIP, RIGHT_HIP = 23, 24
+LEFT_KNEE, RIGHT_KNEE = 25, 26
+LEFT_ANKLE, RIGHT_ANKLE = 27, 28
+VERIFICATION_INDICES = np.array([NOSE, RIGHT_EYE, LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_WRIST, RIGHT_WRIST,
+                                 LEFT_HIP, RIGHT_HIP, LEFT_KNEE, RIGHT_KNEE, LEFT_ANKLE, RIGHT_ANKLE])
+
+# Thresholds of the view, straight body and rep count checks
+VIEW_Z_THRESHOLD = 0.1
+STRAIGHT_SIDE_VIEW_THRESHOLDS = {"side_view": 15, "tilt": 15, "posture": 20}
+STANDING_SIDE_VIEW_THRESHOLDS = {"side_view": 30, "posture": 40}
+SIDE_VIEW_THRESHOLD = 30
+STRAIGHT_FRONT_VIEW_THRESHOLDS = {"alignment": 20, "z_diff": 0.1}
+
+BodyVerification = namedtuple("BodyVerification", [
+    "correct_view",  # body view matches the view of the exercise
+    "body_view",  # "front" or "side"
+    "view_direction",  # "left", "right" or "unknown" in a side view, "front" otherwise
+    "is_straight_body_view",  # straight side view or straight front view, depending on body_view
+    "is_in_bounding_box",
+    "is_side_view",  # rep count check of the squat
+    "is_standing_side_view",  # rep count check of the bicep curl
+])
+
+# BodyVerification field checked before counting a rep
+rep_count_verification_fields = {
+    "squat": "is_side_view",
+    "bicep_curl": "is_standing_side_view",
+}
 
-    return True
 
-def is_standing_side_view(pose_landmarks, system_config,side_view_direction,side_view_threshold = 30, posture_threshold =40):
+def verify_body(landmarks, system_config, exercise_profile, side_view_direction=None):
     """
-    Checks if the user is in a straight side view based on MediaPipe Pose landmarks.
+    Run every body verification check of one frame. The twelve landmarks the view, tilt, alignment and
+    rep count checks read are gathered once and compared as Python floats; only the bounding box check
+    works on an array. On this few values that is faster than NumPy operations per check.
+    tests/data/body_verification_golden.json holds the results of the per-check functions it replaced.
 
     Args:
-        pose_landmarks (mediapipe.framework.formats.landmark_pb2.NormalizedLandmarkList): Detected pose landmarks.
-        frame_width (int): Width of the video frame.
-        frame_height (int): Height of the video frame.
-        alignment_threshold (float): Maximum allowed deviation in the X-axis for alignment.
-        z_diff_threshold (float): Minimum Z-coordinate difference for shoulders or hips to confirm a side view.
+        landmarks (np.ndarray): Pose landmark array of shape (33, 4) from landmark_utils.landmarks_to_array.
+        system_config (dict): System configuration with the frame size and bounding box.
+        exercise_profile (ExerciseProfile): Profile with the expected body view and the bounding box indices.
+        side_view_direction (str): Side view direction of the rep count checks, e.g. the one verified
+            in the ready state. Defaults to the detected view direction.
 
     Returns:
-        bool: True if the user is in a straight side view, False otherwise.
-    """
-    frame_width = system_config["resize_width"]
-    frame_height = system_config["resize_height"]
-    # Landmark indices
-
-    LEFT_SHOULDER = 11
-    RIGHT_SHOULDER = 12
-    LEFT_HIP = 23
-    RIGHT_HIP = 24
-    LEFT_KNEE = 25
-    LEFT_ANKLE = 27
-    RIGHT_KNEE = 26
-    RIGHT_ANKLE = 28
-    LEFT_WRIST= 15
-    RIGHT_WRIST= 16
-    RIGHT_EYE=5
-
-    # Extract landmarks and convert normalized coordinates to pixel coordinates
-    landmarks = pose_landmarks.landmark
-
-    left_shoulder_x, left_shoulder_y, left_shoulder_z = (
-        landmarks[LEFT_SHOULDER].x * frame_width,
-        landmarks[LEFT_SHOULDER].y * frame_height,
-        landmarks[LEFT_SHOULDER].z,
-    )
-    right_shoulder_x, right_shoulder_y, right_shoulder_z = (
-        landmarks[RIGHT_SHOULDER].x * frame_width,
-        landmarks[RIGHT_SHOULDER].y * frame_height,
-        landmarks[RIGHT_SHOULDER].z,
-    )
-
-    left_hip_x, left_hip_y, left_hip_z = (
-        landmarks[LEFT_HIP].x * frame_width,
-        landmarks[LEFT_HIP].y * frame_height,
-        landmarks[LEFT_HIP].z,
-    )
-    right_hip_x, right_hip_y, right_hip_z = (
-        landmarks[RIGHT_HIP].x * frame_width,
-        landmarks[RIGHT_HIP].y * frame_height,
-        landmarks[RIGHT_HIP].z,
-    )
-
-    # Check Z-difference for side view
-    x_diff_shoulders = abs(right_shoulder_x -left_shoulder_x)
-    x_diff_hips = abs(right_hip_x - left_hip_x)
-
-    if x_diff_shoulders > side_view_threshold and x_diff_hips > side_view_threshold:
-        print("Shoulders and hips are not in a side view")
-        return False  # Shoulders and hips are not in a side view
-
-    left_wrist_y = landmarks[LEFT_WRIST].y * frame_height
-    right_wrist_y = landmarks[RIGHT_WRIST].y * frame_height
-    right_eye_y = landmarks[RIGHT_EYE].y * frame_height
-
-
-
-    if side_view_direction == "right":
-        # Check straight line alignment for head, shoulder, hip, knee, and ankle
-        left_knee_y = landmarks[LEFT_KNEE].y * frame_height
-        if left_knee_y < left_wrist_y or left_wrist_y < right_eye_y:
-            print("bow_left")
-            return False
-
-        left_knee_x = landmarks[LEFT_KNEE].x * frame_width
-        left_ankle_x = landmarks[LEFT_ANKLE].x * frame_width
-        x_coords = [left_shoulder_x, left_hip_x, left_knee_x, left_ankle_x]
+        BodyVerification: Result of every check.
+    """
+    frame_width, frame_height = system_config["resize_width"], system_config["resize_height"]
+
+    # Gather the landmarks the checks read once, as pixel coordinates and z
+    (nose, right_eye, left_shoulder, right_shoulder, left_wrist, right_wrist,
+     left_hip, right_hip, left_knee, right_knee, left_ankle, right_ankle) = [
+        (x * frame_width, y * frame_height, z) for x, y, z, _ in landmarks[VERIFICATION_INDICES].tolist()]
+    shoulder_z_diff = right_shoulder[2] - left_shoulder[2]
+    hip_z_diff = right_hip[2] - left_hip[2]
+    shoulder_x_diff = abs(right_shoulder[0] - left_shoulder[0])
+    shoulder_y_diff = abs(left_shoulder[1] - right_shoulder[1])
+    hip_x_diff = abs(right_hip[0] - left_hip[0])
+    hip_y_diff = abs(left_hip[1] - right_hip[1])
+
+    # Shoulder, hip, knee and ankle of the side facing the camera line up in a side view
+    alignment_ranges = {}
+    for direction, points in (("right", (left_shoulder, left_hip, left_knee, left_ankle)),
+                              ("other", (right_shoulder, right_hip, right_knee, right_ankle))):
+        x_coords = [point[0] for point in points]
+        alignment_ranges[direction] = max(x_coords) - min(x_coords)
+    front_x_coords = [nose[0], left_shoulder[0], right_shoulder[0], left_hip[0], right_hip[0]]
+    front_alignment_range = max(front_x_coords) - min(front_x_coords)
+
+    # Bounding box, with pixel coordinates truncated to whole pixels
+    bounding_box = system_config["bounding_box"]
+    box_start = np.array(bounding_box["position"])
+    box_end = box_start + bounding_box["size"]
+    body_pixels = (landmarks[exercise_profile.body_indices, :2] * np.array([frame_width, frame_height], dtype=np.float64)
+                   ).astype(np.int64)
+    is_in_bounding_box = bool(((body_pixels >= box_start) & (body_pixels <= box_end)).all())
+
+    # Body view and side view direction
+    if abs(shoulder_z_diff) < VIEW_Z_THRESHOLD and abs(hip_z_diff) < VIEW_Z_THRESHOLD:
+        body_view = "front"
+        view_direction = "front"
     else:
-        right_knee_y = landmarks[RIGHT_KNEE].y * frame_height
-        if right_knee_y < right_wrist_y or right_wrist_y < right_eye_y:
-            print("bow_right")
-            return False
-        right_knee_x = landmarks[RIGHT_KNEE].x * frame_width
-        right_ankle_x = landmarks[RIGHT_ANKLE].x * frame_width
-        x_coords = [right_shoulder_x, right_hip_x, right_knee_x, right_ankle_x]
-
-    min_x = min(x_coords)
-    max_x = max(x_coords)
-
-    if max_x - min_x > posture_threshold:
-        print("Points are not aligned in a vertical line")
-        return False  # Points are not aligned in a vertical line
-
-    return True
-
-def is_side_view(pose_landmarks, system_config,side_view_direction,side_view_threshold = 30):
-    """
-    Checks if the user is in a straight side view based on MediaPipe Pose landmarks.
-
-    Args:
-        pose_landmarks (mediapipe.framework.formats.landmark_pb2.NormalizedLandmarkList): Detected pose landmarks.
-        frame_width (int): Width of the video frame.
-        frame_height (int): Height of the video frame.
-        alignment_threshold (float): Maximum allowed deviation in the X-axis for alignment.
-        z_diff_threshold (float): Minimum Z-coordinate difference for shoulders or hips to confirm a side view.
+        body_view = "side"
+        if shoulder_z_diff > VIEW_Z_THRESHOLD and hip_z_diff > VIEW_Z_THRESHOLD:
+            view_direction = "right"
+        elif shoulder_z_diff < -VIEW_Z_THRESHOLD and hip_z_diff < -VIEW_Z_THRESHOLD:
+            view_direction = "left"
+        else:
+            view_direction = "unknown"
 
-    Returns:
-        bool: True if the user is in a straight side view, False otherwise.
-    """
-    frame_width = system_config["resize_width"]
-    frame_height = system_config["resize_height"]
-    # Landmark indices
-
-    LEFT_SHOULDER = 11
-    RIGHT_SHOULDER = 12
-    LEFT_HIP = 23
-    RIGHT_HIP = 24
-
-    # Extract landmarks and convert normalized coordinates to pixel coordinates
-    landmarks = pose_landmarks.landmark
-
-    left_shoulder_x, left_shoulder_y, left_shoulder_z = (
-        landmarks[LEFT_SHOULDER].x * frame_width,
-        landmarks[LEFT_SHOULDER].y * frame_height,
-        landmarks[LEFT_SHOULDER].z,
-    )
-    right_shoulder_x, right_shoulder_y, right_shoulder_z = (
-        landmarks[RIGHT_SHOULDER].x * frame_width,
-        landmarks[RIGHT_SHOULDER].y * frame_height,
-        landmarks[RIGHT_SHOULDER].z,
-    )
-
-    left_hip_x, left_hip_y, left_hip_z = (
-        landmarks[LEFT_HIP].x * frame_width,
-        landmarks[LEFT_HIP].y * frame_height,
-        landmarks[LEFT_HIP].z,
-    )
-    right_hip_x, right_hip_y, right_hip_z = (
-        landmarks[RIGHT_HIP].x * frame_width,
-        landmarks[RIGHT_HIP].y * frame_height,
-        landmarks[RIGHT_HIP].z,
-    )
-
-    # Check Z-difference for side view
-    x_diff_shoulders = abs(right_shoulder_x -left_shoulder_x)
-    x_diff_hips = abs(right_hip_x - left_hip_x)
-
-    if x_diff_shoulders > side_view_threshold and x_diff_hips > side_view_threshold:
-        return False  # Shoulders and hips are not in a side view
-
-    return True
-
-def is_straight_front_view(pose_landmarks, system_config, alignment_threshold=20, z_diff_threshold=0.1):
-    """
-    Checks if the user is in a straight front view based on MediaPipe Pose landmarks.
-
-    Args:
-        pose_landmarks (mediapipe.framework.formats.landmark_pb2.NormalizedLandmarkList): Detected pose landmarks.
-        frame_width (int): Width of the video frame.
-        frame_height (int): Height of the video frame.
-        alignment_threshold (float): Maximum allowed deviation in the Y-axis for horizontal alignment.
-        z_diff_threshold (float): Maximum allowed Z-coordinate difference for depth alignment.
-
-    Returns:
-        bool: True if the user is in a straight front view, False otherwise.
-
-    """
-
-    frame_width = system_config["resize_width"]
-    frame_height = system_config["resize_height"]
-    # Landmark indices
-    LEFT_SHOULDER = 11
-    RIGHT_SHOULDER = 12
-    LEFT_HIP = 23
-    RIGHT_HIP = 24
-    NOSE = 0
-
-    # Extract landmark coordinates
-    landmarks = pose_landmarks.landmark
-
-    # Shoulder coordinates
-    left_shoulder_x, left_shoulder_y, left_shoulder_z = (
-        landmarks[LEFT_SHOULDER].x * frame_width,
-        landmarks[LEFT_SHOULDER].y * frame_height,
-        landmarks[LEFT_SHOULDER].z,
-    )
-    right_shoulder_x, right_shoulder_y, right_shoulder_z = (
-        landmarks[RIGHT_SHOULDER].x * frame_width,
-        landmarks[RIGHT_SHOULDER].y * frame_height,
-        landmarks[RIGHT_SHOULDER].z,
-    )
-
-    # Hip coordinates
-    left_hip_x, left_hip_y, left_hip_z = (
-        landmarks[LEFT_HIP].x * frame_width,
-        landmarks[LEFT_HIP].y * frame_height,
-        landmarks[LEFT_HIP].z,
-    )
-    right_hip_x, right_hip_y, right_hip_z = (
-        landmarks[RIGHT_HIP].x * frame_width,
-        landmarks[RIGHT_HIP].y * frame_height,
-        landmarks[RIGHT_HIP].z,
-    )
-
-    # Nose coordinates
-    nose_x = landmarks[NOSE].x * frame_width
-
-    # Check vertical alignment (X-coordinates of nose, shoulders, hips)
-    x_coords = [nose_x, left_shoulder_x, right_shoulder_x, left_hip_x, right_hip_x]
-    min_x = min(x_coords)
-    max_x = max(x_coords)
-
-    if max_x - min_x > alignment_threshold:
-        return False  # Points are not vertically aligned
-
-    # Check horizontal alignment (Y-coordinates of shoulders and hips)
-    shoulder_alignment = abs(left_shoulder_y - right_shoulder_y)
-    hip_alignment = abs(left_hip_y - right_hip_y)
-
-    if shoulder_alignment > alignment_threshold or hip_alignment > alignment_threshold:
-        return False  # Shoulders or hips are tilted
-
-    # Check depth alignment (Z-coordinates of shoulders and hips)
-    shoulder_z_diff = abs(left_shoulder_z - right_shoulder_z)
-    hip_z_diff = abs(left_hip_z - right_hip_z)
-
-    if shoulder_z_diff > z_diff_threshold or hip_z_diff > z_diff_threshold:
-        return False  # Shoulders or hips are not at the same depth
-
-    return True
-
-def verify_body_position(pose_landmarks, system_config,workout_config):
-    """
-    Verifies the body position by checking the body view, side view, straight side view, and bounding box alignment.
-
-    Args:
-        pose_landmarks (mediapipe.framework.formats.landmark_pb2.NormalizedLandmarkList): Detected pose landmarks.
-        system_config (dict): Configuration dictionary containing bounding box and other system parameters.
-
-    Returns:
-        dict: A dictionary containing:
-            - body_view (str): "front", "side", or "unknown".
-            - side_view_direction (str): "left", "right", or "unknown".
-            - is_straight_side_view (bool): True if straight side view, False otherwise.
-            - is_in_bounding_box (bool): True if body is within the bounding box, False otherwise.
-            - feedback (str): Feedback message summarizing the results.
-    """
-    # Initialize result variables
-    body_view = determine_view(pose_landmarks)
-    view_direction = "unknown"
-    correct_view = False
-
-    if body_view == workout_config["view"]:
-        correct_view = True
-    # Check if the view is a side view
     if body_view == "side":
-        view_direction = determine_side_view(pose_landmarks)
-        is_straight_body_view = is_straight_side_view(pose_landmarks,system_config,side_view_direction = view_direction)
+        thresholds = STRAIGHT_SIDE_VIEW_THRESHOLDS
+        is_straight_body_view = (
+            not (shoulder_x_diff > thresholds["side_view"] and hip_x_diff > thresholds["side_view"])
+            and not (shoulder_y_diff > thresholds["tilt"] or hip_y_diff > thresholds["tilt"])
+            and not alignment_ranges["right" if view_direction == "right" else "other"] > thresholds["posture"])
     else:
-        view_direction = "front"
-        is_straight_body_view = is_straight_front_view(pose_landmarks,system_config)
-
-    # Check if the body is within the bounding box
-    is_in_bounding_box = is_body_within_bounding_box(pose_landmarks, system_config)
-
-
-    # Return the results as a dictionary
-    return  correct_view,body_view, view_direction, is_straight_body_view, is_in_bounding_box
-
-
-verify_rep_count_algorithms = {
-    "squat": is_side_view,
-    "bicep_curl": is_standing_side_view,
-}
-
-
+        thresholds = STRAIGHT_FRONT_VIEW_THRESHOLDS
+        is_straight_body_view = (
+            not front_alignment_range > thresholds["alignment"]
+            and not (shoulder_y_diff > thresholds["alignment"] or hip_y_diff > thresholds["alignment"])
+            and not (abs(shoulder_z_diff) > thresholds["z_diff"] or abs(hip_z_diff) > thresholds["z_diff"]))
+
+    # Rep count checks
+    rep_direction = view_direction if side_view_direction is None else side_view_direction
+    if rep_direction == "right":
+        knee_y, wrist_y, alignment_range = left_knee[1], left_wrist[1], alignment_ranges["right"]
+    else:
+        knee_y, wrist_y, alignment_range = right_knee[1], right_wrist[1], alignment_ranges["other"]
+    is_side_view = not (shoulder_x_diff > SIDE_VIEW_THRESHOLD and hip_x_diff > SIDE_VIEW_THRESHOLD)
+    thresholds = STANDING_SIDE_VIEW_THRESHOLDS
+    is_standing_side_view = (
+        not (shoulder_x_diff > thresholds["side_view"] and hip_x_diff > thresholds["side_view"])
+        and not (knee_y < wrist_y or wrist_y < right_eye[1])
+        and not alignment_range > thresholds["posture"])
+
+    return BodyVerification(
+        correct_view=body_view == exercise_profile.view,
+        body_view=body_view,
+        view_direction=view_direction,
+        is_straight_body_view=is_straight_body_view,
+        is_in_bounding_box=is_in_bounding_box,
+        is_side_view=is_side_view,
+        is_standing_side_view=is_standing_side_view,
+    )
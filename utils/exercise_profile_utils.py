@@ -0,0 +1,78 @@
+from collections import namedtuple
+from types import MappingProxyType
+
+import numpy as np
+
+from .keypoints_utils import mp_pose
+
+ExerciseProfile = namedtuple("ExerciseProfile", [
+    "name",  # exercise key, e.g. "squat"
+    "view",  # body view the exercise is performed in
+    "keypoint_indices",  # view direction -> landmark indices of the model keypoints
+    "angle_keypoint_positions",  # view direction -> positions of the three angle joints in the model keypoints
+    "body_indices",  # landmark indices that must be inside the bounding box
+    "label_names",  # posture class -> label name
+    "label_values",  # label name -> posture class
+])
+
+
+def _read_only_indices(indices):
+    """
+    Integer index array that cannot be modified.
+    """
+    array = np.array(indices, dtype=np.intp)
+    array.flags.writeable = False
+    return array
+
+
+def compile_exercise_profile(exercise, workout_config, system_config):
+    """
+    Resolve the keypoint names of an exercise to landmark indices once, so the per-frame code only
+    indexes arrays.
+
+    Args:
+        exercise (str): Exercise key of the workout configurations, e.g. "squat".
+        workout_config (dict): Workout configuration of the exercise.
+        system_config (dict): System configuration with the bounding box body keypoints.
+
+    Returns:
+        ExerciseProfile: Immutable profile of the exercise.
+    """
+    keypoint_indices = {}
+    angle_keypoint_positions = {}
+    for view_direction, keypoint_names in workout_config["keypoints"].items():
+        keypoint_indices[view_direction] = _read_only_indices(
+            [getattr(mp_pose.PoseLandmark, name) for name in keypoint_names])
+        angle_names = workout_config["angle_keypoints"][view_direction]
+        missing = [name for name in angle_names if name not in keypoint_names]
+        if missing:
+            raise ValueError(f"Angle keypoints {missing} of {exercise} ({view_direction}) are not model keypoints.")
+        angle_keypoint_positions[view_direction] = _read_only_indices(
+            [keypoint_names.index(name) for name in angle_names])
+
+    labels = workout_config["labels"]
+    label_names = [None] * (max(labels.values()) + 1)
+    for name, value in labels.items():
+        label_names[value] = name
+
+    return ExerciseProfile(
+        name=exercise,
+        view=workout_config["view"],
+        keypoint_indices=MappingProxyType(keypoint_indices),
+        angle_keypoint_positions=MappingProxyType(angle_keypoint_positions),
+        body_indices=_read_only_indices([system_config["mediapipe_keypoints"][name]
+                                         for name in system_config["body_keypoints"]]),
+        label_names=tuple(label_names),
+        label_values=MappingProxyType(dict(labels)),
+    )
+
+
+def compile_exercise_profiles(workout_configurations, system_config):
+    """
+    Compile the profile of every exercise, done once at startup.
+
+    Returns:
+        MappingProxyType: Read-only dictionary of exercise -> ExerciseProfile.
+    """
+    return MappingProxyType({exercise: compile_exercise_profile(exercise, workout_config, system_config)
+                             for exercise, workout_config in workout_configurations.items()})
@@ -1,12 +1,11 @@
-import base64
-import os
 import random
-import wave
 
 import streamlit as st
 
+from . import utils
 
-def analyze_rep(rep,reps_results, rep_detections, rep_frames_fps,workout_config, mistake_counts):
+
+def analyze_rep(rep,reps_results, rep_detections, rep_frames_fps,workout_config, mistake_counts, exercise_profile):
     """
      Analyze squat rep data and generate feedback.
 
@@ -14,13 +13,14 @@ def analyze_rep(rep,reps_results, rep_detections, rep_frames_fps,workout_config,
          rep_detection (list): List of frame classifications for the current rep.
          rep_results (list): List of results for past reps.
          workout_configurations (dict): Configuration for the workout (e.g., squat).
+         exercise_profile (ExerciseProfile): Profile with the label lookup tables of the exercise.
 
      Returns:
          dict: The result of the current rep and the generated feedback.
      """
 
-    labels = workout_config["labels"]
-    labels_key = list(labels.keys())
+    label_names = exercise_profile.label_names
+    label_values = exercise_profile.label_values
     feedback_messages = workout_config["feedback_messages"]
 
     avg_frames_fps = sum(rep_frames_fps) / len(rep_frames_fps)
@@ -61,7 +61,7 @@ def analyze_rep(rep,reps_results, rep_detections, rep_frames_fps,workout_config,
     if len(reps_results) > 4:
         # Analyze recent results
         last_rep_result_name = reps_results[-1]["result"]
-        if last_rep_result_name != labels_key[0]:
+        if last_rep_result_name != label_names[0]:
             for past_rep in reversed(reps_results[-3:]):  # Check the last 3 reps
                 if past_rep["result"] == last_rep_result_name:
                     consecutive_rep_mistake_count += 1
@@ -69,13 +69,13 @@ def analyze_rep(rep,reps_results, rep_detections, rep_frames_fps,workout_config,
                     break
 
         # Decide feedback type
-        if consecutive_rep_mistake_count >= 3 and rep_result == labels[last_rep_result_name]:  # Escalate to elevated feedback
+        if consecutive_rep_mistake_count >= 3 and rep_result == label_values[last_rep_result_name]:  # Escalate to elevated feedback
             feedback_type = "elevated"
         elif consecutive_rep_mistake_count >= 1 and rep_result == 0:  # Supportive feedback if corrected
             feedback_type = "supportive"
 
     # Feedback Generation
-    posture_name = [name for name, value in labels.items() if value == rep_result][0]
+    posture_name = label_names[rep_result]
     rep_result_name = posture_name
     mistake_counts[posture_name] += 1
     if rep_result == 0:  # Proper squat
@@ -102,30 +102,86 @@ def analyze_rep(rep,reps_results, rep_detections, rep_frames_fps,workout_config,
     return rep_result,reps_results, feedback, mistake_counts
 
 
-def text_to_audio_feedback(audio_temp_dir, text, engine):
-    os.makedirs(audio_temp_dir, exist_ok=True)
-    temp_audio_path = os.path.join(audio_temp_dir, "feedback.wav")
-
-    engine.save_to_file(text, temp_audio_path)
-    engine.runAndWait()
-    # with wave.open(temp_audio_path, 'rb') as wf:
-    #     frames = wf.getnframes()
-    #     rate = wf.getframerate()
-    #     duration = frames / float(rate)  # Duration in seconds
-
-    with open(temp_audio_path, "rb") as audio_file:
-        audio_data = audio_file.read()
-        base64_audio = base64.b64encode(audio_data).decode()
-
+def play_audio(base64_audio):
     # Create a hidden autoplay audio element
     audio_html = f"""
                                 <audio class="audio_player" autoplay style="display:none; height:0px;">
                                     <source src="data:audio/wav;base64,{base64_audio}" type="audio/mpeg">
                                 </audio>
                             """
-    duration = 3
     st.markdown(audio_html, unsafe_allow_html=True)
-    return duration
+
+
+def speak(speech_worker, pending_audio, *parts):
+    """
+    Queue spoken feedback without blocking the frame loop.
+
+    Args:
+        speech_worker (SpeechWorker): Background text to speech worker.
+        pending_audio (list): Futures of feedback waiting to be played, in request order.
+        *parts (str): Phrases spoken one after another.
+
+    Returns:
+        float: Duration of the audio in seconds, or 3 if it is not rendered yet.
+    """
+    future = speech_worker.render_sequence(list(parts))
+    pending_audio.append(future)
+    if future.done() and future.exception() is None:
+        return future.result()[1]
+    return 3
+
+
+def play_pending_audio(pending_audio):
+    """
+    Play the queued feedback that has finished rendering, keeping the request order.
+    """
+    while pending_audio and pending_audio[0].done():
+        future = pending_audio.pop(0)
+        if future.exception() is not None:
+            print(f"Audio feedback failed: {future.exception()}")
+            continue
+        base64_audio, _ = future.result()
+        play_audio(base64_audio)
+
+
+def list_feedback_phrases(workout_configurations, max_rep=30):
+    """
+    Lists every static phrase spoken during monitoring so it can be prerendered at startup.
+
+    Args:
+        workout_configurations (dict): Configuration of all exercises.
+        max_rep (int): Rep announcements ("Rep 1" ... "Rep max_rep") to include.
+
+    Returns:
+        list: Phrases to prerender.
+    """
+    phrases = list(body_position_feedback_messages.values())
+    phrases.remove(body_position_feedback_messages["straight_side_view"])
+    phrases.extend(body_position_feedback_messages["straight_side_view"].format(view_direction=view_direction)
+                   for view_direction in ("left", "right"))
+
+    for exercise, workout_config in workout_configurations.items():
+        phrases.append(f"{utils.remove_underscores_and_capitalize(exercise)} monitoring started")
+        feedback_messages = workout_config["feedback_messages"]
+        phrases.extend(feedback_messages["appraisal"])
+        for feedback_type in ("normal", "elevated", "supportive"):
+            for messages in feedback_messages[feedback_type].values():
+                phrases.extend(messages)
+
+    phrases.extend(f"Rep {rep}" for rep in range(1, max_rep + 1))
+    return list(dict.fromkeys(phrases))
+
+
+body_position_feedback_messages = {
+    "adjust_side_view": "Adjust to a side view.",
+    "adjust_front_view": "Adjust to a front view.",
+    "outside_bounding_box": "Adjust your position to fit within the bounding box.",
+    "unknown_view": "Unable to detect your position. Adjust your pose.",
+    "straight_front_view": "Align shoulders and hips for a straight front view.",
+    "unknown_side": "Adjust your pose to face left or right side.",
+    "straight_side_view": "Align your body for a straight {view_direction} side view.",
+    "correct": "Your position is correct.",
+}
 
 
 def generate_body_position_feedback(is_view_correct, body_view, view_direction, is_straight_body_view,
@@ -149,32 +205,32 @@ def generate_body_position_feedback(is_view_correct, body_view, view_direction,
     if not is_view_correct:
         correct_body_position = False
         if body_view == "front":
-            feedback = "Adjust to a side view."
+            feedback = body_position_feedback_messages["adjust_side_view"]
         elif body_view == "side":
-            feedback = "Adjust to a front view."
+            feedback = body_position_feedback_messages["adjust_front_view"]
         return feedback, is_position_correct
 
     if not is_in_bounding_box:
-        feedback = "Adjust your position to fit within the bounding box."
+        feedback = body_position_feedback_messages["outside_bounding_box"]
         return feedback, is_position_correct
 
     if body_view == "unknown":
-        feedback = "Unable to detect your position. Adjust your pose."
+        feedback = body_position_feedback_messages["unknown_view"]
         return feedback, is_position_correct
 
     if body_view == "front" and not is_straight_body_view:
-        feedback = "Align shoulders and hips for a straight front view."
+        feedback = body_position_feedback_messages["straight_front_view"]
         return feedback, is_position_correct
 
     if body_view == "side":
         if view_direction == "unknown":
-            feedback = "Adjust your pose to face left or right side."
+            feedback = body_position_feedback_messages["unknown_side"]
             return feedback, is_position_correct
         if not is_straight_body_view:
-            feedback = f"Align your body for a straight {view_direction} side view."
+            feedback = body_position_feedback_messages["straight_side_view"].format(view_direction=view_direction)
             return feedback, is_position_correct
 
-    feedback = "Your position is correct."
+    feedback = body_position_feedback_messages["correct"]
     is_position_correct = True
 
     return feedback, is_position_correct
@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import deque
+
+from . import metrics_utils
+
+
+# What the capture thread does when the slot is full
+SLOT_POLICIES = ("drop_oldest", "block")
+
+
+class FrameGrabber:
+    def __init__(self, cap, slot_size=1, policy="drop_oldest"):
+        """
+        Read frames from a capture device on a background thread.
+        :param cap: An opened cv2.VideoCapture, or a frame source of frame_source_utils whose read()
+                    also returns the timestamp of the frame (any object with read/isOpened/release).
+        :param slot_size: Number of frames kept in the slot.
+        :param policy: "drop_oldest" keeps only the newest frames, like a live camera;
+                       "block" waits until the slot has room so no frame is lost, for file replay.
+        """
+        if policy not in SLOT_POLICIES:
+            raise ValueError(f"Unknown slot policy {policy!r}, expected one of {SLOT_POLICIES}.")
+        self.cap = cap
+        self.policy = policy
+        self.slot = deque(maxlen=slot_size)
+        self.condition = threading.Condition()
+        self.dropped_frames = 0
+        self.captured_frames = 0
+        self.is_running = False
+        self.thread = None
+
+    def start(self):
+        """
+        Start the capture thread.
+        """
+        if self.is_running:
+            return self
+        self.is_running = True
+        self.thread = threading.Thread(target=self._capture, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop the capture thread and release the capture device.
+        """
+        with self.condition:
+            self.is_running = False
+            self.condition.notify_all()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.thread = None
+        self.cap.release()
+
+    def isOpened(self):
+        """
+        True while frames are being captured or are still waiting in the slot.
+        """
+        with self.condition:
+            return self.is_running or len(self.slot) > 0
+
+    def read(self, timeout=1.0):
+        """
+        Wait for the next frame in the slot.
+        :param timeout: Seconds to wait for a new frame.
+        :return: (ret, frame, timestamp) where timestamp is the monotonic capture time, or the timestamp
+                 given by the frame source.
+        """
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.slot or not self.is_running, timeout=timeout):
+                return False, None, None
+            if not self.slot:
+                return False, None, None
+            frame, timestamp = self.slot.popleft()
+            self.condition.notify_all()
+        return True, frame, timestamp
+
+    def _capture(self):
+        """
+        Background capture thread.
+        """
+        while self.is_running and self.cap.isOpened():
+            result = self.cap.read()
+            if len(result) == 3:
+                ret, frame, timestamp = result
+            else:
+                ret, frame = result
+                timestamp = time.monotonic()
+            if not ret:
+                break
+            with self.condition:
+                if self.policy == "block":
+                    self.condition.wait_for(lambda: len(self.slot) < self.slot.maxlen or not self.is_running)
+                    if not self.is_running:
+                        break
+                if len(self.slot) == self.slot.maxlen:
+                    self.dropped_frames += 1
+                    metrics_utils.CAPTURE_DROPPED_FRAMES.inc()
+                self.slot.append((frame, timestamp))
+                self.captured_frames += 1
+                self.condition.notify()
+
+        with self.condition:
+            self.is_running = False
+            self.condition.notify_all()
@@ -0,0 +1,218 @@
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+# Replay modes of the file and synthetic sources
+PACES = ("realtime", "fast")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+class CameraSource:
+    def __init__(self, camera_index, frame_size=None, api_preference=None):
+        """
+        Live camera frames, timestamped with the monotonic time they were read.
+        :param camera_index: Index of the camera.
+        :param frame_size: Requested (width, height) of the camera frames.
+        :param api_preference: OpenCV capture backend, defaults to Media Foundation on Windows and
+                               to the OpenCV default elsewhere.
+        """
+        if api_preference is None:
+            api_preference = cv2.CAP_MSMF if sys.platform == "win32" else cv2.CAP_ANY
+        self.cap = cv2.VideoCapture(camera_index, api_preference)
+        if frame_size is not None:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, frame_size[0])
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, frame_size[1])
+        self.is_live = True
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        """
+        :return: (ret, frame, timestamp)
+        """
+        ret, frame = self.cap.read()
+        return ret, frame, time.monotonic()
+
+    def release(self):
+        self.cap.release()
+
+
+class PacedSource:
+    def __init__(self, fps, pace="realtime"):
+        """
+        Base of the recorded and generated sources. Frame i is timestamped start + i / fps, so the
+        timestamps follow the recorded pace in both modes and a replay always sees the same frame times.
+        :param fps: Frame rate of the source.
+        :param pace: "realtime" delivers every frame at its timestamp like a camera,
+                     "fast" delivers frames as fast as they are read.
+        """
+        if pace not in PACES:
+            raise ValueError(f"Unknown pace {pace!r}, expected one of {PACES}.")
+        self.fps = fps
+        self.pace = pace
+        self.frame_index = 0
+        self.start_time = None
+        self.is_live = False
+
+    def read(self):
+        """
+        :return: (ret, frame, timestamp), ret is False after the last frame.
+        """
+        frame = self._read_frame()
+        if frame is None:
+            return False, None, None
+        if self.start_time is None:
+            self.start_time = time.monotonic()
+        timestamp = self.start_time + self.frame_index / self.fps
+        self.frame_index += 1
+        if self.pace == "realtime":
+            time.sleep(max(0.0, timestamp - time.monotonic()))
+        return True, frame, timestamp
+
+    def _read_frame(self):
+        """
+        Next frame of the source, None at the end.
+        """
+        raise NotImplementedError
+
+
+class VideoFileSource(PacedSource):
+    def __init__(self, path, pace="realtime", fps=None):
+        """
+        Frames of a video file.
+        :param path: Video file, e.g. a recorded set video.
+        :param pace: "realtime" or "fast".
+        :param fps: Frame rate to replay at, defaults to the frame rate of the file.
+        """
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise IOError(f"Cannot open video {path}")
+        super().__init__(fps or self.cap.get(cv2.CAP_PROP_FPS) or 30, pace)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def _read_frame(self):
+        ret, frame = self.cap.read()
+        return frame if ret else None
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageSequenceSource(PacedSource):
+    def __init__(self, directory, fps=30, pace="realtime"):
+        """
+        Image files of a directory in file name order.
+        :param directory: Directory of PNG, JPEG or BMP frames.
+        :param fps: Frame rate the images were captured at.
+        :param pace: "realtime" or "fast".
+        """
+        super().__init__(fps, pace)
+        self.paths = sorted(path for path in glob.glob(os.path.join(directory, "*"))
+                            if path.lower().endswith(IMAGE_EXTENSIONS))
+        if not self.paths:
+            raise IOError(f"No images in {directory}")
+        self.next_path = 0
+
+    def isOpened(self):
+        return self.next_path < len(self.paths)
+
+    def _read_frame(self):
+        while self.next_path < len(self.paths):
+            frame = cv2.imread(self.paths[self.next_path])
+            self.next_path += 1
+            if frame is not None:
+                return frame
+            print(f"Skipping unreadable image {self.paths[self.next_path - 1]}")
+        return None
+
+    def release(self):
+        self.next_path = len(self.paths)
+
+
+class SyntheticSource(PacedSource):
+    def __init__(self, frame_size, fps=30, pace="realtime", frame_count=None):
+        """
+        Generated frames with a moving bar, for measuring the pipeline without a camera or video files.
+        The frames are the same in every run.
+        :param frame_size: (width, height) of the frames.
+        :param fps: Frame rate of the source.
+        :param pace: "realtime" or "fast".
+        :param frame_count: Number of frames, None for an endless source.
+        """
+        super().__init__(fps, pace)
+        self.frame_count = frame_count
+        width, height = frame_size
+        gradient = np.linspace(0, 255, width, dtype=np.float32)
+        self.background = np.repeat(np.broadcast_to(gradient, (height, width))[:, :, np.newaxis], 3,
+                                    axis=2).astype(np.uint8)
+        self.bar_width = max(1, width // 20)
+        self.is_open = True
+
+    def isOpened(self):
+        return self.is_open and (self.frame_count is None or self.frame_index < self.frame_count)
+
+    def _read_frame(self):
+        if not self.isOpened():
+            return None
+        frame = self.background.copy()
+        width = frame.shape[1]
+        bar_start = (self.frame_index * self.bar_width) % width
+        frame[:, bar_start:bar_start + self.bar_width] = 255
+        return frame
+
+    def release(self):
+        self.is_open = False
+
+
+def create_frame_source(source_config, camera_index=0, frame_size=None):
+    """
+    Open the frame source of the system configuration.
+
+    Args:
+        source_config (dict): "frame_source" section of the system configuration.
+        camera_index (int): Camera of the "camera" source.
+        frame_size (tuple): (width, height) requested from the camera and of the synthetic frames.
+
+    Returns:
+        Frame source with read() -> (ret, frame, timestamp), isOpened() and release().
+    """
+    source_type = source_config["type"]
+    if source_type == "camera":
+        return CameraSource(camera_index, frame_size)
+    if source_type == "video":
+        return VideoFileSource(source_config["path"], source_config["pace"])
+    if source_type == "images":
+        return ImageSequenceSource(source_config["path"], source_config["fps"], source_config["pace"])
+    if source_type == "synthetic":
+        return SyntheticSource(frame_size or (1280, 720), source_config["fps"], source_config["pace"],
+                               source_config.get("frame_count"))
+    raise ValueError(f"Unknown frame source type {source_type!r}.")
+
+
+def preprocess_frame(frame, resize_size, camera_frame=True):
+    """
+    Bring a frame to the orientation and size the pipeline works on.
+
+    Args:
+        frame (np.ndarray): BGR frame of a frame source.
+        resize_size (tuple): (width, height) of the processed frame.
+        camera_frame (bool): If True, the frame is a landscape camera frame that is rotated to portrait
+            and mirrored. Recorded set videos are already rotated and mirrored and are only resized.
+
+    Returns:
+        np.ndarray: Processed BGR frame.
+    """
+    if camera_frame:
+        frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
+    if (frame.shape[1], frame.shape[0]) != tuple(resize_size):
+        frame = cv2.resize(frame, resize_size)
+    if camera_frame:
+        frame = cv2.flip(frame, 1)
+    return frame
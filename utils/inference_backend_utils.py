@@ -0,0 +1,112 @@
+import importlib
+import threading
+import time
+
+import numpy as np
+
+# Interpreter packages tried in order by the "auto" backend; the first one installed is used
+INFERENCE_BACKENDS = ("ai_edge_litert", "tflite_runtime", "tensorflow")
+
+_backend_modules = {
+    "ai_edge_litert": "ai_edge_litert.interpreter",
+    "tflite_runtime": "tflite_runtime.interpreter",
+    "tensorflow": "tensorflow",
+}
+
+_loaded_backends = {}
+_backend_lock = threading.Lock()
+
+
+class InferenceBackend:
+    def __init__(self, name, interpreter_class, load_delegate, op_resolver_type, import_time):
+        """
+        TFLite interpreter implementation of one installed package.
+        :param name: Package name, one of INFERENCE_BACKENDS.
+        :param interpreter_class: Interpreter class of the package.
+        :param load_delegate: Function loading a delegate library.
+        :param op_resolver_type: OpResolverType enum of the package.
+        :param import_time: Seconds spent importing the package.
+        """
+        self.name = name
+        self.interpreter_class = interpreter_class
+        self.load_delegate = load_delegate
+        self.op_resolver_type = op_resolver_type
+        self.import_time = import_time
+
+    def create_interpreter(self, model_path=None, model_content=None, num_threads=None, delegate="xnnpack"):
+        """
+        Create an interpreter, tensors not allocated yet.
+        :param model_path: Path of the .tflite model.
+        :param model_content: Model bytes, used instead of model_path when given.
+        :param num_threads: Interpreter threads, None lets TFLite decide.
+        :param delegate: "xnnpack" (TFLite default delegate), "none" (builtin kernels only)
+                         or the path of a delegate library.
+        """
+        interpreter_kwargs = {"num_threads": num_threads}
+        if model_content is not None:
+            interpreter_kwargs["model_content"] = model_content
+        else:
+            interpreter_kwargs["model_path"] = model_path
+        if delegate == "none":
+            interpreter_kwargs["experimental_op_resolver_type"] = \
+                self.op_resolver_type.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+        elif delegate != "xnnpack":
+            interpreter_kwargs["experimental_delegates"] = [self.load_delegate(delegate)]
+        return self.interpreter_class(**interpreter_kwargs)
+
+
+def _import_backend(name):
+    """
+    Import the interpreter package of a backend.
+    """
+    import_start = time.perf_counter()
+    module = importlib.import_module(_backend_modules[name])
+    import_time = time.perf_counter() - import_start
+    if name == "tensorflow":
+        return InferenceBackend(name, module.lite.Interpreter, module.lite.experimental.load_delegate,
+                                module.lite.experimental.OpResolverType, import_time)
+    return InferenceBackend(name, module.Interpreter, module.load_delegate, module.OpResolverType, import_time)
+
+
+def get_backend(name="auto"):
+    """
+    Return the inference backend, importing its package on first use.
+
+    Args:
+        name (str): "auto" for the first installed package of INFERENCE_BACKENDS, or one of them.
+
+    Returns:
+        InferenceBackend: The backend.
+    """
+    if name != "auto" and name not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend '{name}'.")
+
+    with _backend_lock:
+        if name in _loaded_backends:
+            return _loaded_backends[name]
+
+        candidates = INFERENCE_BACKENDS if name == "auto" else (name,)
+        for candidate in candidates:
+            try:
+                backend = _import_backend(candidate)
+            except ImportError:
+                continue
+            print(f"Using the {backend.name} inference backend (imported in {backend.import_time * 1000:.0f} ms)")
+            _loaded_backends[name] = _loaded_backends[candidate] = backend
+            return backend
+
+    raise ImportError(f"No TFLite interpreter package found, install one of {', '.join(candidates)}.")
+
+
+def warm_up_interpreter(interpreter, input_details):
+    """
+    Invoke the interpreter once on a zero tensor so the one-time setup cost is not paid by the first rep.
+
+    Returns:
+        float: Duration of the warm-up invoke in seconds.
+    """
+    zero_input = np.zeros(input_details[0]['shape'], dtype=input_details[0]['dtype'])
+    interpreter.set_tensor(input_details[0]['index'], zero_input)
+    invoke_start = time.perf_counter()
+    interpreter.invoke()
+    return time.perf_counter() - invoke_start
@@ -0,0 +1,74 @@
+import math
+
+SCHEDULER_POLICIES = ("always", "down_phase")
+
+
+class InferenceScheduler:
+    def __init__(self, stride=1, time_budget_ms=None, policy="always"):
+        """
+        Decide on which frames the posture classification model is invoked.
+        :param stride: Invoke the model on every stride-th eligible frame.
+        :param time_budget_ms: Optional inference time budget per frame. When the average inference
+                               time exceeds it, the stride is raised to stay within the budget.
+        :param policy: "always" to classify every eligible frame, "down_phase" to classify only
+                       while the rep counter reports the "down" stage.
+        """
+        if policy not in SCHEDULER_POLICIES:
+            raise ValueError(f"Unknown inference scheduler policy '{policy}'.")
+        self.stride = max(1, int(stride))
+        self.time_budget_ms = time_budget_ms
+        self.policy = policy
+        self.average_inference_ms = None
+        self.frames_since_inference = None
+        self.invocations = 0
+        self.skipped = 0
+
+    def effective_stride(self):
+        """
+        Stride after applying the time budget.
+        """
+        if self.time_budget_ms and self.average_inference_ms:
+            return max(self.stride, math.ceil(self.average_inference_ms / self.time_budget_ms))
+        return self.stride
+
+    def should_infer(self, stage):
+        """
+        Called once per frame with a complete keypoint window.
+        :param stage: Current rep stage from the rep counter ("up", "down" or "none").
+        :return: True if the model should be invoked on this frame.
+        """
+        if self.policy == "down_phase" and stage != "down":
+            self.skipped += 1
+            return False
+
+        if self.frames_since_inference is not None and self.frames_since_inference + 1 < self.effective_stride():
+            self.frames_since_inference += 1
+            self.skipped += 1
+            return False
+
+        self.frames_since_inference = 0
+        self.invocations += 1
+        return True
+
+    def holds_last_result(self, stage):
+        """
+        True if a skipped frame should repeat the last result, so rep analysis keeps one
+        detection per frame. Frames skipped outside the down phase get no detection.
+        """
+        return self.policy == "always" or stage == "down"
+
+    def record_inference_time(self, seconds):
+        """
+        Update the moving average of the inference time.
+        """
+        milliseconds = seconds * 1000
+        if self.average_inference_ms is None:
+            self.average_inference_ms = milliseconds
+        else:
+            self.average_inference_ms = 0.9 * self.average_inference_ms + 0.1 * milliseconds
+
+    def reset(self):
+        """
+        Start a new rep; the next eligible frame is always classified.
+        """
+        self.frames_since_inference = None
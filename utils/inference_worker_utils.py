@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import deque
+
+from . import metrics_utils, model_utils
+
+
+class InferenceWorker:
+    def __init__(self, interpreter_pool, sequence_length, inference_server=None):
+        """
+        Run posture classification on a background thread.
+        Only the newest submitted window is kept; a window still waiting when a newer one arrives is dropped.
+        :param interpreter_pool: InterpreterPool of the posture classification model.
+        :param sequence_length: Number of frames in a model input window.
+        :param inference_server: Optional BatchInferenceServer used instead of the interpreter pool.
+        """
+        self.interpreter_pool = interpreter_pool
+        self.sequence_length = sequence_length
+        self.inference_server = inference_server
+        self.pending_window = None  # (window, frame_number, window_end_timestamp)
+        self.results = deque()
+        self.is_busy = False
+        self.is_running = False
+        self.superseded_windows = 0
+        self.last_inference_time = None
+        self.condition = threading.Condition()
+        self.thread = None
+
+    def start(self):
+        """
+        Start the inference thread.
+        """
+        if self.thread is None:
+            self.is_running = True
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop the inference thread once the current inference has finished.
+        """
+        with self.condition:
+            self.is_running = False
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def submit(self, window, frame_number, window_end_timestamp):
+        """
+        Queue a window for classification, replacing a window that has not started yet.
+        The window must not be modified after it is submitted.
+        :param window: Model input of shape (sequence_length, keypoints * 2).
+        :param frame_number: Number of the frame the window ends at.
+        :param window_end_timestamp: Capture time of the last frame in the window.
+        """
+        with self.condition:
+            if self.pending_window is not None:
+                self.superseded_windows += 1
+            self.pending_window = (window, frame_number, window_end_timestamp)
+            self.condition.notify_all()
+
+    def drain(self):
+        """
+        Return the finished results, oldest first, as (posture_class, confidence, frame_number, window_end_timestamp).
+        """
+        with self.condition:
+            results = list(self.results)
+            self.results.clear()
+        return results
+
+    def wait_idle(self, timeout=1.0):
+        """
+        Wait until every submitted window has been classified.
+        :return: False if the timeout expired first.
+        """
+        with self.condition:
+            return self.condition.wait_for(lambda: self.pending_window is None and not self.is_busy,
+                                           timeout=timeout)
+
+    def _run(self):
+        """
+        Background inference thread.
+        """
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending_window is not None or not self.is_running)
+                if not self.is_running:
+                    return
+                window, frame_number, window_end_timestamp = self.pending_window
+                self.pending_window = None
+                self.is_busy = True
+
+            inference_start = time.perf_counter()
+            try:
+                if self.inference_server is not None:
+                    posture_class, confidence = self.inference_server.predict(window)
+                else:
+                    posture_class, confidence = model_utils.predict_posture(window, self.interpreter_pool,
+                                                                            self.sequence_length)
+            except Exception as error:
+                print(f"Posture inference failed: {error}")
+                posture_class, confidence = None, None
+            self.last_inference_time = time.perf_counter() - inference_start
+            metrics_utils.INFERENCE_SECONDS.observe(self.last_inference_time, mode="background")
+
+            with self.condition:
+                if posture_class is not None:
+                    self.results.append((posture_class, confidence, frame_number, window_end_timestamp))
+                self.is_busy = False
+                self.condition.notify_all()
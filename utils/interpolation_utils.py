@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 import numpy as np
 
 def calculate_sequence_needed(current_fps, target_fps, sequence_length):
@@ -43,6 +45,9 @@ def process_keypoints_sequence(keypoints_sequence, current_fps, target_fps, targ
     Returns: A list of keypoints arrays interpolated to match the target_frame_count,
     with the start and end frames being the same as the original sequence.
     """
+    if len(keypoints_sequence) > target_frame_count:
+        # Fewer output frames than original frames cannot be reached by removing interpolated frames
+        raise ValueError(f"Cannot fit {len(keypoints_sequence)} frames into {target_frame_count} frames.")
 
     # Calculate the interpolation factor
     interpolation_factor = target_fps / current_fps
@@ -126,3 +131,114 @@ def process_keypoints_sequence(keypoints_sequence, current_fps, target_fps, targ
                 i=0
 
     return interpolated_sequence
+
+
+@lru_cache(maxsize=64)
+def get_resampling_positions(frame_count, num_frames_between, target_frame_count):
+    """
+    Fractional position in the original sequence of every frame that process_keypoints_sequence outputs.
+
+    Every frame of process_keypoints_sequence lies between two neighbouring original frames, so running it
+    once on the frame indices gives the whole output layout. The layout only depends on the arguments,
+    and is computed once per combination.
+
+    frame_count: Number of original frames, at most target_frame_count.
+    num_frames_between: int(target_fps / current_fps).
+    target_frame_count: Number of frames needed for LSTM input.
+
+    Returns: A read-only float64 array of shape (target_frame_count,); original frames sit at integer positions.
+    """
+    frame_indices = [np.array([index], dtype=np.float64) for index in range(frame_count)]
+    positions = np.concatenate(process_keypoints_sequence(frame_indices, 1, num_frames_between, target_frame_count))
+    positions.flags.writeable = False
+    return positions
+
+
+def resample_keypoints_sequence(keypoints_sequence, current_fps, target_fps, target_frame_count, method="linear"):
+    """
+    Resamples a sequence of keypoints to exactly target_frame_count frames in one batched operation,
+    a drop-in replacement of process_keypoints_sequence.
+
+    The original frames keep the output indices process_keypoints_sequence gives them, and in "linear" mode
+    the frames between them are the same interpolated frames. When the sequence is longer than
+    target_frame_count (capture above target_fps), which process_keypoints_sequence cannot handle,
+    the output frames are sampled evenly from the sequence instead.
+
+    keypoints_sequence: Array-like of shape (frame_count, keypoints * 2).
+    current_fps: Frame rate at which keypoints are captured.
+    target_fps: Desired frame rate for the LSTM model.
+    target_frame_count: Number of frames needed for LSTM input.
+    method: "linear" or "cubic" (Catmull-Rom spline through the original frames).
+
+    Returns: A float32 array of shape (target_frame_count, keypoints * 2).
+    """
+    keypoints_sequence = np.asarray(keypoints_sequence, dtype=np.float32)
+    frame_count = len(keypoints_sequence)
+    if frame_count == 1:
+        return np.repeat(keypoints_sequence, target_frame_count, axis=0)
+
+    if frame_count <= target_frame_count:
+        source_positions = get_resampling_positions(frame_count, int(target_fps / current_fps), target_frame_count)
+    else:
+        source_positions = np.linspace(0, frame_count - 1, target_frame_count)
+    return interpolate_at_positions(keypoints_sequence, source_positions, method)
+
+
+def resample_keypoints_by_timestamp(keypoints_sequence, timestamps, target_fps, target_frame_count,
+                                    method="linear"):
+    """
+    Resamples keypoints captured at irregular times to target_frame_count frames spaced exactly
+    1 / target_fps seconds apart, ending at the latest captured frame.
+
+    keypoints_sequence: Array of shape (frame_count, keypoints * 2), oldest frame first.
+    timestamps: Monotonic capture time in seconds of every frame.
+    target_fps: Frame rate the LSTM model was trained at.
+    target_frame_count: Number of frames needed for LSTM input.
+    method: "linear" or "cubic".
+
+    Returns: A float32 array of shape (target_frame_count, keypoints * 2), or None if the
+    captured frames do not cover the whole window yet.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    window_start = timestamps[-1] - (target_frame_count - 1) / target_fps
+    if len(timestamps) < 2 or timestamps[0] > window_start:
+        return None
+
+    # Drop the frames older than the last one before the window start
+    first = np.searchsorted(timestamps, window_start, side="right") - 1
+    timestamps = timestamps[first:]
+    keypoints_sequence = np.asarray(keypoints_sequence[first:], dtype=np.float32)
+
+    output_times = window_start + np.arange(target_frame_count) / target_fps
+    source_positions = np.interp(output_times, timestamps, np.arange(len(timestamps)))
+    return interpolate_at_positions(keypoints_sequence, source_positions, method)
+
+
+def interpolate_at_positions(keypoints_sequence, positions, method="linear"):
+    """
+    Samples a keypoint sequence at fractional frame positions.
+
+    keypoints_sequence: Array of shape (frame_count, keypoints * 2).
+    positions: Array of fractional frame indices between 0 and frame_count - 1.
+    method: "linear" or "cubic" (Catmull-Rom).
+
+    Returns: An array of shape (len(positions), keypoints * 2). Integer positions return
+    the original frames exactly.
+    """
+    last_index = len(keypoints_sequence) - 1
+    lower = np.clip(np.floor(positions).astype(np.int64), 0, last_index)
+    upper = np.minimum(lower + 1, last_index)
+    ratio = (positions - lower).astype(np.float32)[:, np.newaxis]
+
+    p1 = keypoints_sequence[lower]
+    p2 = keypoints_sequence[upper]
+    if method == "linear":
+        return p1 * (1 - ratio) + p2 * ratio
+    if method == "cubic":
+        p0 = keypoints_sequence[np.maximum(lower - 1, 0)]
+        p3 = keypoints_sequence[np.minimum(lower + 2, last_index)]
+        return 0.5 * (2 * p1
+                      + (p2 - p0) * ratio
+                      + (2 * p0 - 5 * p1 + 4 * p2 - p3) * ratio ** 2
+                      + (3 * p1 - p0 - 3 * p2 + p3) * ratio ** 3)
+    raise ValueError(f"Unknown interpolation method '{method}'.")
@@ -0,0 +1,93 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from . import metrics_utils
+
+
+class InterpreterPool:
+    def __init__(self, create_interpreter, size=2, name=""):
+        """
+        Bounded pool of interpreters of one model, shared by all monitoring sessions.
+        A TFLite interpreter must not be invoked from two threads at once, so each inference checks
+        one out for the duration of set_tensor/invoke/get_tensor and returns it afterwards.
+        Interpreters are created on demand until the pool is full; later checkouts wait for a free one.
+        :param create_interpreter: Function returning a new (interpreter, input_details, output_details).
+        :param size: Maximum number of interpreters.
+        :param name: Exercise label of the checkout wait metric.
+        """
+        self.create_interpreter = create_interpreter
+        self.name = name
+        self.size = max(1, int(size))
+        self.idle = []  # (interpreter, input_details, output_details) ready to be checked out
+        self.created = 0
+        self.in_use = 0
+        self.condition = threading.Condition()
+
+        # wait-time metrics
+        self.checkouts = 0
+        self.waited_checkouts = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    @contextmanager
+    def checkout(self, timeout=None):
+        """
+        Borrow an interpreter for one inference.
+        :param timeout: Maximum seconds to wait for a free interpreter, None waits indefinitely.
+        :return: Context manager yielding (interpreter, input_details, output_details).
+        """
+        wait_start = time.perf_counter()
+        entry = None
+        waited = False
+        with self.condition:
+            if not self.idle and self.created >= self.size:
+                waited = True
+                if not self.condition.wait_for(lambda: self.idle or self.created < self.size, timeout=timeout):
+                    raise TimeoutError(f"No free interpreter after {timeout} s, all {self.size} are in use.")
+            if self.idle:
+                entry = self.idle.pop()
+            else:
+                # Reserve the slot now, the interpreter is created outside the lock
+                self.created += 1
+            self.in_use += 1
+
+            wait_time = time.perf_counter() - wait_start
+            self.checkouts += 1
+            self.waited_checkouts += waited
+            self.total_wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+        metrics_utils.INTERPRETER_CHECKOUT_WAIT_SECONDS.observe(wait_time, exercise=self.name)
+
+        if entry is None:
+            try:
+                entry = self.create_interpreter()
+            except Exception:
+                with self.condition:
+                    self.created -= 1
+                    self.in_use -= 1
+                    self.condition.notify()
+                raise
+
+        try:
+            yield entry
+        finally:
+            with self.condition:
+                self.idle.append(entry)
+                self.in_use -= 1
+                self.condition.notify()
+
+    def get_stats(self):
+        """
+        Snapshot of the pool usage and wait-time metrics, times in milliseconds.
+        """
+        with self.condition:
+            return {
+                "size": self.size,
+                "created": self.created,
+                "in_use": self.in_use,
+                "checkouts": self.checkouts,
+                "waited_checkouts": self.waited_checkouts,
+                "average_wait_ms": self.total_wait_time / self.checkouts * 1000 if self.checkouts else 0.0,
+                "max_wait_ms": self.max_wait_time * 1000,
+            }
@@ -0,0 +1,64 @@
+import numpy as np
+
+
+class KeypointRingBuffer:
+    def __init__(self, capacity, frame_size):
+        """
+        Preallocated circular buffer of normalized keypoint frames and their capture timestamps.
+        Every frame is written twice, at its slot and at slot + capacity, so the latest
+        frames are always contiguous in memory and can be returned as a view without copying.
+        :param capacity: Maximum number of frames kept.
+        :param frame_size: Values per frame (keypoints * 2).
+        """
+        self.capacity = capacity
+        self.frame_size = frame_size
+        self.frames = np.zeros((2 * capacity, frame_size), dtype=np.float32)
+        self.timestamps = np.zeros(2 * capacity, dtype=np.float64)
+        self.next_index = 0  # slot written by the next append
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, frame, timestamp=0.0):
+        """
+        Add a frame, overwriting the oldest one once the buffer is full.
+        :param frame: Flattened keypoints of one frame.
+        :param timestamp: Monotonic capture time of the frame in seconds.
+        """
+        self.frames[self.next_index] = frame
+        self.frames[self.next_index + self.capacity] = frame
+        self.timestamps[self.next_index] = timestamp
+        self.timestamps[self.next_index + self.capacity] = timestamp
+        self.next_index = (self.next_index + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def last(self, n):
+        """
+        Read-only view of the latest n frames, oldest first, with shape (n, frame_size).
+        The view is only valid until the next append.
+        """
+        if n > self.size:
+            raise ValueError(f"Requested {n} frames but only {self.size} are buffered.")
+        end = self.next_index + self.capacity
+        view = self.frames[end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def last_timestamps(self, n):
+        """
+        Read-only view of the capture timestamps of the latest n frames, oldest first.
+        """
+        if n > self.size:
+            raise ValueError(f"Requested {n} timestamps but only {self.size} are buffered.")
+        end = self.next_index + self.capacity
+        view = self.timestamps[end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def clear(self):
+        """
+        Drop all buffered frames, e.g. when the workout is paused.
+        """
+        self.next_index = 0
+        self.size = 0
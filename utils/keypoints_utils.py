@@ -4,165 +4,186 @@ import numpy as np
 mp_pose = mp.solutions.pose
 
 
-def extract_keypoints(results, keypoints_to_extract):
-    landmarks = results.pose_landmarks.landmark
-    return np.array([
-        [landmarks[getattr(mp_pose.PoseLandmark, kp)].x, landmarks[getattr(mp_pose.PoseLandmark, kp)].y]
-        for kp in keypoints_to_extract
-    ])
+def extract_keypoints(landmarks, keypoint_indices):
+    """
+    Select the (x, y) coordinates of keypoints from the landmark array.
+
+    Args:
+        landmarks (np.ndarray): Pose landmark array of shape (33, 4) from landmark_utils.landmarks_to_array,
+            or a block of frames of shape (T, 33, 4).
+        keypoint_indices (np.ndarray): Landmark indices of the keypoints, from ExerciseProfile.keypoint_indices.
+
+    Returns:
+        np.ndarray: Array of shape (len(keypoint_indices), 2), or (T, len(keypoint_indices), 2) for a block.
+    """
+    return landmarks[..., keypoint_indices, :2].astype(np.float64)
 
 
 def scale_and_rel_position_normalize_keypoints(keypoints, flip_horizontally=False):
     """
     Normalize keypoints by scaling based on the distance between the hip and shoulder,
     and translate the hip to the origin. Optionally, flip the normalized keypoints horizontally.
+    Single-frame form of normalize_keypoints_batch, with the same results.
 
     Args:
-        keypoints (list): List of keypoints with (x, y) pairs.
+        keypoints (list or np.ndarray): Keypoints with (x, y) pairs, shoulder first and hip second.
         flip_horizontally (bool): If True, flip the normalized keypoints horizontally.
 
     Returns:
         np.ndarray: Flattened array of normalized keypoints.
     """
-    hip_x, hip_y = keypoints[1]
-    shoulder_x, shoulder_y = keypoints[0]
+    keypoints = np.asarray(keypoints, dtype=np.float64)
 
     # Step 1: Calculate the scaling factor
-    hip = np.array([hip_x, hip_y])
-    shoulder = np.array([shoulder_x, shoulder_y])
-    scale = np.linalg.norm(hip - shoulder)
+    shoulder_to_hip = keypoints[1] - keypoints[0]
+    scale = np.sqrt(shoulder_to_hip @ shoulder_to_hip)
     scale_factor = 1 / scale if scale > 0 else 1.0  # Avoid division by zero
 
-    # Step 2: Scale the keypoints
-    scaled_keypoints = []
-    for keypoint in keypoints:
-        scaled_x = keypoint[0] * scale_factor
-        scaled_y = keypoint[1] * scale_factor
-        scaled_keypoints.append([scaled_x, scaled_y])
-
-    # Step 3: Translate the scaled hip to the origin
-    hip_scaled_x, hip_scaled_y = scaled_keypoints[1]
-    normalized_frame_keypoints = []
-    for keypoint in scaled_keypoints:
-        normalized_x = keypoint[0] - hip_scaled_x
-        normalized_y = keypoint[1] - hip_scaled_y
-        normalized_frame_keypoints.append([normalized_x, normalized_y])
+    # Step 2 and 3: Scale the keypoints and translate the scaled hip to the origin
+    scaled_keypoints = keypoints * scale_factor
+    normalized_keypoints = scaled_keypoints - scaled_keypoints[1]
 
     # Step 4: Flip horizontally if required
     if flip_horizontally:
-        for keypoint in normalized_frame_keypoints:
-            keypoint[0] = -keypoint[0]  # Negate the x-coordinate
+        normalized_keypoints[:, 0] *= -1
 
-    return np.array(normalized_frame_keypoints).flatten()
+    return normalized_keypoints.ravel()
 
 
-# Define a function to preprocess keypoints
-def preprocess_keypoints(keypoints, all_keypoints, selected_keypoints):
+def normalize_keypoints_batch(keypoints, flip_horizontally=False, out=None):
     """
-    Extracts selected keypoints from a flattened array and formats them for angle calculations.
+    "combined" normalization of a block of frames: scale every frame by its shoulder-hip distance,
+    move its hip to the origin and optionally mirror it horizontally.
+    The shoulder is the first keypoint and the hip the second, as in the workout configurations.
 
     Args:
-        flattened_keypoints (np.ndarray): Flattened array of keypoints with shape (n * 2,).
-        all_keypoints (list): List of all keypoint names in the order they appear in the flattened array.
-        selected_keypoints (list): List of keypoints to extract for angle calculations.
+        keypoints (np.ndarray): Keypoints of shape (T, K, 2).
+        flip_horizontally (bool): If True, negate the normalized x-coordinates.
+        out (np.ndarray): Optional array of shape (T, K * 2) the result is written to,
+            e.g. rows of a preallocated session buffer.
 
     Returns:
-        dict: Dictionary of selected keypoints with their [x, y] coordinates.
+        np.ndarray: Normalized keypoints of shape (T, K * 2), one flattened frame per row.
     """
-    # Reshape flattened keypoints into pairs of (x, y)
+    keypoints = np.asarray(keypoints, dtype=np.float64)
+    frame_count, keypoint_count, _ = keypoints.shape
+
+    # Step 1: Scaling factor per frame, frames with a zero shoulder-hip distance are not scaled
+    shoulder_to_hip = keypoints[:, 1] - keypoints[:, 0]
+    # Row-wise dot product by matmul, which rounds like np.linalg.norm of the per-frame path
+    scale = np.sqrt(shoulder_to_hip[:, np.newaxis, :] @ shoulder_to_hip[:, :, np.newaxis])[:, 0, 0]
+    with np.errstate(divide="ignore"):
+        scale_factor = np.where(scale > 0, 1 / scale, 1.0)[:, np.newaxis, np.newaxis]
 
-    # Create a dictionary for all keypoints
-    keypoint_dict = {name: keypoints[idx] for idx, name in enumerate(all_keypoints)}
+    # Step 2 and 3: Scale the keypoints and translate the scaled hip to the origin
+    scaled_keypoints = keypoints * scale_factor
+    normalized_keypoints = scaled_keypoints - scaled_keypoints[:, 1:2]
 
-    # Extract only the selected keypoints
-    selected_keypoint_coords = {name: keypoint_dict[name] for name in selected_keypoints}
+    # Step 4: Flip horizontally if required
+    if flip_horizontally:
+        normalized_keypoints[:, :, 0] *= -1
 
-    return selected_keypoint_coords
+    normalized_keypoints = normalized_keypoints.reshape(frame_count, keypoint_count * 2)
+    if out is None:
+        return normalized_keypoints
+    out[...] = normalized_keypoints
+    return out
 
 
-def calculate_angle(point_a, point_b, point_c, width, height):
+def calculate_angles(points, width, height):
     """
-    Calculate the angle (in degrees) between three points in 2D space.
-    Multiplies normalized coordinates with width and height to convert to pixel space.
+    Calculate the angles (in degrees) at the middle point of many point triples in 2D space.
+    Multiplies normalized coordinates with width and height to convert to pixel space,
+    so the angles match the aspect ratio of the frame.
 
     Args:
-        point_a (list or array): Normalized coordinates of the first point [x, y].
-        point_b (list or array): Normalized coordinates of the middle point [x, y].
-        point_c (list or array): Normalized coordinates of the third point [x, y].
+        points (np.ndarray): Normalized coordinates of shape (N, 3, 2), the middle point of every
+            triple is the vertex of its angle. Can hold frames, joints or both.
         width (int): Width of the frame/image in pixels.
         height (int): Height of the frame/image in pixels.
 
     Returns:
-        float: Angle in degrees between the three points.
+        np.ndarray: Angles of shape (N,), 0.0 where a vector has zero length.
     """
     # Convert normalized points to pixel coordinates
-    point_a = np.array([point_a[0] * width, point_a[1] * height])
-    point_b = np.array([point_b[0] * width, point_b[1] * height])
-    point_c = np.array([point_c[0] * width, point_c[1] * height])
+    points = np.asarray(points, dtype=np.float64) * (width, height)
 
-    # Vectors between the points
-    vector_ab = point_a - point_b  # Vector from B to A
-    vector_cb = point_c - point_b  # Vector from B to C
+    # Vectors from B to A and from B to C
+    vectors = points[:, ::2] - points[:, 1:2]
 
-    # Dot product and magnitudes
-    dot_product = np.dot(vector_ab, vector_cb)
-    magnitude_ab = np.linalg.norm(vector_ab)
-    magnitude_cb = np.linalg.norm(vector_cb)
+    # Dot product and squared magnitudes of the two vectors from one row-wise matmul,
+    # which rounds like np.dot and np.linalg.norm
+    gram = vectors @ vectors.transpose(0, 2, 1)
+    magnitudes = np.sqrt(gram[:, 0, 0]) * np.sqrt(gram[:, 1, 1])
 
-    # Avoid division by zero
-    if magnitude_ab == 0 or magnitude_cb == 0:
-        return 0.0
-
-    # Calculate the angle in radians
-    cos_theta = dot_product / (magnitude_ab * magnitude_cb)
+    # Avoid division by zero, zero-length vectors give 0.0
+    zero_length = magnitudes == 0
+    magnitudes[zero_length] = 1.0
+    cos_theta = gram[:, 0, 1] / magnitudes
 
     # Clip cos_theta to avoid numerical issues (e.g., slightly > 1 or < -1)
-    cos_theta = np.clip(cos_theta, -1.0, 1.0)
+    np.minimum(cos_theta, 1.0, out=cos_theta)
+    np.maximum(cos_theta, -1.0, out=cos_theta)
 
     # Convert to degrees
-    angle = np.arccos(cos_theta) * (180.0 / np.pi)
-    return angle
+    angles = np.arccos(cos_theta) * (180.0 / np.pi)
+    angles[zero_length] = 0.0
+    return angles
 
 
-def count_reps_squat(current_stage, stage, keypoints, workout_config, system_config, view_direction):
-    angle_keypoints = list(preprocess_keypoints(keypoints, workout_config["keypoints"][view_direction],
-                                                workout_config["angle_keypoints"][view_direction]).values())
-    angle = calculate_angle(angle_keypoints[0], angle_keypoints[1], angle_keypoints[2],
-                            system_config["resize_width"], system_config["resize_height"])
-    new_rep = False
-    up_knee_angle = 173
-    down_knee_angle = 140
+# Joint angle above "up" sets the "up" stage and below "down" the "down" stage; a rep ends on down -> up
+rep_count_thresholds = {
+    "squat": {"up": 173, "down": 140},  # knee angle
+    "bicep_curl": {"up": 150, "down": 100},  # elbow angle, extended and contracted
+}
 
-    if angle > up_knee_angle:
-        current_stage = "up"
 
-    if angle < down_knee_angle:
-        current_stage = "down"
+def get_rep_angles(keypoints, exercise_profile, system_config, view_direction):
+    """
+    Angles of the rep counting joint of the exercise.
 
-    if stage == 'down' and current_stage == "up":
-        new_rep = True
+    Args:
+        keypoints (np.ndarray): Keypoints of shape (K, 2) of one frame or (T, K, 2) of T frames,
+            from extract_keypoints.
+        exercise_profile (ExerciseProfile): Profile with the angle keypoint positions.
+        system_config (dict): System configuration with resize_width and resize_height.
+        view_direction (str): Side view direction the keypoints were extracted for.
 
-    return new_rep, current_stage, angle
+    Returns:
+        np.ndarray: Angles of shape (T,), (1,) for a single frame.
+    """
+    keypoints = np.asarray(keypoints, dtype=np.float64)
+    angle_points = keypoints[..., exercise_profile.angle_keypoint_positions[view_direction], :]
+    return calculate_angles(angle_points.reshape(-1, 3, 2),
+                            system_config["resize_width"], system_config["resize_height"])
 
 
-def count_reps_bicep_curl(current_stage, stage, keypoints, workout_config, system_config, view_direction):
-    angle_keypoints = list(preprocess_keypoints(keypoints, workout_config["keypoints"][view_direction],
-                                                workout_config["angle_keypoints"][view_direction]).values())
-    angle = calculate_angle(angle_keypoints[0], angle_keypoints[1], angle_keypoints[2],
-                            system_config["resize_width"], system_config["resize_height"])
-    new_rep = False
-    contracted_angle = 100
-    extended_angle = 150
+def update_rep_stage(angle, thresholds, current_stage, stage):
+    """
+    Update the stage of one frame from its joint angle.
 
-    if angle > extended_angle:
+    Returns:
+        tuple: Whether a rep ended, and the new current stage.
+    """
+    if angle > thresholds["up"]:
         current_stage = "up"
 
-    if angle < contracted_angle:
+    if angle < thresholds["down"]:
         current_stage = "down"
 
-    if stage == 'down' and current_stage == "up":
-        new_rep = True
+    new_rep = stage == "down" and current_stage == "up"
+    return new_rep, current_stage
+
+
+def count_reps_squat(current_stage, stage, keypoints, exercise_profile, system_config, view_direction):
+    angle = get_rep_angles(keypoints, exercise_profile, system_config, view_direction)[0]
+    new_rep, current_stage = update_rep_stage(angle, rep_count_thresholds["squat"], current_stage, stage)
+    return new_rep, current_stage, angle
+
 
+def count_reps_bicep_curl(current_stage, stage, keypoints, exercise_profile, system_config, view_direction):
+    angle = get_rep_angles(keypoints, exercise_profile, system_config, view_direction)[0]
+    new_rep, current_stage = update_rep_stage(angle, rep_count_thresholds["bicep_curl"], current_stage, stage)
     return new_rep, current_stage, angle
 
 
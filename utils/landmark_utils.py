@@ -0,0 +1,72 @@
+import cv2
+import mediapipe as mp
+import numpy as np
+
+LANDMARK_COUNT = 33
+# Landmarks less visible than this are not drawn, like mp.solutions.drawing_utils
+VISIBILITY_THRESHOLD = 0.5
+POSE_CONNECTIONS = sorted(mp.solutions.pose.POSE_CONNECTIONS)
+
+# Drawing styles of mp.solutions.drawing_utils.draw_landmarks
+LANDMARK_COLOR = (0, 0, 255)
+CONNECTION_COLOR = (224, 224, 224)
+LINE_THICKNESS = 2
+CIRCLE_RADIUS = 2
+
+
+def landmarks_to_array(pose_landmarks):
+    """
+    Convert MediaPipe pose landmarks to an array. Done once per frame, every consumer then reads the array
+    instead of the protobuf message.
+
+    Args:
+        pose_landmarks (mediapipe.framework.formats.landmark_pb2.NormalizedLandmarkList): Detected pose landmarks.
+
+    Returns:
+        np.ndarray: Float32 array of shape (33, 4) with the x, y, z and visibility of every landmark.
+    """
+    return np.array([(landmark.x, landmark.y, landmark.z, landmark.visibility)
+                     for landmark in pose_landmarks.landmark], dtype=np.float32)
+
+
+def to_pixel_coordinates(landmarks, width, height):
+    """
+    Pixel-space view of the landmark positions.
+
+    Args:
+        landmarks (np.ndarray): Landmark array of shape (33, 4) from landmarks_to_array.
+        width (int): Width of the frame in pixels.
+        height (int): Height of the frame in pixels.
+
+    Returns:
+        np.ndarray: Float64 array of shape (33, 2) with x * width and y * height.
+    """
+    return landmarks[:, :2] * np.array([width, height], dtype=np.float64)
+
+
+def draw_landmarks(frame, landmarks, landmark_pixels):
+    """
+    Draw the pose landmarks and their connections on the frame, in the style of
+    mp.solutions.drawing_utils.draw_landmarks.
+
+    Args:
+        frame (np.ndarray): BGR frame the landmark pixels were computed for.
+        landmarks (np.ndarray): Landmark array of shape (33, 4) from landmarks_to_array.
+        landmark_pixels (np.ndarray): Pixel coordinates of shape (33, 2) from to_pixel_coordinates.
+    """
+    height, width = frame.shape[:2]
+    visible = ((landmarks[:, 3] >= VISIBILITY_THRESHOLD)
+               & np.all((landmarks[:, :2] >= 0) & (landmarks[:, :2] <= 1), axis=1))
+    points = [tuple(point) for point in
+              np.minimum(np.floor(landmark_pixels), [width - 1, height - 1]).astype(int).tolist()]
+    visible = visible.tolist()
+
+    for start, end in POSE_CONNECTIONS:
+        if visible[start] and visible[end]:
+            cv2.line(frame, points[start], points[end], CONNECTION_COLOR, LINE_THICKNESS)
+
+    border_radius = max(CIRCLE_RADIUS + 1, int(CIRCLE_RADIUS * 1.2))
+    for index, point in enumerate(points):
+        if visible[index]:
+            cv2.circle(frame, point, border_radius, CONNECTION_COLOR, LINE_THICKNESS)
+            cv2.circle(frame, point, CIRCLE_RADIUS, LANDMARK_COLOR, LINE_THICKNESS)
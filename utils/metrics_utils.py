@@ -0,0 +1,268 @@
+"""
+Counters, gauges and histograms of the running monitor, served in the Prometheus text exposition
+format on a local HTTP endpoint so a scraper on the same machine can track them under load.
+
+Metrics are always recorded; the endpoint only runs when "metrics" is enabled in the system
+configuration. Sessions of the same exercise share their labelled series.
+
+Usage:
+    curl http://127.0.0.1:9108/metrics
+"""
+import bisect
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Upper bounds in seconds, from a fast interpreter invoke to a slow text to speech render
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    return repr(float(value))
+
+
+def _format_labels(label_names, label_values, extra=()):
+    pairs = list(zip(label_names, label_values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Metric:
+    metric_type = None
+
+    def __init__(self, name, documentation, label_names=()):
+        """
+        Base of the metric types, one value per combination of label values.
+        :param name: Metric name, e.g. "posture_frames_processed_total".
+        :param documentation: HELP text of the metric.
+        :param label_names: Names of the labels every update passes as keyword arguments.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def _key(self, labels):
+        if len(labels) != len(self.label_names):
+            raise ValueError(f"{self.name} expects the labels {self.label_names}, got {tuple(labels)}.")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def collect(self):
+        """
+        Lines of the metric in the text exposition format.
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        with self.lock:
+            for label_values, value in sorted(self.values.items()):
+                lines.extend(self._sample_lines(label_values, value))
+        return lines
+
+    def _sample_lines(self, label_values, value):
+        return [f"{self.name}{_format_labels(self.label_names, label_values)} {_format_value(value)}"]
+
+
+class Counter(Metric):
+    metric_type = "counter"
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase.")
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    metric_type = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        """
+        Cumulative histogram with fixed buckets.
+        :param buckets: Sorted upper bounds of the buckets, the +Inf bucket is added.
+        """
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                # Counts per bucket including +Inf, then the sum of the observed values
+                state = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+
+    def _sample_lines(self, label_values, value):
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            labels = _format_labels(self.label_names, label_values, [("le", _format_value(bound))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.label_names, label_values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """
+        Named metrics of the process. Asking twice for the same name returns the same metric.
+        """
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _get_or_create(self, metric_class, name, *args, **kwargs):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = metric_class(name, *args, **kwargs)
+            elif not isinstance(metric, metric_class):
+                raise ValueError(f"Metric {name} is already registered as a {metric.metric_type}.")
+            return metric
+
+    def counter(self, name, documentation, label_names=()):
+        return self._get_or_create(Counter, name, documentation, label_names)
+
+    def gauge(self, name, documentation, label_names=()):
+        return self._get_or_create(Gauge, name, documentation, label_names)
+
+    def histogram(self, name, documentation, label_names=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, label_names, buckets)
+
+    def exposition(self):
+        """
+        All metrics in the Prometheus text exposition format.
+        """
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# Frame loop
+FRAMES_PROCESSED = REGISTRY.counter("posture_frames_processed_total", "Frames shown by the monitor.",
+                                    ("exercise",))
+MONITOR_FPS = REGISTRY.gauge("posture_monitor_fps", "Frames per second of the monitor over the last second.",
+                             ("exercise",))
+CAPTURE_DROPPED_FRAMES = REGISTRY.counter("posture_capture_dropped_frames_total",
+                                          "Camera frames replaced in the capture slot before being processed.")
+PIPELINE_QUEUE_DEPTH = REGISTRY.gauge("posture_pipeline_queue_depth",
+                                      "Packets waiting in front of a pipeline stage.", ("stage",))
+PIPELINE_DROPPED_PACKETS = REGISTRY.counter("posture_pipeline_dropped_packets_total",
+                                            "Packets dropped by the backpressure policy of a pipeline stage.",
+                                            ("stage",))
+
+# Posture classification
+INFERENCE_SECONDS = REGISTRY.histogram("posture_inference_seconds",
+                                       "Time to classify one keypoint window on the frame loop (inline) "
+                                       "or on the inference thread (background).", ("mode",))
+BATCH_INFERENCE_SECONDS = REGISTRY.histogram("posture_batch_inference_seconds",
+                                             "Time to classify one batch of the inference server.", ("exercise",))
+BATCH_INFERENCE_QUEUE_DEPTH = REGISTRY.gauge("posture_batch_inference_queue_depth",
+                                             "Windows waiting for the next batch.", ("exercise",))
+INTERPRETER_CHECKOUT_WAIT_SECONDS = REGISTRY.histogram("posture_interpreter_checkout_wait_seconds",
+                                                       "Time an inference waited for a free interpreter of the pool.",
+                                                       ("exercise",))
+
+# Model registry
+MODEL_BYTES = REGISTRY.gauge("posture_model_bytes", "Size of the model file shared by the interpreters.",
+                             ("exercise",))
+MODEL_LOAD_SECONDS = REGISTRY.gauge("posture_model_load_seconds", "Time to read the model file.", ("exercise",))
+INTERPRETER_CREATE_SECONDS = REGISTRY.gauge("posture_interpreter_create_seconds",
+                                            "Time to create and allocate the last interpreter.", ("exercise",))
+LIVE_INTERPRETERS = REGISTRY.gauge("posture_live_interpreters", "Interpreters still referenced by a session.",
+                                   ("exercise",))
+MODEL_ESTIMATED_MEMORY_BYTES = REGISTRY.gauge("posture_model_estimated_memory_bytes",
+                                              "Model bytes plus the tensors of every live interpreter.",
+                                              ("exercise",))
+
+# Video recording
+RECORDER_DROPPED_FRAMES = REGISTRY.counter("posture_recorder_dropped_frames_total",
+                                           "Frames dropped because the queue of a recording was full.",
+                                           ("recorder",))
+RECORDER_QUEUE_DEPTH = REGISTRY.gauge("posture_recorder_queue_depth",
+                                      "Frames waiting to be written by the last recording that got a frame.",
+                                      ("recorder",))
+ACTIVE_RECORDINGS = REGISTRY.gauge("posture_active_recordings", "Recordings in progress.", ("recorder",))
+
+# Text to speech
+SPEECH_RENDER_SECONDS = REGISTRY.histogram("posture_speech_render_seconds", "Time to render one phrase to audio.")
+SPEECH_QUEUE_DEPTH = REGISTRY.gauge("posture_speech_queue_depth", "Phrases waiting to be rendered.")
+SPEECH_CACHE_REQUESTS = REGISTRY.counter("posture_speech_cache_requests_total",
+                                         "Phrase requests by whether the audio was cached.", ("result",))
+
+# Workout records
+RECORD_WRITE_SECONDS = REGISTRY.histogram("posture_record_write_seconds",
+                                          "Time to write the workout data file of an exercise.", ("operation",))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.exposition().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood the console
+        pass
+
+
+def start_metrics_server(host="127.0.0.1", port=9108, registry=REGISTRY):
+    """
+    Serve the registry on http://host:port/metrics from a background thread.
+
+    Args:
+        host (str): Interface to listen on, the loopback interface keeps the endpoint local.
+        port (int): TCP port, 0 picks a free one.
+        registry (MetricsRegistry): Metrics to serve.
+
+    Returns:
+        ThreadingHTTPServer: The running server; server_address holds the bound port, shutdown() stops it.
+    """
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Serving metrics on http://{server.server_address[0]}:{server.server_address[1]}/metrics")
+    return server
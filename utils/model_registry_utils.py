@@ -0,0 +1,145 @@
+import threading
+import time
+import weakref
+
+import numpy as np
+
+from . import inference_backend_utils, interpreter_pool_utils, metrics_utils
+
+
+class ModelRegistry:
+    def __init__(self, workout_configurations, backend_name="auto", pool_size=2):
+        """
+        Process-wide registry of the posture classification models, shared by all sessions.
+        A model file is read once, on the first request for its exercise, and its interpreters are
+        built from the shared bytes. Sessions borrow interpreters from a bounded pool per model,
+        because a TFLite interpreter must not be invoked from two threads at once.
+        :param workout_configurations: Workout configurations with the model path and interpreter options.
+        :param backend_name: Inference backend passed to inference_backend_utils.get_backend.
+        :param pool_size: Maximum number of interpreters per model in the pool of get_pool.
+        """
+        self.workout_configurations = workout_configurations
+        self.backend_name = backend_name
+        self.pool_size = pool_size
+        self.pools = {}  # exercise -> InterpreterPool
+        self.model_contents = {}  # exercise -> model bytes
+        self.live_interpreters = {}  # exercise -> interpreters still referenced by a session
+        self.stats = {}  # exercise -> load statistics
+        self.lock = threading.Lock()
+
+    def get(self, exercise):
+        """
+        Create a new interpreter, loading the model of the exercise on first use.
+        :param exercise: Exercise key of the workout configurations, e.g. "squat".
+        :return: (interpreter, input_details, output_details)
+        """
+        model_content = self._load_model_content(exercise)
+        interpreter_options = self.workout_configurations[exercise].get("interpreter_options") or {}
+        backend = inference_backend_utils.get_backend(self.backend_name)
+
+        create_start = time.perf_counter()
+        interpreter = backend.create_interpreter(model_content=model_content,
+                                                 num_threads=interpreter_options.get("num_threads"),
+                                                 delegate=interpreter_options.get("delegate", "xnnpack"))
+        interpreter.allocate_tensors()
+        input_details = interpreter.get_input_details()
+        output_details = interpreter.get_output_details()
+        create_time_ms = (time.perf_counter() - create_start) * 1000
+
+        first_invoke_ms = None
+        if interpreter_options.get("warmup", True):
+            first_invoke_ms = inference_backend_utils.warm_up_interpreter(interpreter, input_details) * 1000
+
+        with self.lock:
+            stats = self.stats[exercise]
+            stats["backend"] = backend.name
+            stats["interpreters_created"] += 1
+            stats["last_create_time_ms"] = create_time_ms
+            stats["last_first_invoke_ms"] = first_invoke_ms
+            if stats["tensor_bytes"] is None:
+                stats["tensor_bytes"] = get_tensor_bytes(interpreter)
+            self.live_interpreters[exercise].add(interpreter)
+            interpreter_number = stats["interpreters_created"]
+            self._update_gauges(exercise)
+        print(f"Created {exercise} interpreter #{interpreter_number} in {create_time_ms:.1f} ms"
+              + (f", warm-up invoke took {first_invoke_ms:.1f} ms" if first_invoke_ms is not None else ""))
+        return interpreter, input_details, output_details
+
+    def get_pool(self, exercise):
+        """
+        Shared interpreter pool of an exercise's model, created on first use.
+        :param exercise: Exercise key of the workout configurations, e.g. "squat".
+        :return: InterpreterPool whose interpreters are created with get.
+        """
+        with self.lock:
+            if exercise not in self.pools:
+                self.pools[exercise] = interpreter_pool_utils.InterpreterPool(lambda: self.get(exercise),
+                                                                              self.pool_size, exercise)
+            return self.pools[exercise]
+
+    def get_stats(self):
+        """
+        Snapshot of the load and memory statistics of every loaded model. Also refreshes the model gauges,
+        whose live interpreter count drops when sessions release their interpreters.
+        :return: Dictionary of exercise -> statistics, with the estimated memory of the model bytes
+                 plus the tensors of every interpreter still in use.
+        """
+        with self.lock:
+            snapshot = {}
+            for exercise, stats in self.stats.items():
+                snapshot[exercise] = self._update_gauges(exercise)
+                if exercise in self.pools:
+                    snapshot[exercise]["pool"] = self.pools[exercise].get_stats()
+            return snapshot
+
+    def _update_gauges(self, exercise):
+        """
+        Statistics of one model with its live interpreters and estimated memory, published as gauges.
+        Called with the lock held.
+        """
+        stats = self.stats[exercise]
+        live_interpreters = len(self.live_interpreters[exercise])
+        stats = dict(stats, live_interpreters=live_interpreters,
+                     estimated_memory_bytes=stats["model_bytes"] + live_interpreters * (stats["tensor_bytes"] or 0))
+        metrics_utils.MODEL_BYTES.set(stats["model_bytes"], exercise=exercise)
+        metrics_utils.MODEL_LOAD_SECONDS.set(stats["file_load_time_ms"] / 1000, exercise=exercise)
+        if stats["last_create_time_ms"] is not None:
+            metrics_utils.INTERPRETER_CREATE_SECONDS.set(stats["last_create_time_ms"] / 1000, exercise=exercise)
+        metrics_utils.LIVE_INTERPRETERS.set(live_interpreters, exercise=exercise)
+        metrics_utils.MODEL_ESTIMATED_MEMORY_BYTES.set(stats["estimated_memory_bytes"], exercise=exercise)
+        return stats
+
+    def _load_model_content(self, exercise):
+        """
+        Read the model file of an exercise once and keep its bytes.
+        """
+        with self.lock:
+            if exercise not in self.model_contents:
+                model_path = self.workout_configurations[exercise]["model_path"]
+                load_start = time.perf_counter()
+                with open(model_path, "rb") as model_file:
+                    self.model_contents[exercise] = model_file.read()
+                self.live_interpreters[exercise] = weakref.WeakSet()
+                self.stats[exercise] = {
+                    "model_path": model_path,
+                    "model_bytes": len(self.model_contents[exercise]),
+                    "file_load_time_ms": (time.perf_counter() - load_start) * 1000,
+                    "backend": None,
+                    "interpreters_created": 0,
+                    "last_create_time_ms": None,
+                    "last_first_invoke_ms": None,
+                    "tensor_bytes": None,
+                }
+                self._update_gauges(exercise)
+                print(f"Loaded {model_path} ({len(self.model_contents[exercise]) / 1024:.0f} KiB)")
+            return self.model_contents[exercise]
+
+
+def get_tensor_bytes(interpreter):
+    """
+    Approximate memory used by the tensors of an interpreter.
+    """
+    total_bytes = 0
+    for tensor in interpreter.get_tensor_details():
+        total_bytes += int(np.prod(tensor["shape"])) * np.dtype(tensor["dtype"]).itemsize
+    return total_bytes
@@ -1,36 +1,46 @@
-import tensorflow as tf
 import numpy as np
 import streamlit as st
 import mediapipe as mp
 import pyttsx3
+from . import batch_inference_utils, feedback_utils, metrics_utils, model_registry_utils, speech_utils
 @st.cache_resource
 def load_mp_model():
     return mp.solutions.pose
 
-def load_pyttsx3_engine():
+def load_pyttsx3_engine(rate=180):
     engine = pyttsx3.init()
-    engine.setProperty('rate', 180)
+    engine.setProperty('rate', rate)
     return engine
 
-def load_all_models(workout_configurations):
-    models = {}
-    for workout, config in workout_configurations.items():
-        models[workout] = load_tflite_model(config["model_path"])
-    return models
 @st.cache_resource
-def load_tflite_model(model_path):
-    interpreter = tf.lite.Interpreter(model_path=model_path)
-    interpreter.allocate_tensors()
-    input_details = interpreter.get_input_details()
-    output_details = interpreter.get_output_details()
-    return interpreter, input_details, output_details
+def load_speech_worker(audio_temp_dir, rate=180, cache_size=512, _workout_configurations=None, _prerender_rep_count=30):
+    speech_worker = speech_utils.SpeechWorker(audio_temp_dir, rate, cache_size).start()
+    # Queued once with the worker, not on every script rerun
+    if _workout_configurations is not None:
+        speech_worker.prerender(feedback_utils.list_feedback_phrases(_workout_configurations, _prerender_rep_count))
+    return speech_worker
 
-def predict_posture(sequence, interpreter, input_details, output_details, sequence_length):
+@st.cache_resource
+def load_model_registry(workout_configurations, backend_name="auto", pool_size=2):
+    return model_registry_utils.ModelRegistry(workout_configurations, backend_name, pool_size)
+
+@st.cache_resource
+def load_batch_inference_server(_model_registry, exercise, sequence_length, max_batch_size=8, max_wait_ms=3.0):
+    return batch_inference_utils.BatchInferenceServer(_model_registry, exercise, sequence_length,
+                                                      max_batch_size, max_wait_ms).start()
+
+@st.cache_resource
+def load_metrics_server(host="127.0.0.1", port=9108):
+    return metrics_utils.start_metrics_server(host, port)
+
+def predict_posture(sequence, interpreter_pool, sequence_length):
     if len(sequence) == sequence_length:
-        sequence_array = np.array(sequence).reshape(1, sequence_length, -1).astype(np.float32)
-        interpreter.set_tensor(input_details[0]['index'], sequence_array)
-        interpreter.invoke()
-        output_data = interpreter.get_tensor(output_details[0]['index'])
+        # No copy when the sequence is already a contiguous float32 array
+        sequence_array = np.asarray(sequence, dtype=np.float32).reshape(1, sequence_length, -1)
+        with interpreter_pool.checkout() as (interpreter, input_details, output_details):
+            interpreter.set_tensor(input_details[0]['index'], sequence_array)
+            interpreter.invoke()
+            output_data = interpreter.get_tensor(output_details[0]['index'])
         posture_class = np.argmax(output_data)
         confidence = np.max(output_data)
         return posture_class, confidence
@@ -0,0 +1,274 @@
+"""
+Headless posture analysis of recorded workout videos.
+
+Runs the monitoring pipeline of PostureMonitor (pose, keypoints, classification, rep counting and
+rep analysis) over a video file as fast as it decodes, without display, audio or real-time pacing.
+Time is taken from the frame index and the frame rate of the file.
+
+Usage:
+    python -m utils.offline_analysis_utils exercise/squat/video/set --save
+"""
+import argparse
+import glob
+import os
+import re
+import time
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from config import workout_configurations, system_configuration
+from . import (exercise_profile_utils,
+               frame_source_utils,
+               landmark_utils,
+               model_registry_utils,
+               model_utils,
+               posture_analysis_utils,
+               workout_record_utils)
+
+# Frames decoded and posed before their keypoints are normalized together
+BLOCK_SIZE = 64
+
+# Set videos are named "<exercise_id>_set_<set number>.mp4" by VideoRecorder
+SET_VIDEO_NAME_PATTERN = re.compile(r"^(?P<exercise_id>[A-Z_]+-\d{8}-\d{6})_set_(?P<set_number>\d+)$")
+
+
+class OfflinePostureAnalyzer:
+    def __init__(self, exercise, interpreter_pool, fps, system_config=system_configuration,
+                 workout_config=None, exercise_profile=None):
+        """
+        Workout state machine of PostureMonitor driven by recorded frames, on the same
+        posture_analysis_utils.PostureAnalysis. Time is the video time of the frames.
+        The set starts once the body position has been correct for READY_DURATION seconds. Leaving the
+        bounding box pauses the set like in the monitor, and the set resumes after the next ready phase.
+        Every frame with a complete window is classified, so results do not depend on CPU speed.
+        :param exercise: Exercise key of the workout configurations, e.g. "squat".
+        :param interpreter_pool: InterpreterPool of the exercise model.
+        :param fps: Frame rate of the video, used as the capture frame rate of every frame.
+        :param system_config: System configuration.
+        :param workout_config: Workout configuration of the exercise, defaults to the one in config.py.
+        :param exercise_profile: ExerciseProfile of the exercise, compiled if not given.
+        """
+        self.exercise = exercise
+        self.interpreter_pool = interpreter_pool
+        self.fps = fps
+        self.workout_config = workout_config or workout_configurations[exercise]
+        exercise_profile = exercise_profile or exercise_profile_utils.compile_exercise_profile(
+            exercise, self.workout_config, system_config)
+        # The frame rate of the file is the highest expected rate
+        self.analysis = posture_analysis_utils.PostureAnalysis(system_config, self.workout_config, exercise_profile,
+                                                               exercise, max(fps, system_config["target_fps"]))
+
+        self.workout_state = "ready"
+        self.workout_time = 0.0
+        self.rep = 1
+
+    def process_frame(self, landmarks, timestamp):
+        """
+        Advance the state machine by one frame.
+        :param landmarks: Landmark array from landmark_utils.landmarks_to_array, None if no pose was detected.
+        :param timestamp: Time of the frame in the video in seconds.
+        """
+        self.process_block([landmarks], [timestamp])
+
+    def process_block(self, landmarks_block, timestamps):
+        """
+        Advance the state machine by a block of frames. The keypoints of the block are normalized together
+        in every view direction, and each frame takes those of the direction it is analysed in.
+        :param landmarks_block: Landmark array of every frame, None for frames without a detected pose.
+        :param timestamps: Time of every frame in the video in seconds.
+        """
+        detected_landmarks = [landmarks for landmarks in landmarks_block if landmarks is not None]
+        keypoints_block = {}
+        if detected_landmarks:
+            keypoints_block = self.analysis.normalize_keypoints_block(np.stack(detected_landmarks))
+
+        detected_index = 0
+        for landmarks, timestamp in zip(landmarks_block, timestamps):
+            if self.workout_state == "start":
+                self.workout_time += 1 / self.fps
+            if landmarks is None:
+                continue
+
+            self.analysis.append_block_keypoints(keypoints_block, detected_index, timestamp)
+            detected_index += 1
+            self.analysis.resample_window(self.fps)
+            if self.workout_state == "ready":
+                _, _, correct_body_position = self.analysis.verify_ready(landmarks)
+                _, start_set = self.analysis.update_ready_time(correct_body_position, timestamp)
+                if start_set:
+                    self.workout_state = "start"
+            else:
+                self.handle_start_state(landmarks)
+
+    def handle_start_state(self, landmarks):
+        """Classify postures, count reps and analyse every completed rep."""
+        verification, rep_count = self.analysis.verify_start(landmarks)
+        if not verification.is_in_bounding_box:
+            # Pause the set, it resumes after the next ready phase
+            self.analysis.pause()
+            self.workout_state = "ready"
+            return
+
+        if rep_count:
+            self.classify_posture()
+        if self.analysis.count_reps(rep_count, self.fps):
+            self.rep += 1
+            self.analysis.close_rep(self.rep)
+
+    def classify_posture(self):
+        """Classify the current window and add the result to the rep detections."""
+        if len(self.analysis.interpolate_sequence) != self.workout_config["sequence_length"]:
+            return
+        posture_class, _ = model_utils.predict_posture(self.analysis.interpolate_sequence, self.interpreter_pool,
+                                                       self.workout_config["sequence_length"])
+        self.analysis.rep_detections.append(posture_class)
+
+    def get_set_record(self, exercise_id, set_number):
+        """
+        Record of the analysed set, in the format of workout_record_utils.save_workout_set_record.
+        """
+        seconds = int(self.workout_time)
+        workout_time = f"{seconds // 60:02}:{seconds % 60:02}"
+        return workout_record_utils.build_workout_set_record(exercise_id, set_number, self.analysis.reps_results,
+                                                             workout_time, self.analysis.mistake_counts)
+
+
+def parse_set_video_name(path):
+    """
+    Exercise ID and set number of a set video recorded by VideoRecorder.
+
+    Returns:
+        tuple: (exercise_id, set_number), or (None, None) if the file name does not match.
+    """
+    match = SET_VIDEO_NAME_PATTERN.match(os.path.splitext(os.path.basename(path))[0])
+    if match is None:
+        return None, None
+    return match["exercise_id"], int(match["set_number"])
+
+
+def analyze_video(path, exercise, interpreter_pool=None, pose=None, save=False, preprocess=False,
+                  system_config=system_configuration, return_stats=False):
+    """
+    Run the posture pipeline over a recorded video and build its workout set record.
+
+    Args:
+        path (str): Video file, e.g. a set video under exercise/<exercise>/video/set.
+        exercise (str): Exercise key of the workout configurations, e.g. "squat".
+        interpreter_pool (InterpreterPool): Pool of the exercise model, a single interpreter is
+            loaded if not given.
+        pose (mediapipe.solutions.pose.Pose): Pose model to reuse, a new one is created and closed if not given.
+        save (bool): If True, append the record to the workout data file like save_workout_set_record.
+        preprocess (bool): If True, the video holds raw camera frames that are rotated, resized and
+            mirrored like in the monitor. Recorded set videos are already preprocessed.
+        system_config (dict): System configuration.
+        return_stats (bool): If True, also return the throughput of the analysis.
+
+    Returns:
+        dict: Workout set record of the video, or (record, stats) if return_stats is True, where stats
+        holds the decoded frames, the video duration and the processing time in seconds and the
+        processed frames per second.
+    """
+    workout_config = workout_configurations[exercise]
+    if interpreter_pool is None:
+        model_registry = model_registry_utils.ModelRegistry(
+            {exercise: workout_config}, system_config["inference_backend"], pool_size=1)
+        interpreter_pool = model_registry.get_pool(exercise)
+
+    exercise_id, set_number = parse_set_video_name(path)
+    if exercise_id is None:
+        exercise_id, set_number = workout_record_utils.generate_exercise_id(exercise), 1
+
+    video_source = frame_source_utils.VideoFileSource(path, pace="fast")
+    fps = video_source.fps
+    analyzer = OfflinePostureAnalyzer(exercise, interpreter_pool, fps, system_config, workout_config)
+    resize_size = (system_config["resize_width"], system_config["resize_height"])
+
+    owns_pose = pose is None
+    if owns_pose:
+        pose = mp.solutions.pose.Pose(min_tracking_confidence=0.8)
+    frame_index = 0
+    landmarks_block, timestamps = [], []
+    start_time = time.perf_counter()
+    try:
+        while True:
+            ret, frame, _ = video_source.read()
+            if ret:
+                frame = frame_source_utils.preprocess_frame(frame, resize_size, camera_frame=preprocess)
+
+                image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                image.flags.writeable = False
+                results = pose.process(image)
+                landmarks = None
+                if results.pose_landmarks:
+                    landmarks = landmark_utils.landmarks_to_array(results.pose_landmarks)
+                landmarks_block.append(landmarks)
+                timestamps.append(frame_index / fps)
+                frame_index += 1
+
+            if landmarks_block and (len(landmarks_block) == BLOCK_SIZE or not ret):
+                analyzer.process_block(landmarks_block, timestamps)
+                landmarks_block, timestamps = [], []
+            if not ret:
+                break
+    finally:
+        video_source.release()
+        if owns_pose:
+            pose.close()
+
+    elapsed_time = time.perf_counter() - start_time
+    processing_fps = frame_index / elapsed_time if elapsed_time > 0 else 0.0
+    print(f"Analysed {path}: {frame_index} frames in {elapsed_time:.1f} s "
+          f"({processing_fps:.1f} fps), {len(analyzer.analysis.reps_results)} reps.")
+
+    workout_set = analyzer.get_set_record(exercise_id, set_number)
+    if save:
+        workout_record_utils.store_workout_set_record(workout_set, workout_config)
+    if return_stats:
+        return workout_set, {"frames": frame_index, "video_seconds": frame_index / fps,
+                             "processing_seconds": elapsed_time, "processing_fps": processing_fps}
+    return workout_set
+
+
+def find_videos(paths):
+    """
+    Expand directories to the MP4 files they contain.
+    """
+    videos = []
+    for path in paths:
+        if os.path.isdir(path):
+            videos.extend(sorted(glob.glob(os.path.join(path, "*.mp4"))))
+        else:
+            videos.append(path)
+    return videos
+
+
+def exercise_of_video(path):
+    """
+    Exercise key of a set video from the exercise ID in its file name, None if unknown.
+    """
+    exercise_id, _ = parse_set_video_name(path)
+    if exercise_id is None:
+        return None
+    exercise = exercise_id.split("-")[0].lower()
+    return exercise if exercise in workout_configurations else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyse recorded workout videos without the web interface.")
+    parser.add_argument("paths", nargs="+", help="Video files or directories of MP4 files")
+    parser.add_argument("--exercise", choices=list(workout_configurations),
+                        help="Exercise of the videos, taken from the set video names if not given")
+    parser.add_argument("--save", action="store_true", help="Append the records to the workout data files")
+    parser.add_argument("--preprocess", action="store_true",
+                        help="The videos hold raw camera frames that are rotated, resized and mirrored first")
+    args = parser.parse_args()
+
+    for video_path in find_videos(args.paths):
+        video_exercise = args.exercise or exercise_of_video(video_path)
+        if video_exercise is None:
+            print(f"Skipping {video_path}: unknown exercise, pass --exercise.")
+            continue
+        record = analyze_video(video_path, video_exercise, save=args.save, preprocess=args.preprocess)
+        print(f"  {record['exercise_id']} set {record['set_number']}: {record['mistake_counts']}")
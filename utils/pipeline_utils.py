@@ -0,0 +1,187 @@
+import threading
+from queue import Queue, Empty, Full
+
+from . import metrics_utils
+
+BACKPRESSURE_POLICIES = ("block", "drop_oldest", "drop_newest")
+
+# Marks the end of the stream; it is never dropped by a backpressure policy
+_END_OF_STREAM = object()
+
+
+class StageQueue:
+    def __init__(self, name, maxsize, policy):
+        """
+        Bounded queue in front of a pipeline stage.
+        :param name: Name of the stage reading from this queue.
+        :param maxsize: Maximum number of packets waiting in the queue.
+        :param policy: What to do when the queue is full: "block", "drop_oldest" or "drop_newest".
+        """
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unknown backpressure policy '{policy}' for stage '{name}'.")
+        self.name = name
+        self.policy = policy
+        self.queue = Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def put(self, packet, is_running):
+        """
+        Add a packet following the backpressure policy.
+        :param packet: The packet to add.
+        :param is_running: Callable returning False once the pipeline is stopping.
+        :return: True if the packet was queued.
+        """
+        if self.policy == "block" or packet is _END_OF_STREAM:
+            while is_running():
+                try:
+                    self.queue.put(packet, timeout=0.1)
+                    metrics_utils.PIPELINE_QUEUE_DEPTH.set(self.queue.qsize(), stage=self.name)
+                    return True
+                except Full:
+                    continue
+            return False
+
+        while True:
+            try:
+                self.queue.put_nowait(packet)
+                metrics_utils.PIPELINE_QUEUE_DEPTH.set(self.queue.qsize(), stage=self.name)
+                return True
+            except Full:
+                if self.policy == "drop_newest":
+                    self.dropped += 1
+                    metrics_utils.PIPELINE_DROPPED_PACKETS.inc(stage=self.name)
+                    return False
+            try:
+                dropped_packet = self.queue.get_nowait()
+            except Empty:
+                continue
+            if dropped_packet is _END_OF_STREAM:
+                # Never drop the end marker, drop the new packet instead
+                self.queue.put(dropped_packet)
+                return False
+            self.dropped += 1
+            metrics_utils.PIPELINE_DROPPED_PACKETS.inc(stage=self.name)
+
+    def get(self, timeout=0.1):
+        packet = self.queue.get(timeout=timeout)
+        metrics_utils.PIPELINE_QUEUE_DEPTH.set(self.queue.qsize(), stage=self.name)
+        return packet
+
+    def qsize(self):
+        return self.queue.qsize()
+
+
+class FramePipeline:
+    def __init__(self, source, stages, queue_size=2, backpressure=None, thread_initializer=None):
+        """
+        Run each stage of the frame processing in its own worker thread, connected by bounded queues.
+        Every stage has a single worker, so packets leave the pipeline in the order they entered.
+        :param source: Callable returning the next packet, or None once the source is exhausted.
+        :param stages: List of (name, function) pairs. A function receives a packet and returns it
+                       (or None to drop the packet).
+        :param queue_size: Maximum number of packets waiting in front of each stage.
+        :param backpressure: Dict of stage name to backpressure policy, "output" for the result queue.
+                             Stages not listed block.
+        :param thread_initializer: Optional callable run on every worker thread before it starts.
+        """
+        backpressure = backpressure or {}
+        self.source = source
+        self.stages = stages
+        self.thread_initializer = thread_initializer
+        self.queues = [StageQueue(name, queue_size, backpressure.get(name, "block")) for name, _ in stages]
+        self.queues.append(StageQueue("output", queue_size, backpressure.get("output", "block")))
+        self.threads = []
+        self.is_running = False
+        self.error = None
+
+    def start(self):
+        """
+        Start the source and stage worker threads.
+        """
+        self.is_running = True
+        self.threads = [threading.Thread(target=self._read_source, daemon=True)]
+        for index, (name, function) in enumerate(self.stages):
+            self.threads.append(threading.Thread(target=self._run_stage, args=(index, function), daemon=True,
+                                                 name=f"pipeline-{name}"))
+        for thread in self.threads:
+            if self.thread_initializer is not None:
+                self.thread_initializer(thread)
+            thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop all worker threads. Packets still in the queues are discarded.
+        """
+        self.is_running = False
+        for thread in self.threads:
+            if thread is not threading.current_thread():
+                thread.join()
+        self.threads = []
+
+    def results(self):
+        """
+        Yield processed packets in order until the source is exhausted.
+        Re-raises any exception raised by a stage.
+        """
+        output_queue = self.queues[-1]
+        while True:
+            if self.error is not None:
+                raise self.error
+            try:
+                packet = output_queue.get()
+            except Empty:
+                if not self.is_running:
+                    return
+                continue
+            if packet is _END_OF_STREAM:
+                return
+            yield packet
+
+    def queue_depths(self):
+        """
+        Number of packets waiting in front of each stage.
+        """
+        return {stage_queue.name: stage_queue.qsize() for stage_queue in self.queues}
+
+    def dropped_packets(self):
+        """
+        Number of packets dropped by the backpressure policy of each stage.
+        """
+        return {stage_queue.name: stage_queue.dropped for stage_queue in self.queues}
+
+    def _running(self):
+        return self.is_running
+
+    def _read_source(self):
+        first_queue = self.queues[0]
+        try:
+            while self.is_running and self.error is None:
+                packet = self.source()
+                if packet is None:
+                    break
+                first_queue.put(packet, self._running)
+        except Exception as error:
+            self.error = error
+        first_queue.put(_END_OF_STREAM, self._running)
+
+    def _run_stage(self, index, function):
+        input_queue = self.queues[index]
+        output_queue = self.queues[index + 1]
+        while self.is_running:
+            try:
+                packet = input_queue.get()
+            except Empty:
+                continue
+            if packet is _END_OF_STREAM:
+                output_queue.put(packet, self._running)
+                return
+            if self.error is not None:
+                continue
+            try:
+                packet = function(packet)
+            except Exception as error:
+                self.error = error
+                continue
+            if packet is not None:
+                output_queue.put(packet, self._running)
@@ -0,0 +1,233 @@
+import math
+
+from . import (body_verification_utils,
+               feedback_utils,
+               interpolation_utils,
+               keypoint_buffer_utils,
+               keypoints_utils)
+
+# Seconds the body position must stay correct in the ready state before the set starts
+READY_DURATION = 3
+
+
+class PostureAnalysis:
+    def __init__(self, system_config, workout_config, exercise_profile, exercise, max_capture_fps):
+        """
+        Per-frame workout analysis shared by the live monitor and the offline analyzer: keypoint
+        extraction and resampling, body verification, the ready countdown, rep counting and rep analysis.
+        Callers bring the clock, classify the windows and handle display, audio and recording.
+        :param system_config: System configuration.
+        :param workout_config: Workout configuration of the exercise.
+        :param exercise_profile: ExerciseProfile of the exercise.
+        :param exercise: Exercise key of the workout configurations, e.g. "squat".
+        :param max_capture_fps: Highest expected frame rate, sizes the buffer of the "timestamp" resampling.
+        """
+        self.system_config = system_config
+        self.workout_config = workout_config
+        self.exercise_profile = exercise_profile
+        self.exercise = exercise
+        self.resampling_config = system_config["sequence_resampling"]
+
+        # frame interpolation
+        sequence_length = workout_config["sequence_length"]
+        if self.resampling_config["mode"] == "timestamp":
+            # Hold the whole resampling window at the highest expected frame rate
+            window_duration = (sequence_length - 1) / system_config["target_fps"]
+            sequence_capacity = math.ceil(window_duration * max_capture_fps) + 1
+        else:
+            sequence_capacity = sequence_length
+        self.sequence = keypoint_buffer_utils.KeypointRingBuffer(sequence_capacity,
+                                                                 workout_config["keypoints_num"] * 2)
+        self.interpolate_sequence = []
+        self.keypoints = None
+
+        # ready stage handling
+        self.view_direction = None
+        self.ready_since = None
+
+        # rep counting
+        self.current_stage = "none"
+        self.stage = "none"
+        self.feedback_delay = None
+
+        # feedback generation
+        self.rep_detections = []
+        self.rep_frames_fps = []
+        self.reps_results = []
+        self.mistake_counts = {key: 0 for key in workout_config["labels"]}
+
+    def append_keypoints(self, landmarks, timestamp):
+        """
+        Extract and normalize the keypoints of a frame in the view direction of the ready state and
+        add them to the sequence.
+        :param landmarks: Landmark array from landmark_utils.landmarks_to_array.
+        :param timestamp: Capture time of the frame in seconds.
+        """
+        if self.view_direction in self.exercise_profile.keypoint_indices:
+            self.keypoints = keypoints_utils.extract_keypoints(
+                landmarks, self.exercise_profile.keypoint_indices[self.view_direction])
+            keypoints_normalized = keypoints_utils.scale_and_rel_position_normalize_keypoints(
+                self.keypoints, flip_horizontally=self.view_direction == "right")
+            self.sequence.append(keypoints_normalized, timestamp)
+
+    def normalize_keypoints_block(self, landmarks_block):
+        """
+        Extract and normalize the keypoints of a block of frames in every view direction of the exercise,
+        with one normalize_keypoints_batch call per direction. For recorded frames, which are all known
+        before the view direction of each frame is.
+        :param landmarks_block: Landmark arrays of the frames, shape (T, 33, 4).
+        :return: Dict of view direction -> (keypoints of shape (T, K, 2), normalized keypoints of shape (T, K * 2)).
+        """
+        keypoints_block = {}
+        for view_direction, keypoint_indices in self.exercise_profile.keypoint_indices.items():
+            keypoints = keypoints_utils.extract_keypoints(landmarks_block, keypoint_indices)
+            keypoints_block[view_direction] = keypoints, keypoints_utils.normalize_keypoints_batch(
+                keypoints, flip_horizontally=view_direction == "right")
+        return keypoints_block
+
+    def append_block_keypoints(self, keypoints_block, index, timestamp):
+        """
+        Add frame `index` of a block from normalize_keypoints_block to the sequence, in the view direction
+        of the ready state. Same result as append_keypoints with the landmarks of the frame.
+        :param keypoints_block: Result of normalize_keypoints_block.
+        :param index: Frame of the block.
+        :param timestamp: Capture time of the frame in seconds.
+        """
+        if self.view_direction in keypoints_block:
+            keypoints, keypoints_normalized = keypoints_block[self.view_direction]
+            self.keypoints = keypoints[index]
+            self.sequence.append(keypoints_normalized[index], timestamp)
+
+    def resample_window(self, fps):
+        """
+        Resample the end of the sequence into the classification window.
+        :param fps: Frame rate the "fps" resampling rebuilds the window from, 0 while it is unknown.
+        """
+        if self.resampling_config["mode"] == "timestamp":
+            if len(self.sequence) >= 2:
+                interpolate_sequence = interpolation_utils.resample_keypoints_by_timestamp(
+                    self.sequence.last(len(self.sequence)), self.sequence.last_timestamps(len(self.sequence)),
+                    self.system_config["target_fps"], self.workout_config["sequence_length"],
+                    self.resampling_config["method"]
+                )
+                if interpolate_sequence is not None:
+                    self.interpolate_sequence = interpolate_sequence
+            return
+
+        if fps == 0:
+            return
+        sequence_needed = interpolation_utils.calculate_sequence_needed(fps, self.system_config["target_fps"],
+                                                                        self.workout_config["sequence_length"])
+        if len(self.sequence) >= sequence_needed:
+            self.interpolate_sequence = interpolation_utils.resample_keypoints_sequence(
+                self.sequence.last(sequence_needed), fps, self.system_config["target_fps"],
+                self.workout_config["sequence_length"], self.resampling_config["method"]
+            )
+
+    def verify_ready(self, landmarks):
+        """
+        Verify the body position of a frame in the ready state and take its view direction.
+
+        Returns:
+            tuple: (BodyVerification, body position feedback, whether the body position is correct).
+        """
+        verification = body_verification_utils.verify_body(landmarks, self.system_config, self.exercise_profile)
+        self.view_direction = verification.view_direction
+        body_position_feedback, correct_body_position = feedback_utils.generate_body_position_feedback(
+            *verification[:5])
+        return verification, body_position_feedback, correct_body_position
+
+    def update_ready_time(self, correct_body_position, now):
+        """
+        Track how long the body position has been correct.
+        :param correct_body_position: Result of verify_ready for the frame.
+        :param now: Current time in seconds, wall clock or video time.
+        :return: (seconds the position has been correct or None, whether the set starts). The countdown
+                 restarts after the set starts.
+        """
+        if not correct_body_position:
+            self.ready_since = None
+            return None, False
+        if self.ready_since is None:
+            self.ready_since = now
+        elapsed_time = now - self.ready_since
+        if elapsed_time >= READY_DURATION:
+            self.ready_since = None
+            return elapsed_time, True
+        return elapsed_time, False
+
+    def verify_start(self, landmarks):
+        """
+        Verify a frame of the running set against the side view direction of the ready state.
+
+        Returns:
+            tuple: (BodyVerification, whether the frame counts towards the reps).
+        """
+        verification = body_verification_utils.verify_body(landmarks, self.system_config, self.exercise_profile,
+                                                           side_view_direction=self.view_direction)
+        rep_count = getattr(verification, body_verification_utils.rep_count_verification_fields[self.exercise])
+        return verification, rep_count
+
+    def count_reps(self, rep_count, fps):
+        """
+        Update the rep stage of a frame inside the bounding box and count down the feedback delay of a
+        finished rep.
+        :param rep_count: Whether the frame counts towards the reps, from verify_start.
+        :param fps: Frame rate of the frame, averaged into the rep's feedback delay and mistake threshold.
+        :return: True when the rep is due to be closed with close_rep.
+        """
+        if not rep_count:
+            self.stage = "none"
+        self.rep_frames_fps.append(fps)
+
+        if rep_count:
+            new_rep, self.current_stage, _ = keypoints_utils.rep_counting_algorithms[self.exercise](
+                current_stage=self.current_stage,
+                stage=self.stage,
+                keypoints=self.keypoints,
+                exercise_profile=self.exercise_profile,
+                system_config=self.system_config,
+                view_direction=self.view_direction
+            )
+            if new_rep:
+                self.feedback_delay = keypoints_utils.new_rep_delay_algorithm[self.exercise](self.rep_frames_fps)
+
+        close_rep = False
+        if self.feedback_delay is not None:
+            if self.feedback_delay > 0:
+                self.feedback_delay -= 1
+            else:
+                close_rep = True
+                self.feedback_delay = None
+        self.stage = self.current_stage
+        return close_rep
+
+    def close_rep(self, rep):
+        """
+        Analyse the detections of the finished rep and start collecting the next one.
+        :param rep: Number of the rep that starts, one past the finished rep.
+        :return: (rep result, feedback text).
+        """
+        rep_result, self.reps_results, feedback, self.mistake_counts = feedback_utils.analyze_rep(
+            rep, self.reps_results, self.rep_detections, self.rep_frames_fps,
+            self.workout_config, self.mistake_counts, self.exercise_profile)
+        self.clear_rep_detections()
+        return rep_result, feedback
+
+    def clear_rep_detections(self):
+        """Start collecting detections for a new rep."""
+        self.rep_detections.clear()
+        self.rep_frames_fps.clear()
+
+    def pause(self):
+        """Drop the unfinished rep and the keypoint window, e.g. when the body leaves the bounding box."""
+        self.clear_rep_detections()
+        self.interpolate_sequence = []
+        self.sequence.clear()
+        self.stage = "none"
+        self.current_stage = "none"
+
+    def reset_set(self):
+        """Forget the results of the finished set."""
+        self.reps_results = []
+        self.mistake_counts = {key: 0 for key in self.workout_config["labels"]}
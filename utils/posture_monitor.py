@@ -1,33 +1,40 @@
 import cv2
 import time
 import mediapipe as mp
+from streamlit.runtime.scriptrunner import add_script_run_ctx
 from . import (timer_utils,
                user_interaction_utils,
-               body_verification_utils,
                visualization_utils,
                feedback_utils,
-               keypoints_utils,
-               interpolation_utils,
                model_utils,
                utils,
-               workout_record_utils)
+               workout_record_utils,
+               frame_capture_utils,
+               frame_source_utils,
+               pipeline_utils,
+               posture_analysis_utils,
+               landmark_utils,
+               inference_scheduler_utils,
+               inference_worker_utils,
+               metrics_utils,
+               profiling_utils)
 from components import components
 from .keypoints_utils import mp_pose
 
 
 class PostureMonitor:
-    def __init__(self, system_config, workout_config, exercise, exercise_id, engine, audio_temp_dir, placeholders,
-                 video_recorders,
+    def __init__(self, system_config, workout_config, exercise_profile, exercise, exercise_id, speech_worker,
+                 model_registry, placeholders, video_recorders,
                  session_state, frame_window):
 
         self.audio_duration = 3
         self.audio_last_played_time = 0
         self.system_config = system_config
         self.workout_config = workout_config
+        self.exercise_profile = exercise_profile
         self.exercise = exercise
         self.exercise_id = exercise_id
-        self.engine = engine
-        self.audio_temp_dir = audio_temp_dir
+        self.speech_worker = speech_worker
         self.placeholders = placeholders
         self.session_state = session_state
         self.video_recorders = video_recorders
@@ -37,120 +44,121 @@ class PostureMonitor:
         # fps calculation
         self.frame_count = 0
         self.current_fps = 0
+        self.frame_timestamp = None
+        self.fps_start_time = None
 
-        # frame interpolation
-        self.sequence = []
-        self.interpolate_sequence = []
+        # stage timing, shown on the diagnostics panel
+        self.stage_timer = profiling_utils.StageTimer(system_config["profiling"]["enabled"])
+
+        # recorder calls made while analysing a frame, replayed in order by the record stage
+        self.pending_recorder_calls = []
+
+        # keypoints, body verification, rep counting and rep analysis, shared with the offline analyzer
+        self.analysis = posture_analysis_utils.PostureAnalysis(
+            system_config, workout_config, exercise_profile, self.session_state.selected_exercise,
+            system_config["sequence_resampling"]["max_capture_fps"])
 
         # feedback generation
-        self.feedback_delay = None
-        self.rep_detections = []
-        self.rep_frames_fps = []
-        self.reps_results = []
-        self.mistake_counts = {key: 0 for key in workout_config["labels"]}
+        self.pending_audio = []
 
         # ready stage handling
         self.body_position_feedback_played = None
         self.feedback_played = False
-        self.correct_position = False
-        self.view_direction = None
         self.feedback = ""
 
-        # rep counting
-        self.current_stage = "none"
-        self.stage = "none"
-
         # inference model
-        self.interpreter, self.input_details, self.output_details = model_utils.load_tflite_model(
-            self.workout_config["model_path"])
+        scheduler_config = system_config["inference_scheduler"]
+        self.inference_scheduler = inference_scheduler_utils.InferenceScheduler(
+            stride=scheduler_config["stride"],
+            time_budget_ms=scheduler_config["time_budget_ms"],
+            policy=scheduler_config["policy"])
+        self.last_detection = None
+        self.last_detection_frame = 0
+        self.detection_frames = 0  # frames of the current rep that receive a detection
+        self.detections_since = float("-inf")  # results of windows ending before this time are stale
+        self.model_registry = model_registry
+        self.interpreter_pool = model_registry.get_pool(self.session_state.selected_exercise)
+        self.inference_server = None
+        if system_config["inference_server"]["enabled"]:
+            # Windows of all sessions are classified together in small batches
+            server_config = system_config["inference_server"]
+            self.inference_server = model_utils.load_batch_inference_server(
+                model_registry, self.session_state.selected_exercise, workout_config["sequence_length"],
+                server_config["max_batch_size"], server_config["max_wait_ms"])
+        self.inference_worker = None
+        if system_config["background_inference"]:
+            self.inference_worker = inference_worker_utils.InferenceWorker(
+                self.interpreter_pool, workout_config["sequence_length"], self.inference_server).start()
 
         # media pose
         self.pose = mp.solutions.pose.Pose(min_tracking_confidence=0.8)
-        self.mp_drawing = mp.solutions.drawing_utils
 
-        # in bounding box detection
-        self.keypoints = None
+    def close(self):
+        """Stop the inference thread and release the pose model of this monitor."""
+        if self.inference_worker is not None:
+            self.inference_worker.stop()
+            self.inference_worker = None
+        self.pose.close()
 
-    def handle_ready_state(self, frame, results):
+    def handle_ready_state(self, frame, landmarks):
         """Handle the 'ready' state by verifying body position and providing feedback."""
         # Body verification
         current_time = time.time()
-        verification = body_verification_utils.verify_body_position(
-            results.pose_landmarks, self.system_config, self.workout_config
-        )
-        correct_view, body_view, self.view_direction, is_straight_body_view, is_in_bounding_box = verification
+        with self.stage_timer.stage("ready.verification"):
+            verification, body_position_feedback, correct_body_position = self.analysis.verify_ready(landmarks)
 
         # Draw bounding box
-        visualization_utils.draw_bounding_box(frame, self.system_config["bounding_box"], is_in_bounding_box)
-
-        # Generate feedback
-        body_position_feedback, correct_body_position = feedback_utils.generate_body_position_feedback(
-            correct_view, body_view, self.view_direction, is_straight_body_view, is_in_bounding_box
-        )
-
-        # Update ready time and correct position flag
-        if correct_body_position:
-            if not self.correct_position:
-                self.session_state.ready_time = time.time()
-            self.correct_position = True
-        else:
-            self.correct_position = False
-            self.session_state.ready_time = None
+        with self.stage_timer.stage("ready.drawing"):
+            visualization_utils.draw_bounding_box(frame, self.system_config["bounding_box"],
+                                                  verification.is_in_bounding_box)
+
+        # Update the time the body position has been correct
+        elapsed_time, start_set = self.analysis.update_ready_time(correct_body_position, current_time)
 
         # Play feedback audio if not already played
         if current_time > self.audio_last_played_time + self.audio_duration and body_position_feedback != self.body_position_feedback_played:
-            duration = feedback_utils.text_to_audio_feedback(self.audio_temp_dir, body_position_feedback, self.engine)
+            with self.stage_timer.stage("ready.speech"):
+                duration = feedback_utils.speak(self.speech_worker, self.pending_audio, body_position_feedback)
             self.audio_last_played_time = current_time
             self.audio_duration = duration + 0.5
             self.body_position_feedback_played = body_position_feedback
 
         # Update system info UI
-        self.placeholders['system_info'].success(body_position_feedback)
+        with self.stage_timer.stage("ready.ui"):
+            self.placeholders['system_info'].success(body_position_feedback)
 
         # Draw progress and check if ready to start
-        if self.session_state.ready_time is not None:
-            elapsed_time = time.time() - self.session_state.ready_time
+        if elapsed_time is not None:
             visualization_utils.draw_progress(frame, self.system_config, elapsed_time)
-            if elapsed_time >= 3 and correct_body_position:
+            if start_set:
                 # Transition to 'start' state
-                self.session_state.ready_time = None
                 self.session_state.workout_state = "start"
                 self.placeholders['system_info'].success(f"Start monitoring {self.exercise}")
                 self.audio_last_played_time = 0
                 self.audio_duration = 0
                 self.body_position_feedback_played = "none"
-                feedback_utils.text_to_audio_feedback(
-                    self.audio_temp_dir,
-                    f"{self.exercise} monitoring started, Rep {self.session_state.rep}",
-                    self.engine
-                )
+                feedback_utils.speak(self.speech_worker, self.pending_audio,
+                                     f"{self.exercise} monitoring started", f"Rep {self.session_state.rep}")
                 self.timer.start()
 
-    def handle_start_state(self, frame, results):
+    def handle_start_state(self, frame, landmarks):
         """Handle the 'start' state by monitoring reps and providing feedback."""
         # Update workout time
         seconds = int(self.timer.get_time())
         formatted_time = self.timer.format_time(seconds)
         self.session_state.workout_time = formatted_time
-        components.text_container_with_label(self.placeholders["workout_time"], "Workout Time",
-                                             self.session_state.workout_time)
-
-        # Check if body is within bounding box
-        is_in_bounding_box = body_verification_utils.is_body_within_bounding_box(results.pose_landmarks,
-                                                                                 self.system_config)
-        if is_in_bounding_box:
+        with self.stage_timer.stage("start.ui"):
+            components.text_container_with_label(self.placeholders["workout_time"], "Workout Time",
+                                                 self.session_state.workout_time)
+
+        # Check if body is within bounding box and in the side view verified in the ready state
+        with self.stage_timer.stage("start.verification"):
+            verification, rep_count = self.analysis.verify_start(landmarks)
+        if verification.is_in_bounding_box:
             # Posture classification and feedback
-            rep_count = body_verification_utils.verify_rep_count_algorithms[self.session_state.selected_exercise](
-                pose_landmarks = results.pose_landmarks,
-                system_config = self.system_config,
-                side_view_direction = self.view_direction)
-            print(rep_count)
             if rep_count:
-                self.handle_posture_classification()
-
-            else:
-                self.stage="none"
-            self.rep_frames_fps.append(self.current_fps)
+                with self.stage_timer.stage("start.classification"):
+                    self.handle_posture_classification()
 
             # Update rep and set information on frame
             cv2.putText(frame, f'Set: {self.session_state.set}', (10, frame.shape[0] - 90),
@@ -159,126 +167,129 @@ class PostureMonitor:
                         cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1, cv2.LINE_AA)
 
             # Enqueue frames for recording
-            self.video_recorders["set_video_recorder"].enqueue_frame(frame.copy(), self.exercise_id,
-                                                                     set_num=self.session_state.set)
-            self.video_recorders["rep_video_recorder"].enqueue_frame(frame.copy(), self.exercise_id,
-                                                                     rep=self.session_state.rep,
-                                                                     set_num=self.session_state.set)
-            print(self.view_direction)
-            if rep_count:
+            with self.stage_timer.stage("start.frame_copies"):
+                self.recorder_call("set_video_recorder", "enqueue_frame", frame.copy(), self.exercise_id,
+                                   set_num=self.session_state.set)
+                # In "single" recording mode the rep clips are cut from the set video
+                if self.system_config["recording"]["mode"] == "dual":
+                    self.recorder_call("rep_video_recorder", "enqueue_frame", frame.copy(), self.exercise_id,
+                                       rep=self.session_state.rep,
+                                       set_num=self.session_state.set)
             # Count reps
+            with self.stage_timer.stage("start.rep_counting"):
+                close_rep = self.analysis.count_reps(rep_count, self.current_fps)
 
-                new_rep, self.current_stage, angle = keypoints_utils.rep_counting_algorithms[
-                    self.session_state.selected_exercise
-                ](
-                    current_stage=self.current_stage,
-                    stage=self.stage,
-                    keypoints=self.keypoints,
-                    workout_config=self.workout_config,
-                    system_config=self.system_config,
-                    view_direction=self.view_direction
-                )
-                print(angle)
-
-                if new_rep:
-                    self.feedback_delay = keypoints_utils.new_rep_delay_algorithm[self.session_state.selected_exercise](self.rep_frames_fps)
-
-            if self.feedback_delay is not None:
-                if self.feedback_delay > 0:
-                    self.feedback_delay -= 1
-                elif self.feedback_delay == 0:
+            if close_rep:
+                # Close the rep: analyse its detections, give feedback and cut the rep video
+                with self.stage_timer.stage("start.rep_analysis"):
                     self.session_state.rep+=1
+                    if self.inference_worker is not None:
+                        # Close the rep only after its outstanding inferences
+                        self.inference_worker.wait_idle()
+                        self.collect_inference_results(close_rep=True)
                     # Update rep count in UI
                     components.text_container_with_label(self.placeholders["rep"], "Rep", self.session_state.rep)
 
-                    rep_result, self.reps_results, feedback, self.mistake_counts = feedback_utils.analyze_rep(
-                        self.session_state.rep, self.reps_results, self.rep_detections, self.rep_frames_fps,
-                        self.workout_config,
-                        self.mistake_counts
-                    )
+                    rep_result, feedback = self.analysis.close_rep(self.session_state.rep)
 
-                    feedback_utils.text_to_audio_feedback(self.audio_temp_dir, f"Rep {self.session_state.rep}, {feedback}",
-                                                          self.engine)
-                    self.rep_detections.clear()
-                    self.rep_frames_fps.clear()
+                    feedback_utils.speak(self.speech_worker, self.pending_audio,
+                                         f"Rep {self.session_state.rep}", feedback)
+                    self.clear_rep_detections()
 
                     # Update mistake counts in UI
                     for label in self.workout_config["labels"]:
                         components.text_container_with_label(
                             self.placeholders["label"][label],
                             utils.remove_underscores_and_capitalize(label),
-                            self.mistake_counts[label]
+                            self.analysis.mistake_counts[label]
                         )
 
                     # Update feedback UI
                     components.feedback_container(self.placeholders["feedback"], feedback)
 
                     # Stop recording for the current rep
-                    self.video_recorders["rep_video_recorder"].stop_recording(self.exercise_id,
-                                                                              rep=self.session_state.rep - 1,
-                                                                              set_num=self.session_state.set)
+                    self.recorder_call("rep_video_recorder", "stop_recording", self.exercise_id,
+                                       rep=self.session_state.rep - 1,
+                                       set_num=self.session_state.set)
 
                     # Start recording for the new rep
-                    self.video_recorders["rep_video_recorder"].start_recording(self.exercise_id, rep=self.session_state.rep,
-                                                                               set_num=self.session_state.set)
-
-                    self.feedback_delay = None
-            self.stage = self.current_stage
+                    self.recorder_call("rep_video_recorder", "start_recording", self.exercise_id,
+                                       rep=self.session_state.rep,
+                                       set_num=self.session_state.set)
         else:
             # Pause workout if body is outside bounding box
             self.timer.pause()
-            self.rep_detections.clear()
-            self.rep_frames_fps.clear()
-            # Clear sequences
-            self.interpolate_sequence.clear()
-            self.sequence.clear()
+            self.clear_rep_detections()
+            self.analysis.pause()
             self.session_state.workout_state = "pause"
-            self.stage = "none"
-            self.current_stage = "none"
 
     def handle_posture_classification(self):
         """Process keypoint sequences for posture classification and provide feedback."""
-        posture_class, confidence = model_utils.predict_posture(
-            self.interpolate_sequence,
-            self.interpreter,
-            self.input_details,
-            self.output_details,
-            self.workout_config["sequence_length"]
-        )
-
-        if posture_class is not None:
-            self.rep_detections.append(posture_class)
-
-    def keypoint_extraction_and_normalization(self, results):
-
-        if self.view_direction in self.workout_config["keypoints"]:
-            self.keypoints = keypoints_utils.extract_keypoints(results, self.workout_config["keypoints"][
-                self.view_direction])
-            if self.view_direction == "right":
-                keypoints_normalized = keypoints_utils.scale_and_rel_position_normalize_keypoints(
-                    self.keypoints, flip_horizontally=True)
+        if len(self.analysis.interpolate_sequence) != self.workout_config["sequence_length"]:
+            return
+
+        infer = self.inference_scheduler.should_infer(self.analysis.current_stage)
+        if not infer and not self.inference_scheduler.holds_last_result(self.analysis.current_stage):
+            return
+        self.detection_frames += 1
+
+        if self.inference_worker is not None:
+            if infer:
+                self.inference_worker.submit(self.analysis.interpolate_sequence, self.detection_frames,
+                                             self.frame_timestamp)
+            if self.inference_worker.last_inference_time is not None:
+                self.inference_scheduler.record_inference_time(self.inference_worker.last_inference_time)
+            self.collect_inference_results()
+            return
+
+        if infer:
+            inference_start = time.perf_counter()
+            if self.inference_server is not None:
+                posture_class, confidence = self.inference_server.predict(self.analysis.interpolate_sequence)
             else:
-                keypoints_normalized = keypoints_utils.scale_and_rel_position_normalize_keypoints(
-                    self.keypoints, flip_horizontally=False)
-            self.sequence.append(keypoints_normalized)
-
-            # Limit sequence length
-        if len(self.sequence) > self.workout_config["sequence_length"]:
-            self.sequence.pop(0)
-
-    def sequence_interpolation(self):
-        sequence_needed = interpolation_utils.calculate_sequence_needed(self.current_fps,
-                                                                        self.system_config["target_fps"],
-                                                                        self.workout_config["sequence_length"])
-
-        if len(self.sequence) >= sequence_needed and self.current_fps != 0:
-            self.interpolate_sequence = interpolation_utils.process_keypoints_sequence(
-                self.sequence[-sequence_needed:], self.current_fps, self.system_config["target_fps"],
-                self.workout_config["sequence_length"]
-            )
+                posture_class, confidence = model_utils.predict_posture(
+                    self.analysis.interpolate_sequence,
+                    self.interpreter_pool,
+                    self.workout_config["sequence_length"]
+                )
+            inference_time = time.perf_counter() - inference_start
+            self.inference_scheduler.record_inference_time(inference_time)
+            metrics_utils.INFERENCE_SECONDS.observe(inference_time, mode="inline")
+            self.last_detection = posture_class
+            self.last_detection_frame = self.detection_frames
+
+        # Frames skipped by the scheduler repeat the last result
+        if self.last_detection is not None:
+            self.analysis.rep_detections.append(self.last_detection)
+
+    def collect_inference_results(self, close_rep=False):
+        """Add finished background inferences to the rep detections, dropping results of earlier reps."""
+        for posture_class, confidence, frame_number, window_end_timestamp in self.inference_worker.drain():
+            if window_end_timestamp <= self.detections_since:
+                continue
+            # Frames between two results repeat the earlier one, like skipped frames in the synchronous path
+            if self.last_detection is not None:
+                self.analysis.rep_detections.extend(
+                    [self.last_detection] * (frame_number - self.last_detection_frame - 1))
+            self.analysis.rep_detections.append(posture_class)
+            self.last_detection = posture_class
+            self.last_detection_frame = frame_number
+
+        if close_rep and self.last_detection is not None:
+            self.analysis.rep_detections.extend(
+                [self.last_detection] * (self.detection_frames - self.last_detection_frame))
+
+    def clear_rep_detections(self):
+        """Start collecting detections for a new rep."""
+        self.analysis.clear_rep_detections()
+        self.last_detection = None
+        self.last_detection_frame = 0
+        self.detection_frames = 0
+        self.detections_since = self.frame_timestamp
+        self.inference_scheduler.reset()
 
     # Handle user interactions
-    def handle_user_interactions(self, frame, results):
+    def handle_user_interactions(self, frame, landmark_pixels):
         active_buttons = user_interaction_utils.get_active_buttons(self.session_state.workout_state,
                                                                    self.system_config["buttons"].values())
 
@@ -286,7 +297,7 @@ class PostureMonitor:
         frame = visualization_utils.draw_buttons(frame, active_buttons, self.session_state.current_button)
 
         # Detect hand positions using Pose
-        hand_positions = user_interaction_utils.get_hand_positions_pose(frame, results)
+        hand_positions = user_interaction_utils.get_hand_positions_pose(landmark_pixels)
 
         # Handle button interactions
         activated_state = user_interaction_utils.handle_interaction(hand_positions, active_buttons, self.session_state)
@@ -295,13 +306,13 @@ class PostureMonitor:
         if activated_state == "idle":
             # Save workout set records
             workout_record_utils.save_workout_set_record(
-                self.exercise_id, self.session_state.set, self.reps_results,
-                self.session_state.workout_time, self.mistake_counts, self.workout_config
+                self.exercise_id, self.session_state.set, self.analysis.reps_results,
+                self.session_state.workout_time, self.analysis.mistake_counts, self.workout_config
             )
             self.reset_workout_state()
-            self.video_recorders["set_video_recorder"].stop_recording(self.exercise_id,
-                                                                      set_num=self.session_state.set - 1)
-            self.video_recorders["rep_video_recorder"].stop_all_recordings()
+            self.recorder_call("set_video_recorder", "stop_recording", self.exercise_id,
+                               set_num=self.session_state.set - 1)
+            self.recorder_call("rep_video_recorder", "stop_all_recordings")
 
         elif activated_state == "ready":
             # Start a new set
@@ -310,22 +321,17 @@ class PostureMonitor:
                 components.text_container_with_label(self.placeholders["rep"], "Rep", self.session_state.rep)
 
             self.session_state.workout_state = "ready"
-            self.video_recorders["set_video_recorder"].start_recording(self.exercise_id,
-                                                                       set_num=self.session_state.set)
-            self.video_recorders["rep_video_recorder"].start_recording(self.exercise_id,
-                                                                       set_num=self.session_state.set,
-                                                                       rep=self.session_state.rep)
+            self.recorder_call("set_video_recorder", "start_recording", self.exercise_id,
+                               set_num=self.session_state.set)
+            self.recorder_call("rep_video_recorder", "start_recording", self.exercise_id,
+                               set_num=self.session_state.set,
+                               rep=self.session_state.rep)
 
         elif activated_state == 'pause':
             self.timer.pause()
-            self.rep_detections.clear()
-            self.rep_frames_fps.clear()
-            # Clear sequences
-            self.interpolate_sequence.clear()
-            self.sequence.clear()
+            self.clear_rep_detections()
+            self.analysis.pause()
             self.session_state.workout_state = "pause"
-            self.stage = "none"
-            self.current_stage = "none"
 
         if self.session_state.current_button:
             for button in active_buttons:
@@ -338,8 +344,8 @@ class PostureMonitor:
     def reset_workout_state(self):
         self.session_state.rep = 0
         self.session_state.set += 1
-        self.session_state.set_results.append(self.reps_results)
-        self.reps_results.clear()
+        self.session_state.set_results.append(self.analysis.reps_results)
+        self.analysis.reset_set()
         self.timer.reset()
         self.session_state.workout_time = "00:00"
 
@@ -348,73 +354,168 @@ class PostureMonitor:
         components.text_container_with_label(self.placeholders["rep"], "Rep", self.session_state.rep)
         components.text_container_with_label(self.placeholders["set"], "Set", self.session_state.set)
 
-        self.mistake_counts = {key: 0 for key in self.workout_config["labels"]}
         for label in self.workout_config["labels"]:
             components.text_container_with_label(
                 self.placeholders["label"][label],
                 utils.remove_underscores_and_capitalize(label),
-                self.mistake_counts[label]
+                self.analysis.mistake_counts[label]
             )
 
-    def run_posture_monitoring(self):
-        resize_size = (self.system_config["resize_width"], self.system_config["resize_height"])
-        frame_size = (self.system_config["frame_width"], self.system_config["resize_height"])
-        cap = cv2.VideoCapture(self.session_state['selected_camera'], cv2.CAP_MSMF)
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, frame_size[0])
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, frame_size[1])
-        start_time = time.time()
-
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-
-            frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
-            frame = cv2.resize(frame, resize_size)
-            frame = cv2.flip(frame, 1)
-            image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            image.flags.writeable = False
-
-
-            results = self.pose.process(image)
-
-            if results.pose_landmarks:
-                # Draw pose landmarks
-                self.mp_drawing.draw_landmarks(frame, results.pose_landmarks, mp.solutions.pose.POSE_CONNECTIONS)
-
-
+    def recorder_call(self, recorder, method, *args, **kwargs):
+        """Queue a video recorder call; the record stage runs queued calls in frame order."""
+        self.pending_recorder_calls.append((recorder, method, args, kwargs))
 
-                # Handle workout states
-                state = self.session_state.workout_state
-                if state != "idle":
-                    self.keypoint_extraction_and_normalization(results)
-                    self.sequence_interpolation()
-                    if state == "ready":
-                        self.handle_ready_state(frame, results)
-                    elif state == "start":
-                        self.handle_start_state(frame, results)
+    # ------------------------------------------------------------------------------
+    # Frame processing stages
+    # ------------------------------------------------------------------------------
 
-            self.handle_user_interactions(frame, results)
-
-            # FPS calculation
-            self.frame_count += 1
-            elapsed_time = time.time() - start_time
-            if elapsed_time > 1:
-                self.current_fps = self.frame_count / elapsed_time
-                self.frame_count = 0
-                start_time = time.time()
-
-            time_per_frame_ms = (1 / self.current_fps) * 1000 if self.current_fps > 0 else 0
-
-            # Draw FPS info on frame
-            cv2.putText(frame, f'FPS: {self.current_fps:.2f}', (10, resize_size[1] - 30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1, cv2.LINE_AA)
-            cv2.putText(frame, f'Time per frame: {time_per_frame_ms:.2f} ms', (10, resize_size[1] - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1, cv2.LINE_AA)
+    def preprocess_frame(self, packet):
+        """Rotate, resize and mirror the camera frame and prepare the RGB image for MediaPipe."""
+        resize_size = (self.system_config["resize_width"], self.system_config["resize_height"])
+        frame = frame_source_utils.preprocess_frame(packet["frame"], resize_size,
+                                                    self.system_config["frame_source"]["preprocess"])
+        image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        image.flags.writeable = False
+        packet["frame"] = frame
+        packet["image"] = image
+        return packet
+
+    def detect_pose(self, packet):
+        """Run MediaPipe Pose on the frame and convert the landmarks to arrays once for every later stage."""
+        results = self.pose.process(packet.pop("image"))
+        packet["landmarks"] = None
+        packet["landmark_pixels"] = None
+        if results.pose_landmarks:
+            frame_height, frame_width = packet["frame"].shape[:2]
+            packet["landmarks"] = landmark_utils.landmarks_to_array(results.pose_landmarks)
+            packet["landmark_pixels"] = landmark_utils.to_pixel_coordinates(packet["landmarks"],
+                                                                            frame_width, frame_height)
+        return packet
+
+    def render_landmarks(self, packet):
+        """Draw the detected pose landmarks on the frame."""
+        if packet["landmarks"] is not None:
+            landmark_utils.draw_landmarks(packet["frame"], packet["landmarks"], packet["landmark_pixels"])
+        return packet
+
+    def analyze_frame(self, packet):
+        """Run the workout state machine: keypoints, classification, rep counting and user interactions."""
+        frame, landmarks = packet["frame"], packet["landmarks"]
+        self.frame_timestamp = packet["timestamp"]
+
+        if landmarks is not None:
+            # Handle workout states
+            state = self.session_state.workout_state
+            if state != "idle":
+                with self.stage_timer.stage("keypoints"):
+                    self.analysis.append_keypoints(landmarks, self.frame_timestamp)
+                with self.stage_timer.stage("interpolation"):
+                    self.analysis.resample_window(self.current_fps)
+                if state == "ready":
+                    self.handle_ready_state(frame, landmarks)
+                elif state == "start":
+                    self.handle_start_state(frame, landmarks)
+
+        with self.stage_timer.stage("interactions"):
+            self.handle_user_interactions(frame, packet["landmark_pixels"])
+        with self.stage_timer.stage("audio"):
+            feedback_utils.play_pending_audio(self.pending_audio)
+
+        packet["recorder_calls"] = self.pending_recorder_calls
+        self.pending_recorder_calls = []
+        return packet
+
+    def record_frame(self, packet):
+        """Run the recorder calls made while analysing the frame."""
+        for recorder, method, args, kwargs in packet.pop("recorder_calls"):
+            getattr(self.video_recorders[recorder], method)(*args, **kwargs)
+        return packet
+
+    def display_frame(self, packet):
+        """Update the FPS, draw it on the frame and show the frame in Streamlit, with the stage times once a second."""
+        frame = packet["frame"]
+
+        # FPS calculation
+        self.frame_count += 1
+        metrics_utils.FRAMES_PROCESSED.inc(exercise=self.session_state.selected_exercise)
+        elapsed_time = time.time() - self.fps_start_time
+        if elapsed_time > 1:
+            self.current_fps = self.frame_count / elapsed_time
+            metrics_utils.MONITOR_FPS.set(self.current_fps, exercise=self.session_state.selected_exercise)
+            self.frame_count = 0
+            self.fps_start_time = time.time()
+            if "diagnostics" in self.placeholders:
+                components.diagnostics_panel(self.placeholders["diagnostics"], self.stage_timer.snapshot(),
+                                             self.model_registry.get_stats())
+
+        time_per_frame_ms = (1 / self.current_fps) * 1000 if self.current_fps > 0 else 0
+
+        # Draw FPS info on frame
+        cv2.putText(frame, f'FPS: {self.current_fps:.2f}', (10, frame.shape[0] - 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1, cv2.LINE_AA)
+        cv2.putText(frame, f'Time per frame: {time_per_frame_ms:.2f} ms', (10, frame.shape[0] - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1, cv2.LINE_AA)
+
+        # Display frame in Streamlit
+        self.frame_window.image(frame, channels="BGR", use_container_width=True)
 
-            # Display frame in Streamlit
-            self.frame_window.image(frame, channels="BGR", use_container_width=True)
+    def run_posture_monitoring(self):
+        frame_size = (self.system_config["frame_width"], self.system_config["resize_height"])
+        pipeline_config = self.system_config["pipeline"]
+        source_config = self.system_config["frame_source"]
+        frame_source = frame_source_utils.create_frame_source(source_config, self.session_state['selected_camera'],
+                                                              frame_size)
+        # Replaying as fast as possible must not drop frames, live and real-time sources keep the freshest
+        slot_policy = "block" if source_config["type"] != "camera" and source_config["pace"] == "fast" else "drop_oldest"
+        frame_grabber = frame_capture_utils.FrameGrabber(frame_source, self.system_config["capture_slot_size"],
+                                                         slot_policy).start()
+
+        def next_packet():
+            while frame_grabber.isOpened():
+                with self.stage_timer.stage("capture_wait"):
+                    ret, frame, timestamp = frame_grabber.read()
+                if ret:
+                    return {"frame": frame, "timestamp": timestamp}
+            return None
+
+        stages = [
+            ("preprocess", self.preprocess_frame),
+            ("pose", self.detect_pose),
+            ("render", self.render_landmarks),
+            ("analyze", self.analyze_frame),
+            ("record", self.record_frame),
+        ]
+        stages = [(name, self.stage_timer.timed(name)(stage)) for name, stage in stages]
+        display_frame = self.stage_timer.timed("display")(self.display_frame)
+        self.stage_timer.reset()
+        self.fps_start_time = time.time()
+
+        try:
+            if pipeline_config["enabled"]:
+                # Every stage runs in its own worker, the display stays on the script thread
+                pipeline = pipeline_utils.FramePipeline(next_packet, stages,
+                                                        queue_size=pipeline_config["queue_size"],
+                                                        backpressure=pipeline_config["backpressure"],
+                                                        thread_initializer=add_script_run_ctx).start()
+                try:
+                    for packet in pipeline.results():
+                        display_frame(packet)
+                finally:
+                    pipeline.stop()
+            else:
+                packet = next_packet()
+                while packet is not None:
+                    with self.stage_timer.stage("frame"):
+                        for _, stage in stages:
+                            packet = stage(packet)
+                        display_frame(packet)
+                    packet = next_packet()
+        finally:
+            frame_grabber.stop()
+            if self.stage_timer.enabled:
+                for name, summary in self.stage_timer.snapshot().items():
+                    print(f"{name}: mean {summary['mean_ms']:.2f} ms, p95 {summary['p95_ms']:.2f} ms, "
+                          f"max {summary['max_ms']:.2f} ms over {summary['count']} calls")
 
-        cap.release()
         cv2.destroyAllWindows()
         self.session_state.posture_monitoring_IsRunning = False  # Ensure monitoring stops
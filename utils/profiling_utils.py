@@ -0,0 +1,151 @@
+import bisect
+import functools
+import threading
+import time
+from contextlib import nullcontext
+
+# Upper bounds of the histogram buckets in milliseconds, doubling from 1/16 ms to about 1 s;
+# slower calls fall into one more overflow bucket
+DEFAULT_BUCKET_BOUNDS_MS = tuple(0.0625 * 2 ** i for i in range(15))
+SNAPSHOT_PERCENTILES = (50, 95, 99)
+
+# Shared context of a disabled timer, entering and leaving it does nothing
+_DISABLED_STAGE = nullcontext()
+
+
+class StageHistogram:
+    def __init__(self, bucket_bounds_ms):
+        """
+        Fixed-size histogram of the durations of one stage; memory does not grow with the number of calls.
+        :param bucket_bounds_ms: Sorted upper bounds of the buckets in milliseconds.
+        """
+        self.bucket_bounds_ms = bucket_bounds_ms
+        self.counts = [0] * (len(bucket_bounds_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+
+    def add(self, milliseconds):
+        self.counts[bisect.bisect_left(self.bucket_bounds_ms, milliseconds)] += 1
+        self.count += 1
+        self.total_ms += milliseconds
+        self.last_ms = milliseconds
+        if milliseconds > self.max_ms:
+            self.max_ms = milliseconds
+
+    def percentile(self, percent):
+        """
+        Upper bound of the bucket holding the given percentile, the maximum for the overflow bucket.
+        """
+        if self.count == 0:
+            return 0.0
+        rank = percent / 100 * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                if index == len(self.bucket_bounds_ms):
+                    return self.max_ms
+                return min(self.bucket_bounds_ms[index], self.max_ms)
+        return self.max_ms
+
+    def summary(self):
+        summary = {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "last_ms": self.last_ms,
+            "max_ms": self.max_ms,
+        }
+        for percent in SNAPSHOT_PERCENTILES:
+            summary[f"p{percent}_ms"] = self.percentile(percent)
+        summary["buckets"] = list(self.counts)
+        return summary
+
+
+class _TimedStage:
+    __slots__ = ("timer", "name", "start_time")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+        self.start_time = None
+
+    def __enter__(self):
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.timer.record(self.name, time.perf_counter() - self.start_time)
+        return False
+
+
+class StageTimer:
+    def __init__(self, enabled=True, bucket_bounds_ms=DEFAULT_BUCKET_BOUNDS_MS):
+        """
+        Times named stages of the frame loop into fixed-size histograms.
+        Use `with timer.stage("pose"):` around a block or `timer.timed("pose")(function)` to wrap a function.
+        A disabled timer hands out a shared empty context and returns wrapped functions unchanged,
+        so instrumented code costs one attribute lookup per stage.
+        :param enabled: If False, nothing is timed.
+        :param bucket_bounds_ms: Sorted upper bounds of the histogram buckets in milliseconds.
+        """
+        self.enabled = enabled
+        self.bucket_bounds_ms = tuple(bucket_bounds_ms)
+        self.histograms = {}
+        # Pipeline stages record from their worker threads while the display thread takes snapshots
+        self.lock = threading.Lock()
+
+    def stage(self, name):
+        """
+        Context manager timing the block it wraps as the stage `name`.
+        """
+        if not self.enabled:
+            return _DISABLED_STAGE
+        return _TimedStage(self, name)
+
+    def timed(self, name):
+        """
+        Decorator timing every call of the function as the stage `name`.
+        Functions wrapped while the timer is disabled are returned unchanged.
+        """
+        def decorator(function):
+            if not self.enabled:
+                return function
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                start_time = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - start_time)
+            return wrapper
+        return decorator
+
+    def record(self, name, seconds):
+        """
+        Add one duration of the stage `name`.
+        """
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = StageHistogram(self.bucket_bounds_ms)
+            histogram.add(seconds * 1000)
+
+    def snapshot(self):
+        """
+        Summary of every stage recorded so far, in the order the stages were first seen.
+
+        Returns:
+            dict: Stage name -> count, mean, last, max and p50/p95/p99 in milliseconds, and the bucket counts.
+        """
+        with self.lock:
+            return {name: histogram.summary() for name, histogram in self.histograms.items()}
+
+    def reset(self):
+        """
+        Forget all recorded durations.
+        """
+        with self.lock:
+            self.histograms.clear()
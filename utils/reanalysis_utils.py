@@ -0,0 +1,217 @@
+"""
+Re-analyse the archive of set videos with the current models on a process pool.
+
+Every worker process keeps one MediaPipe Pose and one single-threaded interpreter per model for all
+its videos. Finished videos are recorded in a progress manifest, so an interrupted run resumes where
+it stopped; a video is analysed again only when its model file changed. The records of all analysed
+videos are then merged into the workout data files, and unchanged files are not rewritten.
+
+Usage:
+    python -m utils.reanalysis_utils --workers 4
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import time
+from multiprocessing import Pool
+
+import cv2
+import mediapipe as mp
+
+from config import workout_configurations, system_configuration
+from . import model_registry_utils, offline_analysis_utils, workout_record_utils
+
+DEFAULT_MANIFEST = "exercise/reanalysis_manifest.json"
+
+# Per-process state of a pool worker, created by _init_worker
+_worker = {}
+
+
+def get_model_fingerprint(workout_config):
+    """
+    SHA-256 of the model file, identifies the model a video was analysed with.
+    """
+    with open(workout_config["model_path"], "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def load_manifest(manifest_path):
+    """
+    Progress manifest of earlier runs: video path -> result of its analysis.
+    """
+    try:
+        with open(manifest_path, "r") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def save_manifest(manifest, manifest_path):
+    """
+    Write the manifest through a temporary file so an interrupted run keeps the previous one.
+    """
+    temp_path = f"{manifest_path}.tmp"
+    with open(temp_path, "w") as file:
+        json.dump(manifest, file, indent=4)
+    os.replace(temp_path, manifest_path)
+
+
+def find_set_videos(paths=None):
+    """
+    Set videos to analyse with their exercise.
+
+    Args:
+        paths (list): Video files or directories, defaults to the set video directory of every exercise.
+
+    Returns:
+        list: (video path, exercise) pairs; videos of unknown exercises are skipped.
+    """
+    if not paths:
+        paths = [config["workout_data_directory"]["set_video"] for config in workout_configurations.values()]
+    videos = []
+    for path in offline_analysis_utils.find_videos(paths):
+        exercise = offline_analysis_utils.exercise_of_video(path)
+        if exercise is None:
+            print(f"Skipping {path}: unknown exercise.")
+            continue
+        videos.append((os.path.normpath(path), exercise))
+    return videos
+
+
+def _init_worker(backend_name, interpreter_threads):
+    """
+    Load the models and MediaPipe Pose once per worker process.
+    Interpreters are single-threaded by default, the pool already runs one video per core.
+    """
+    cv2.setNumThreads(1)
+    configurations = {}
+    for exercise, workout_config in workout_configurations.items():
+        interpreter_options = dict(workout_config.get("interpreter_options") or {}, num_threads=interpreter_threads)
+        configurations[exercise] = dict(workout_config, interpreter_options=interpreter_options)
+    _worker["model_registry"] = model_registry_utils.ModelRegistry(configurations, backend_name, pool_size=1)
+    _worker["pose"] = mp.solutions.pose.Pose(min_tracking_confidence=0.8)
+
+
+def _analyze_task(task):
+    """
+    Analyse one video in a worker process.
+
+    Returns:
+        tuple: Video path and its manifest entry with the record and throughput, or the error.
+    """
+    path, exercise, model_fingerprint = task
+    entry = {"exercise": exercise, "model_sha256": model_fingerprint, "worker": os.getpid()}
+    # Tracking state must not carry over from the previous video
+    _worker["pose"].reset()
+    # Feedback messages are picked at random; a fixed seed per video keeps re-runs identical
+    random.seed(path)
+    try:
+        record, stats = offline_analysis_utils.analyze_video(
+            path, exercise, interpreter_pool=_worker["model_registry"].get_pool(exercise), pose=_worker["pose"],
+            return_stats=True)
+    except Exception as error:
+        entry.update(status="failed", error=f"{type(error).__name__}: {error}")
+        return path, entry
+    entry.update(status="done", record=record, **stats)
+    return path, entry
+
+
+def reanalyze_videos(videos, manifest_path=DEFAULT_MANIFEST, workers=None, backend_name="auto",
+                     interpreter_threads=1, force=False):
+    """
+    Analyse the videos on a process pool, skipping videos the manifest holds for the current model.
+
+    Args:
+        videos (list): (video path, exercise) pairs from find_set_videos.
+        manifest_path (str): Progress manifest, updated after every video.
+        workers (int): Number of worker processes, defaults to the number of CPUs.
+        backend_name (str): Inference backend passed to inference_backend_utils.get_backend.
+        interpreter_threads (int): Threads of every interpreter.
+        force (bool): If True, analyse every video again.
+
+    Returns:
+        dict: The updated manifest.
+    """
+    manifest = load_manifest(manifest_path)
+    fingerprints = {exercise: get_model_fingerprint(workout_configurations[exercise])
+                    for exercise in {exercise for _, exercise in videos}}
+
+    tasks = []
+    for path, exercise in videos:
+        entry = manifest.get(path)
+        if (not force and entry is not None and entry["status"] == "done"
+                and entry["model_sha256"] == fingerprints[exercise]):
+            continue
+        tasks.append((path, exercise, fingerprints[exercise]))
+    print(f"{len(videos)} videos, {len(videos) - len(tasks)} already analysed with the current models, "
+          f"{len(tasks)} to analyse.")
+    if not tasks:
+        return manifest
+
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    start_time = time.perf_counter()
+    total_frames = 0
+    failed = 0
+    with Pool(workers, initializer=_init_worker, initargs=(backend_name, interpreter_threads)) as pool:
+        # Longest videos are not known up front, hand out one video at a time
+        for index, (path, entry) in enumerate(pool.imap_unordered(_analyze_task, tasks, chunksize=1), 1):
+            manifest[path] = entry
+            save_manifest(manifest, manifest_path)
+            if entry["status"] == "done":
+                total_frames += entry["frames"]
+                speed = entry["video_seconds"] / entry["processing_seconds"] if entry["processing_seconds"] else 0.0
+                print(f"[{index}/{len(tasks)}] {path}: {entry['frames']} frames, "
+                      f"{entry['processing_seconds']:.1f} s, {entry['processing_fps']:.1f} fps "
+                      f"({speed:.1f}x real time), worker {entry['worker']}")
+            else:
+                failed += 1
+                print(f"[{index}/{len(tasks)}] {path}: failed, {entry['error']}")
+
+    elapsed_time = time.perf_counter() - start_time
+    print(f"Analysed {len(tasks) - failed} videos ({failed} failed) with {workers} workers in {elapsed_time:.1f} s, "
+          f"{total_frames / elapsed_time if elapsed_time > 0 else 0:.1f} frames per second in total.")
+    return manifest
+
+
+def merge_manifest_records(manifest, videos):
+    """
+    Merge the records of the analysed videos into the workout data files.
+
+    Returns:
+        list: Workout data files that were rewritten.
+    """
+    records = {}
+    for path, exercise in videos:
+        entry = manifest.get(path)
+        if entry is not None and entry["status"] == "done":
+            records.setdefault(exercise, []).append(entry["record"])
+
+    changed_files = []
+    for exercise, workout_sets in records.items():
+        workout_config = workout_configurations[exercise]
+        if workout_record_utils.merge_workout_set_records(workout_sets, workout_config):
+            changed_files.append(workout_config["workout_data_directory"]["workout_data"])
+    return changed_files
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-analyse the recorded set videos with the current models.")
+    parser.add_argument("paths", nargs="*",
+                        help="Video files or directories, defaults to the set videos of every exercise")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes, defaults to the CPU count")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST, help="Progress manifest used to resume runs")
+    parser.add_argument("--backend", default=system_configuration["inference_backend"],
+                        help="Inference backend of the interpreters")
+    parser.add_argument("--interpreter-threads", type=int, default=1)
+    parser.add_argument("--force", action="store_true", help="Analyse videos the manifest already holds")
+    parser.add_argument("--no-merge", action="store_true", help="Only update the manifest")
+    args = parser.parse_args()
+
+    set_videos = find_set_videos(args.paths)
+    progress = reanalyze_videos(set_videos, args.manifest, args.workers, args.backend,
+                                args.interpreter_threads, args.force)
+    if not args.no_merge:
+        rewritten = merge_manifest_records(progress, set_videos)
+        print(f"Updated workout records: {', '.join(rewritten) if rewritten else 'none changed'}")
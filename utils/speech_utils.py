@@ -0,0 +1,191 @@
+import base64
+import io
+import itertools
+import os
+import threading
+import time
+import wave
+from collections import OrderedDict
+from concurrent.futures import Future
+from queue import PriorityQueue
+
+from . import metrics_utils
+
+# Requests made while monitoring are rendered before prerendered phrases
+PRIORITY_FEEDBACK = 0
+PRIORITY_PRERENDER = 1
+
+
+class SpeechWorker:
+    def __init__(self, audio_temp_dir, rate=180, cache_size=512):
+        """
+        Render text to speech on a background thread and cache the base64 encoded audio.
+        :param audio_temp_dir: Directory for the temporary WAV file written by the engine.
+        :param rate: Speech rate of the pyttsx3 engine.
+        :param cache_size: Maximum number of phrases kept in the LRU cache.
+        """
+        self.audio_temp_dir = audio_temp_dir
+        self.rate = rate
+        self.cache_size = cache_size
+        self.cache = OrderedDict()  # (text, rate) -> (base64 WAV audio, duration in seconds)
+        self.pending = {}  # (text, rate) -> Future
+        self.queue = PriorityQueue()
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        """
+        Start the speech thread.
+        """
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+        return self
+
+    def get_cached(self, text):
+        """
+        Return the cached (base64 audio, duration) of a phrase, or None if it has not been rendered yet.
+        """
+        key = (text, self.rate)
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                return self.cache[key]
+        return None
+
+    def render(self, text, priority=PRIORITY_FEEDBACK):
+        """
+        Request the audio for a phrase.
+        :param text: Phrase to speak.
+        :param priority: PRIORITY_FEEDBACK or PRIORITY_PRERENDER.
+        :return: Future resolving to (base64 audio, duration).
+        """
+        key = (text, self.rate)
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                future = Future()
+                future.set_result(self.cache[key])
+                if priority == PRIORITY_FEEDBACK:
+                    metrics_utils.SPEECH_CACHE_REQUESTS.inc(result="hit")
+                return future
+            if priority == PRIORITY_FEEDBACK:
+                metrics_utils.SPEECH_CACHE_REQUESTS.inc(result="miss")
+            future = self.pending.get(key)
+            if future is None:
+                future = Future()
+                self.pending[key] = future
+            elif priority >= PRIORITY_PRERENDER:
+                return future
+        # A phrase already waiting as a prerender is queued again at the higher priority
+        self.queue.put((priority, next(self.counter), key))
+        metrics_utils.SPEECH_QUEUE_DEPTH.set(self.queue.qsize())
+        return future
+
+    def render_sequence(self, parts):
+        """
+        Request the audio for several phrases spoken one after another, e.g. ["Rep 3", "Excellent squat!"].
+        Each part is cached on its own, so dynamic sentences reuse prerendered audio.
+        :param parts: List of phrases.
+        :return: Future resolving to (base64 audio, duration) of the joined phrases.
+        """
+        part_futures = [self.render(part) for part in parts]
+        if len(part_futures) == 1:
+            return part_futures[0]
+
+        future = Future()
+        remaining = [len(part_futures)]
+        remaining_lock = threading.Lock()
+
+        def on_part_done(_):
+            with remaining_lock:
+                remaining[0] -= 1
+                if remaining[0] > 0:
+                    return
+            try:
+                future.set_result(join_audio([part_future.result() for part_future in part_futures]))
+            except Exception as error:
+                future.set_exception(error)
+
+        for part_future in part_futures:
+            part_future.add_done_callback(on_part_done)
+        return future
+
+    def prerender(self, phrases):
+        """
+        Queue phrases to be rendered in the background while no feedback is waiting.
+        """
+        for text in phrases:
+            self.render(text, priority=PRIORITY_PRERENDER)
+
+    def _run(self):
+        """
+        Background speech thread. pyttsx3.init() hands out one engine per driver for the whole process and
+        the engine is not thread-safe, so every page renders speech through the worker and no other thread
+        may use the engine.
+        """
+        from . import model_utils
+
+        engine = model_utils.load_pyttsx3_engine(self.rate)
+        os.makedirs(self.audio_temp_dir, exist_ok=True)
+        temp_audio_path = os.path.join(self.audio_temp_dir, "speech_worker.wav")
+
+        while True:
+            _, _, key = self.queue.get()
+            metrics_utils.SPEECH_QUEUE_DEPTH.set(self.queue.qsize())
+            with self.lock:
+                future = self.pending.get(key)
+            if future is None:  # Already rendered through a higher priority request
+                continue
+            text, _ = key
+            try:
+                render_start = time.perf_counter()
+                audio_data = render_audio_file(engine, text, temp_audio_path)
+                metrics_utils.SPEECH_RENDER_SECONDS.observe(time.perf_counter() - render_start)
+                entry = (base64.b64encode(audio_data).decode(), get_audio_duration(audio_data))
+            except Exception as error:
+                with self.lock:
+                    del self.pending[key]
+                future.set_exception(error)
+                continue
+
+            with self.lock:
+                self.cache[key] = entry
+                if len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+                del self.pending[key]
+            future.set_result(entry)
+
+
+def render_audio_file(engine, text, audio_path):
+    """
+    Render a phrase to a WAV file with the pyttsx3 engine and return the file content.
+    """
+    engine.save_to_file(text, audio_path)
+    engine.runAndWait()
+    with open(audio_path, "rb") as audio_file:
+        return audio_file.read()
+
+
+def get_audio_duration(audio_data):
+    """
+    Duration in seconds of WAV audio data.
+    """
+    with wave.open(io.BytesIO(audio_data), "rb") as wf:
+        return wf.getnframes() / float(wf.getframerate())
+
+
+def join_audio(entries):
+    """
+    Join several (base64 audio, duration) WAV entries rendered by the same engine into one.
+    """
+    output = io.BytesIO()
+    with wave.open(output, "wb") as joined:
+        for index, (base64_audio, _) in enumerate(entries):
+            with wave.open(io.BytesIO(base64.b64decode(base64_audio)), "rb") as wf:
+                if index == 0:
+                    joined.setparams(wf.getparams())
+                joined.writeframes(wf.readframes(wf.getnframes()))
+    duration = sum(duration for _, duration in entries)
+    return base64.b64encode(output.getvalue()).decode(), duration
@@ -2,23 +2,16 @@ import time
 import streamlit as st
 
 
-def get_hand_positions_pose(frame, pose_results):
+def get_hand_positions_pose(landmark_pixels):
     hand_positions = []
-    if pose_results.pose_landmarks:
-        landmarks = pose_results.pose_landmarks.landmark
-        h, w, _ = frame.shape
-
+    if landmark_pixels is not None:
         # Left Index Tip (Landmark 19)
-        left_index = landmarks[19]
-        left_x = int(left_index.x * w)
-        left_y = int(left_index.y * h)
-        hand_positions.append((left_x, left_y))
+        left_x, left_y = landmark_pixels[19]
+        hand_positions.append((int(left_x), int(left_y)))
 
         # Right Index Tip (Landmark 20)
-        right_index = landmarks[20]
-        right_x = int(right_index.x * w)
-        right_y = int(right_index.y * h)
-        hand_positions.append((right_x, right_y))
+        right_x, right_y = landmark_pixels[20]
+        hand_positions.append((int(right_x), int(right_y)))
 
     return hand_positions
 
@@ -1,19 +1,39 @@
 import threading
 import cv2
+import json
 import time
 import os
 from datetime import datetime
 from queue import Queue, Empty
 import atexit
 
+from . import metrics_utils
+
+# How the rep clips of the "single" recording mode are produced from the set video
+REP_CLIP_MODES = ("remux", "index")
+
 
 class VideoRecorder:
-    def __init__(self, resize_size, frame_rate, output_dir):
+    def __init__(self, resize_size, frame_rate, output_dir, rep_clip_dir=None, rep_clips="remux"):
+        """
+        Record videos on background threads, one H264 writer per recording.
+        :param resize_size: (width, height) of the recorded frames.
+        :param frame_rate: Frame rate written to the video files.
+        :param output_dir: Directory of the video files.
+        :param rep_clip_dir: Directory of the rep clips cut from set recordings with marked reps.
+        :param rep_clips: "remux" copies every marked rep of a stopped set recording into its own clip
+                          without encoding it again; "index" only saves the rep ranges for playback to seek to.
+        """
+        if rep_clips not in REP_CLIP_MODES:
+            raise ValueError(f"Unknown rep clip mode {rep_clips!r}, expected one of {REP_CLIP_MODES}.")
         self.resize_size = resize_size
         self.frame_rate = frame_rate
         self.output_dir = output_dir
+        self.rep_clip_dir = rep_clip_dir
+        self.rep_clips = rep_clips
         self.recordings = {}  # Store threads and queues for concurrent recordings
         self.lock = threading.Lock()
+        self.metrics_name = os.path.basename(os.path.normpath(output_dir))  # "rep" or "set"
 
         # Register cleanup on script exit
         atexit.register(self.stop_all_recordings)
@@ -54,8 +74,10 @@ class VideoRecorder:
             thread = threading.Thread(target=self._record, args=(out, frame_queue))
             thread.start()
 
-            # Store the thread and queue
-            self.recordings[recording_id] = {"thread": thread, "queue": frame_queue}
+            # Store the thread and queue, the number of queued frames and the marked rep ranges
+            self.recordings[recording_id] = {"thread": thread, "queue": frame_queue, "path": filepath,
+                                             "frames": 0, "reps": {}}
+            metrics_utils.ACTIVE_RECORDINGS.set(len(self.recordings), recorder=self.metrics_name)
 
     def stop_all_recordings(self):
         """
@@ -69,6 +91,7 @@ class VideoRecorder:
                 thread.join()  # Wait for each thread to finish
 
             self.recordings.clear()
+            metrics_utils.ACTIVE_RECORDINGS.set(0, recorder=self.metrics_name)
             print("All recordings have been stopped.")
     def stop_recording(self, exercise_id, set_num, rep=None):
         """
@@ -91,9 +114,17 @@ class VideoRecorder:
             thread.join()  # Wait for the thread to finish
 
             # Clean up
-            del self.recordings[recording_id]
+            recording = self.recordings.pop(recording_id)
+            metrics_utils.ACTIVE_RECORDINGS.set(len(self.recordings), recorder=self.metrics_name)
             print(f"Recording {recording_id} stopped.")
 
+        if recording["reps"]:
+            rep_index = save_rep_index(recording["path"], self.frame_rate, recording["reps"], recording["frames"])
+            if self.rep_clips == "remux" and self.rep_clip_dir is not None:
+                # Remuxing copies the encoded frames, it does not hold up the frame loop for long
+                # but runs off it anyway; until a clip exists its rep plays from the set video
+                threading.Thread(target=cut_rep_clips, args=(recording["path"], rep_index, self.rep_clip_dir)).start()
+
     def enqueue_frame(self, frame,exercise_id, set_num, rep=None ):
         """
         Add a frame to the recording's queue.
@@ -109,10 +140,41 @@ class VideoRecorder:
             if recording_id not in self.recordings:
                 print(f"No active recording found for {recording_id}.")
                 return
+            frame_queue = self.recordings[recording_id]["queue"]
             try:
-                self.recordings[recording_id]["queue"].put_nowait(frame)
+                frame_queue.put_nowait(frame)
+                self.recordings[recording_id]["frames"] += 1
             except:
+                metrics_utils.RECORDER_DROPPED_FRAMES.inc(recorder=self.metrics_name)
                 print(f"Frame queue for {recording_id} is full. Dropping frame.")
+            metrics_utils.RECORDER_QUEUE_DEPTH.set(frame_queue.qsize(), recorder=self.metrics_name)
+
+    def mark_rep_start(self, exercise_id, set_num, rep):
+        """
+        Mark that the next frame of the set recording is the first frame of the rep.
+        A rep that is already marked keeps its start, e.g. when the set resumes after a pause.
+        """
+        recording_id = f"{exercise_id}_set_{set_num}"
+        with self.lock:
+            if recording_id not in self.recordings:
+                print(f"No active recording found for {recording_id}.")
+                return
+            recording = self.recordings[recording_id]
+            recording["reps"].setdefault(rep, [recording["frames"], None])
+
+    def mark_rep_end(self, exercise_id, set_num, rep):
+        """
+        Mark that the rep ends before the next frame of the set recording.
+        """
+        recording_id = f"{exercise_id}_set_{set_num}"
+        with self.lock:
+            if recording_id not in self.recordings:
+                print(f"No active recording found for {recording_id}.")
+                return
+            recording = self.recordings[recording_id]
+            rep_range = recording["reps"].get(rep)
+            if rep_range is not None and rep_range[1] is None:
+                rep_range[1] = recording["frames"]
 
     def _record(self, out, frame_queue):
         """
@@ -128,4 +190,135 @@ class VideoRecorder:
                 out.write(frame)
             except Empty:
                 continue
-        out.release()  # Release the VideoWriter when done
\ No newline at end of file
+        out.release()  # Release the VideoWriter when done
+
+
+class RepRangeRecorder:
+    def __init__(self, set_video_recorder):
+        """
+        Rep video recorder of the "single" recording mode. Rep frames are not encoded a second time:
+        the rep boundaries are marked in the set recording and the rep clips are cut from the set video
+        when the set stops.
+        :param set_video_recorder: VideoRecorder of the set videos, created with a rep_clip_dir.
+        """
+        self.set_video_recorder = set_video_recorder
+        self.recordings = {}  # Nothing is recorded here, every rep is part of its set recording
+
+    def start_recording(self, exercise_id, set_num, rep=None):
+        self.set_video_recorder.mark_rep_start(exercise_id, set_num, rep)
+
+    def stop_recording(self, exercise_id, set_num, rep=None):
+        self.set_video_recorder.mark_rep_end(exercise_id, set_num, rep)
+
+    def enqueue_frame(self, frame, exercise_id, set_num, rep=None):
+        # The frame is already queued for the set recording
+        pass
+
+    def stop_all_recordings(self):
+        pass
+
+
+def rep_index_path(set_video_path):
+    """
+    Path of the rep ranges saved next to a set video.
+    """
+    return f"{os.path.splitext(set_video_path)[0]}_reps.json"
+
+
+def save_rep_index(set_video_path, frame_rate, rep_ranges, frame_count):
+    """
+    Save the frame ranges of the reps of a set video.
+
+    Args:
+        set_video_path (str): The set video.
+        frame_rate (float): Frame rate of the set video.
+        rep_ranges (dict): Rep number -> [first frame, end frame or None], the end frame is exclusive.
+        frame_count (int): Frames of the set video, the end of a rep that was not stopped.
+
+    Returns:
+        dict: The saved index, {"frame_rate": ..., "reps": [{"rep", "start_frame", "end_frame"}, ...]}.
+    """
+    reps = []
+    for rep, (start_frame, end_frame) in sorted(rep_ranges.items()):
+        end_frame = frame_count if end_frame is None else end_frame
+        if end_frame > start_frame:
+            reps.append({"rep": rep, "start_frame": start_frame, "end_frame": end_frame})
+    rep_index = {"frame_rate": frame_rate, "reps": reps}
+    with open(rep_index_path(set_video_path), "w") as file:
+        json.dump(rep_index, file, indent=4)
+    return rep_index
+
+
+def load_rep_range(set_video_dir, rep_video_id):
+    """
+    Find a rep in the saved rep ranges of its set video.
+
+    Args:
+        set_video_dir (str): Directory of the set videos.
+        rep_video_id (str): Rep video name without extension, e.g. "SQUAT-20241213-142709_set_1_rep_2".
+
+    Returns:
+        tuple: (set video path, start seconds, end seconds), or None if the rep has no saved range.
+    """
+    set_video_id, _, rep = rep_video_id.rpartition("_rep_")
+    set_video_path = os.path.join(set_video_dir, f"{set_video_id}.mp4")
+    try:
+        with open(rep_index_path(set_video_path), "r") as file:
+            rep_index = json.load(file)
+    except FileNotFoundError:
+        return None
+    for rep_range in rep_index["reps"]:
+        if str(rep_range["rep"]) == rep:
+            return (set_video_path, rep_range["start_frame"] / rep_index["frame_rate"],
+                    rep_range["end_frame"] / rep_index["frame_rate"])
+    return None
+
+
+def cut_rep_clips(set_video_path, rep_index, output_dir):
+    """
+    Copy the rep ranges of a set video into rep clips without decoding or encoding the frames.
+    A clip starts at the keyframe before its rep; the frames before the rep get negative timestamps,
+    so players start at the first frame of the rep. With B-frames a clip may end with up to the
+    B-frame delay of reference frames shown after the rep. Needs PyAV; without it the reps keep playing from
+    their range of the set video.
+
+    Returns:
+        list: Paths of the written rep clips.
+    """
+    try:
+        import av
+    except ImportError:
+        print("PyAV is not installed, rep clips are played from the set video.")
+        return []
+
+    set_video_id = os.path.splitext(os.path.basename(set_video_path))[0]
+    clip_paths = []
+    with av.open(set_video_path) as source:
+        stream = source.streams.video[0]
+        for rep_range in rep_index["reps"]:
+            start_pts = round(rep_range["start_frame"] / rep_index["frame_rate"] / stream.time_base)
+            end_pts = round(rep_range["end_frame"] / rep_index["frame_rate"] / stream.time_base)
+            clip_path = os.path.join(output_dir, f"{set_video_id}_rep_{rep_range['rep']}.mp4")
+            # Mux into a temporary file so playback never finds a clip that is still being written
+            temp_path = f"{clip_path}.tmp"
+            with av.open(temp_path, "w", format="mp4") as clip:
+                if hasattr(clip, "add_stream_from_template"):
+                    clip_stream = clip.add_stream_from_template(stream)
+                else:
+                    clip_stream = clip.add_stream(template=stream)
+                source.seek(start_pts, stream=stream, backward=True, any_frame=False)
+                for packet in source.demux(stream):
+                    if packet.dts is None:  # Flush packet at the end of the file
+                        continue
+                    # Packets come in decode order; with B-frames a reference frame shown after the rep is
+                    # stored before frames of the rep that need it, so stop on the decode time
+                    if packet.dts >= end_pts:
+                        break
+                    packet.pts -= start_pts
+                    packet.dts -= start_pts
+                    packet.stream = clip_stream
+                    clip.mux(packet)
+            os.replace(temp_path, clip_path)
+            clip_paths.append(clip_path)
+    print(f"Cut {len(clip_paths)} rep clips from {set_video_path}.")
+    return clip_paths
@@ -1,7 +1,9 @@
 from datetime import datetime, timedelta
 import json
+import os
+import time
 
-from . import utils
+from . import metrics_utils, utils
 
 
 def generate_exercise_id(exercise_name):
@@ -9,10 +11,20 @@ def generate_exercise_id(exercise_name):
     return f"{exercise_name.upper()}-{current_time}"
 
 
-def save_workout_set_record(exercise_id, set_number, reps_results, workout_time, mistake_counts, workout_config):
-    # Prepare workout set data
-    workout_data_file = workout_config["workout_data_directory"]["workout_data"]
+def build_workout_set_record(exercise_id, set_number, reps_results, workout_time, mistake_counts):
+    """
+    Build the record of a completed set, as stored in the workout data file.
 
+    Args:
+        exercise_id (str): Exercise ID from generate_exercise_id, e.g. "SQUAT-20241213-142709".
+        set_number (int): Number of the set within the exercise.
+        reps_results (list): Result of every rep from feedback_utils.analyze_rep.
+        workout_time (str): Duration of the set as "mm:ss".
+        mistake_counts (dict): Number of reps of every posture label.
+
+    Returns:
+        dict: Workout set record.
+    """
     parts = exercise_id.split("-")
 
     # Extract the date and time from the appropriate parts
@@ -20,7 +32,7 @@ def save_workout_set_record(exercise_id, set_number, reps_results, workout_time,
     time_str = parts[2]
     formatted_datetime = datetime.strptime(date_str + " " + time_str, "%Y%m%d %H%M%S")
 
-    workout_set = {
+    return {
         "exercise_id": exercise_id,
         "exercise_datetime": formatted_datetime.strftime("%Y-%m-%d %H:%M:%S"),
         "set_number": set_number,
@@ -30,6 +42,13 @@ def save_workout_set_record(exercise_id, set_number, reps_results, workout_time,
         "completed_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     }
 
+
+def store_workout_set_record(workout_set, workout_config):
+    """
+    Append a workout set record to the workout data file of the exercise.
+    """
+    workout_data_file = workout_config["workout_data_directory"]["workout_data"]
+
     # Load existing workout data from JSON file
     try:
         with open(workout_data_file, "r") as file:
@@ -40,8 +59,60 @@ def save_workout_set_record(exercise_id, set_number, reps_results, workout_time,
     # Append the new workout set data
     workout_data.append(workout_set)
 
+    write_start = time.perf_counter()
     with open(workout_data_file, "w") as file:
         json.dump(workout_data, file, indent=4)
+    metrics_utils.RECORD_WRITE_SECONDS.observe(time.perf_counter() - write_start, operation="store")
+
+
+def merge_workout_set_records(workout_sets, workout_config, fields=("mistake_counts", "reps_results")):
+    """
+    Merge re-analysed set records into the workout data file of the exercise.
+    A stored set with the same exercise ID and set number takes the given fields of the new record,
+    sets that are not stored yet are appended. The file is only rewritten if its content changes.
+
+    Args:
+        workout_sets (list): Workout set records from build_workout_set_record.
+        workout_config (dict): Workout configuration of the exercise.
+        fields (tuple): Fields of stored sets replaced by the new records.
+
+    Returns:
+        bool: True if the file was rewritten.
+    """
+    workout_data_file = workout_config["workout_data_directory"]["workout_data"]
+    try:
+        with open(workout_data_file, "r") as file:
+            workout_data = json.load(file)
+    except FileNotFoundError:
+        workout_data = []
+
+    merged_data = [dict(record) for record in workout_data]
+    stored_sets = {(record["exercise_id"], record["set_number"]): record for record in merged_data}
+    for workout_set in workout_sets:
+        stored_set = stored_sets.get((workout_set["exercise_id"], workout_set["set_number"]))
+        if stored_set is None:
+            merged_data.append(workout_set)
+            stored_sets[(workout_set["exercise_id"], workout_set["set_number"])] = workout_set
+        else:
+            stored_set.update({field: workout_set[field] for field in fields})
+
+    if merged_data == workout_data:
+        return False
+
+    # Write to a temporary file first so an interrupted write cannot corrupt the records
+    write_start = time.perf_counter()
+    temp_file = f"{workout_data_file}.tmp"
+    with open(temp_file, "w") as file:
+        json.dump(merged_data, file, indent=4)
+    os.replace(temp_file, workout_data_file)
+    metrics_utils.RECORD_WRITE_SECONDS.observe(time.perf_counter() - write_start, operation="merge")
+    return True
+
+
+def save_workout_set_record(exercise_id, set_number, reps_results, workout_time, mistake_counts, workout_config):
+    # Prepare workout set data
+    workout_set = build_workout_set_record(exercise_id, set_number, reps_results, workout_time, mistake_counts)
+    store_workout_set_record(workout_set, workout_config)
 
 
 def load_workout_summary(workout_config,exercise):